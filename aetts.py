@@ -0,0 +1,290 @@
+# aetts.py
+"""
+Headless batch runner for the AETTS pipeline.
+
+    python -m aetts run --input videos/ --steps extract,transcribe,translate,tts
+
+Every input file gets a folder under --output with its results and a
+manifest.json recording which stages are done and with what settings, so an
+interrupted or repeated run only does the remaining work.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import AppConfig
+import instrumentation
+from audio_processing import step1_prepare_audio
+from transcription_logic import step4_run_transcription
+from translation_logic import step5_translate_text
+from synthesis_logic import resolve_kokoro_voice, synthesize_speech_buffer
+from pipeline_runner import PIPELINED_STAGES, PipelineRunner, format_stats
+
+STAGES = ["extract", "transcribe", "translate", "tts"]
+MEDIA_EXTENSIONS = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".wav", ".mp3", ".m4a", ".flac", ".ogg"}
+
+# Models are shared by all workers. Whisper installs its kv-cache hooks on the model
+# for every call, so model stages run one file at a time; extraction is only ffmpeg
+# and file I/O and overlaps freely with them.
+_stage_locks = {stage: threading.Lock() for stage in STAGES if stage != "extract"}
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+def find_inputs(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path)
+                  if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS)
+
+
+class Manifest:
+    """Per-file record of completed stages, stored as manifest.json in the file's output folder."""
+
+    def __init__(self, job_dir, input_path):
+        self.path = os.path.join(job_dir, "manifest.json")
+        stat = os.stat(input_path)
+        source = {"input": os.path.abspath(input_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self.data = {"source": source, "stages": {}}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            # A changed input file invalidates everything recorded for it.
+            if saved.get("source") == source:
+                self.data = saved
+
+    def is_done(self, stage, settings):
+        entry = self.data["stages"].get(stage)
+        return (entry is not None and entry["status"] == "done" and entry["settings"] == settings
+                and all(os.path.exists(p) for p in entry["outputs"]))
+
+    def outputs(self, stage):
+        entry = self.data["stages"].get(stage)
+        return entry["outputs"] if entry and entry["status"] == "done" else None
+
+    def chunks(self, stage):
+        """The stage's outputs paired with the second of the recording each starts at, as step 4 takes them."""
+        outputs = self.outputs(stage)
+        if not outputs:
+            return None
+        starts = self.data["stages"][stage].get("starts") or [0.0] * len(outputs)
+        return list(zip(outputs, starts))
+
+    def record(self, stage, settings, status, outputs=(), seconds=0.0, error=None, starts=None):
+        self.data["stages"][stage] = {"status": status, "settings": settings, "outputs": list(outputs),
+                                      "seconds": round(seconds, 3), "error": error}
+        if starts is not None:
+            self.data["stages"][stage]["starts"] = list(starts)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def _stage_settings(stage, args):
+    if stage == "extract":
+        return {"remove_silence": args.remove_silence, "min_silence_len": args.min_silence_len,
+                "silence_thresh": args.silence_thresh, "chunk_seconds": args.chunk_seconds}
+    if stage == "transcribe":
+        return {"model": args.model, "language": args.language, "int8": args.int8, "vad": args.vad}
+    if stage == "translate":
+        return {"model": os.path.abspath(AppConfig.LOCAL_TRANSLATION_MODEL_PATH), "int8": args.int8}
+    return {"voice": args.voice, "speed": args.speed}
+
+
+def _run_extract(input_path, job_dir, manifest, args):
+    """Returns the chunk files and the second of the recording each one starts at."""
+    chunks, _ = step1_prepare_audio(input_path, args.ffmpeg, args.remove_silence, args.min_silence_len,
+                                    args.silence_thresh, args.chunk_seconds, in_memory=True, progress=_no_progress)
+    audio_dir = os.path.join(job_dir, "prepared_audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    paths = [chunk.write_wav(os.path.join(audio_dir, f"part_{i:03d}.wav")) for i, (chunk, _) in enumerate(chunks)]
+    return paths, [start for _, start in chunks]
+
+
+def _run_transcribe(input_path, job_dir, manifest, args):
+    audio_files = manifest.chunks("extract") or [input_path]
+    full_text = segments_text = ""
+    for full_text, segments_text, _ in step4_run_transcription(audio_files, args.model, args.language, args.gpu,
+                                                               args.int8, args.vad, progress=_no_progress):
+        pass
+    return [_write(os.path.join(job_dir, "transcript.txt"), full_text),
+            _write(os.path.join(job_dir, "segments.txt"), segments_text)]
+
+
+def _run_translate(input_path, job_dir, manifest, args):
+    transcript = manifest.outputs("transcribe")
+    if not transcript:
+        raise RuntimeError("No transcript found; include the 'transcribe' step.")
+    translated = ""
+    for translated in step5_translate_text(_read(transcript[0]), args.gpu, args.int8, progress=_no_progress):
+        pass
+    return [_write(os.path.join(job_dir, "translation.txt"), translated)]
+
+
+def _run_tts(input_path, job_dir, manifest, args):
+    source = manifest.outputs("translate") or manifest.outputs("transcribe")
+    if not source:
+        raise RuntimeError("No text found; include the 'transcribe' or 'translate' step.")
+    voice_id, lang = resolve_kokoro_voice(args.voice)
+    buffer = synthesize_speech_buffer(_read(source[0]), lang, voice_id, args.speed, args.gpu)
+    return [buffer.write_wav(os.path.join(job_dir, "speech.wav"))]
+
+
+def _run_pipelined(input_path, job_dir, manifest, args):
+    """Transcribe, translate and tts overlapped (pipeline_runner.py). Returns {stage: outputs}."""
+    audio_files = manifest.chunks("extract") or [input_path]
+    runner = PipelineRunner(audio_files, args.model, args.language, args.voice, args.speed, args.gpu, args.int8,
+                            args.vad)
+    transcript, translation, speech = runner.start().result()
+    print(f"[{os.path.basename(input_path)}] pipeline queues:\n{format_stats(runner.stats())}")
+    return {"transcribe": [_write(os.path.join(job_dir, "transcript.txt"), transcript),
+                           _write(os.path.join(job_dir, "segments.txt"), runner.segments)],
+            "translate": [_write(os.path.join(job_dir, "translation.txt"), translation)],
+            "tts": [speech.write_wav(os.path.join(job_dir, "speech.wav"))]}
+
+
+_RUNNERS = {"extract": _run_extract, "transcribe": _run_transcribe, "translate": _run_translate, "tts": _run_tts}
+
+
+def process_file(input_path, args):
+    """Runs the requested stages for one file. Returns {stage: "done" | "skipped" | "failed"}."""
+    job_dir = os.path.join(args.output, os.path.basename(input_path))
+    os.makedirs(job_dir, exist_ok=True)
+    manifest = Manifest(job_dir, input_path)
+    outcome = {}
+    upstream_changed = False
+    pipelined = {}
+    for stage in args.steps:
+        settings = _stage_settings(stage, args)
+        if not args.force and not upstream_changed and manifest.is_done(stage, settings):
+            outcome[stage] = "skipped"
+            continue
+        # Stages after one that was re-run must be re-run too.
+        upstream_changed = True
+        started = time.perf_counter()
+        try:
+            lock = _stage_locks.get(stage)
+            if stage in pipelined:
+                outputs = pipelined[stage]
+            elif args.pipelined and stage == "transcribe" and set(PIPELINED_STAGES) <= set(args.steps):
+                # All three models at once; taken in stage order, like every other path, so this cannot deadlock.
+                with _stage_locks["transcribe"], _stage_locks["translate"], _stage_locks["tts"]:
+                    pipelined = _run_pipelined(input_path, job_dir, manifest, args)
+                outputs = pipelined[stage]
+            elif lock:
+                with lock:
+                    outputs = _RUNNERS[stage](input_path, job_dir, manifest, args)
+            else:
+                outputs = _RUNNERS[stage](input_path, job_dir, manifest, args)
+            starts = None
+            if isinstance(outputs, tuple):  # extract also returns the chunk start times
+                outputs, starts = outputs
+        except Exception as e:  # gr.Error from the step functions included
+            message = getattr(e, "message", None) or str(e)
+            manifest.record(stage, settings, "failed", seconds=time.perf_counter() - started, error=message)
+            print(f"[{os.path.basename(input_path)}] {stage} failed: {message}")
+            outcome[stage] = "failed"
+            break
+        elapsed = time.perf_counter() - started
+        manifest.record(stage, settings, "done", outputs, elapsed, starts=starts)
+        print(f"[{os.path.basename(input_path)}] {stage} done in {elapsed:.1f}s")
+        outcome[stage] = "done"
+    return outcome
+
+
+def run(args):
+    inputs = find_inputs(args.input)
+    if not inputs:
+        print(f"No media files found in '{args.input}'.")
+        return 1
+    print(f"Processing {len(inputs)} file(s) with {args.workers} worker(s): {', '.join(args.steps)}")
+    if args.pipelined and not set(PIPELINED_STAGES) <= set(args.steps):
+        print(f"--pipelined needs the steps {','.join(PIPELINED_STAGES)}; running them one after another.")
+    started = time.perf_counter()
+    if args.profile:
+        # cProfile only sees the thread it runs in, so files are processed one by one here.
+        with instrumentation.profile(args.profile):
+            results = [process_file(path, args) for path in inputs]
+    else:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(lambda path: process_file(path, args), inputs))
+    elapsed = time.perf_counter() - started
+
+    counts = {status: sum(list(r.values()).count(status) for r in results) for status in ("done", "skipped", "failed")}
+    failed_files = sum(1 for r in results if "failed" in r.values())
+    print(f"Finished {len(inputs)} file(s) in {elapsed:.1f}s ({len(inputs) / max(elapsed, 1e-9) * 60:.1f} files/min); "
+          f"stages done: {counts['done']}, skipped: {counts['skipped']}, failed: {counts['failed']}")
+    if instrumentation.summary():
+        print(instrumentation.format_summary())
+    if args.metrics:
+        instrumentation.to_json(args.metrics)
+        print(f"Stage metrics written to {args.metrics}")
+    return 1 if failed_files else 0
+
+
+def _parse_steps(value):
+    steps = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown step(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    return sorted(steps, key=STAGES.index)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="aetts", description="Batch runner for the AETTS pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Process a file or every media file in a directory.")
+    run_parser.add_argument("--input", required=True, help="Media file or directory of media files")
+    run_parser.add_argument("--output", default=AppConfig.CLI_OUTPUT_DIR, help="Folder for results and manifests")
+    run_parser.add_argument("--steps", type=_parse_steps, default=list(STAGES),
+                            help=f"Comma-separated subset of: {','.join(STAGES)}")
+    run_parser.add_argument("--workers", type=int, default=AppConfig.CLI_WORKERS, help="Files processed concurrently")
+    run_parser.add_argument("--force", action="store_true", help="Re-run stages even if the manifest marks them done")
+    run_parser.add_argument("--ffmpeg", default=AppConfig.FFMPEG_PATH)
+    run_parser.add_argument("--keep-silence", dest="remove_silence", action="store_false")
+    run_parser.add_argument("--min-silence-len", type=int, default=500)
+    run_parser.add_argument("--silence-thresh", type=int, default=-50)
+    run_parser.add_argument("--chunk-seconds", type=int, default=180)
+    run_parser.add_argument("--model", default=AppConfig.DEFAULT_WHISPER_MODEL, choices=AppConfig.WHISPER_MODELS)
+    run_parser.add_argument("--language", default=AppConfig.DEFAULT_LANGUAGE, choices=AppConfig.LANGUAGES)
+    run_parser.add_argument("--voice", default=AppConfig.DEFAULT_KOKORO_VOICE_LABEL, choices=list(AppConfig.KOKORO_VOICES))
+    run_parser.add_argument("--speed", type=float, default=1.0)
+    run_parser.add_argument("--cpu", dest="gpu", action="store_false", help="Do not use CUDA/MPS even if available")
+    run_parser.add_argument("--int8", action=argparse.BooleanOptionalAction, default=AppConfig.QUANTIZE_CPU_MODELS,
+                            help="Transcribe and translate with int8 quantized models when running on CPU")
+    run_parser.add_argument("--vad", action=argparse.BooleanOptionalAction, default=AppConfig.WHISPER_VAD_BATCHING,
+                            help="Transcribe only the detected speech, decoding it in batches")
+    run_parser.add_argument("--pipelined", action="store_true",
+                            help="Overlap transcribe, translate and tts on one file; prints queue depths per stage")
+    run_parser.add_argument("--metrics", metavar="PATH", help="Write per-stage timing and memory metrics as JSON")
+    run_parser.add_argument("--profile", metavar="PATH",
+                            help="Run under cProfile and write the stats to PATH (processes files one at a time)")
+    return parser
+
+
+def main(argv=None):
+    # --cpu or not, each step falls back to the CPU by itself when no GPU is present.
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
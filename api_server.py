@@ -0,0 +1,138 @@
+# api_server.py
+"""
+HTTP API for submitting pipeline jobs, with the Gradio interface mounted at /.
+
+    python api_server.py
+
+POST /jobs                 submit a file (or text) and the stages to run -> job id
+GET  /jobs/{id}            status, current stage and per-stage timings
+GET  /jobs/{id}/result     transcript / translation once the job has finished
+GET  /jobs/{id}/speech     synthesized WAV, for jobs that ran the 'tts' stage
+GET  /queue                queue depths and worker counts per stage
+GET  /models               loaded models, memory use against the budget, evictions
+GET  /metrics              per-stage timings in Prometheus text format (?format=json for JSON)
+GET  /ready                200 once the startup model preload is done, 503 before
+"""
+import os
+import shutil
+import tempfile
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+
+from config import AppConfig
+import instrumentation
+import warmup
+from job_queue import STAGES, JobQueue, QueueFullError, pipeline_runners
+from model_manager import get_model_stats
+
+
+def create_app(job_queue=None, mount_ui=True):
+    """Builds the FastAPI app. Pass a JobQueue with stub runners to exercise the API without models."""
+    job_queue = job_queue or JobQueue(pipeline_runners())
+    api = FastAPI(title="AETTS API")
+    api.state.job_queue = job_queue
+
+    def _get_job(job_id):
+        job = job_queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job id.")
+        return job
+
+    @api.post("/jobs", status_code=202)
+    def submit_job(
+        stages: str = Form(",".join(STAGES)),
+        file: UploadFile | None = File(None),
+        text: str | None = Form(None),
+        model_size: str = Form(AppConfig.DEFAULT_WHISPER_MODEL),
+        language: str = Form(AppConfig.DEFAULT_LANGUAGE),
+        voice: str = Form(AppConfig.DEFAULT_KOKORO_VOICE_LABEL),
+        speed: float = Form(1.0),
+        remove_silence: bool = Form(True),
+        chunk_duration: int = Form(180),
+        quantize: bool = Form(AppConfig.QUANTIZE_CPU_MODELS),
+        vad_batching: bool = Form(AppConfig.WHISPER_VAD_BATCHING),
+    ):
+        stage_list = [s.strip() for s in stages.split(",") if s.strip()]
+        has_text = bool(text and text.strip())
+        if {"translate", "tts"} & set(stage_list) and "transcribe" not in stage_list and not has_text:
+            raise HTTPException(status_code=400,
+                                detail="The translate and tts stages need text or a transcribe stage before them.")
+        payload = {"model_size": model_size, "language": language, "voice": voice, "speed": speed,
+                   "remove_silence": remove_silence, "chunk_duration": chunk_duration, "quantize": quantize,
+                   "vad_batching": vad_batching}
+        if file is not None:
+            upload_dir = os.path.join(AppConfig.JOB_OUTPUT_DIR, "uploads")
+            os.makedirs(upload_dir, exist_ok=True)
+            suffix = os.path.splitext(file.filename or "")[1]
+            with tempfile.NamedTemporaryFile(dir=upload_dir, suffix=suffix, delete=False) as f:
+                shutil.copyfileobj(file.file, f)
+                payload["input_path"] = f.name
+            # The queue deletes the upload once it is no longer needed (see job_queue.discard_input).
+            payload["delete_input"] = True
+            if has_text:
+                payload["text"] = text
+        elif has_text:
+            if {"extract", "transcribe"} & set(stage_list):
+                raise HTTPException(status_code=400, detail="The extract and transcribe stages need an uploaded file.")
+            payload["text"] = text
+        else:
+            raise HTTPException(status_code=400, detail="Upload a file or provide text.")
+        try:
+            job = job_queue.submit(stage_list, payload)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return job.to_dict()
+
+    @api.get("/jobs/{job_id}")
+    def job_status(job_id: str):
+        return _get_job(job_id).to_dict()
+
+    @api.get("/jobs/{job_id}/result")
+    def job_result(job_id: str):
+        job = _get_job(job_id)
+        if job.status not in ("done", "failed"):
+            raise HTTPException(status_code=409, detail=f"Job is still {job.status} ({job.stage}).")
+        return {"id": job.id, "status": job.status, "error": job.error, "results": job.to_dict()["results"]}
+
+    @api.get("/jobs/{job_id}/speech")
+    def job_speech(job_id: str):
+        path = _get_job(job_id).results.get("speech_path")
+        if not path or not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="No synthesized speech for this job.")
+        return FileResponse(path, media_type="audio/wav", filename=f"{job_id}.wav")
+
+    @api.get("/queue")
+    def queue_stats():
+        return job_queue.stats()
+
+    @api.get("/models")
+    def model_stats():
+        return get_model_stats()
+
+    @api.get("/metrics")
+    def metrics(format: str = "prometheus"):
+        if format == "json":
+            return JSONResponse({"summary": instrumentation.summary(), "records": instrumentation.records()})
+        return PlainTextResponse(instrumentation.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @api.get("/ready")
+    def ready():
+        # For load balancer readiness probes: route traffic here only after warm-up.
+        current = warmup.status()
+        return JSONResponse(current, status_code=200 if current["ready"] else 503)
+
+    if mount_ui:
+        from app import demo
+        api = gr.mount_gradio_app(api, demo, path="/")
+    return api
+
+
+if __name__ == "__main__":
+    warmup.start_preload()
+    if AppConfig.PRELOAD_WAIT_BEFORE_LAUNCH: warmup.wait_until_ready()
+    uvicorn.run(create_app(), host=AppConfig.API_HOST, port=AppConfig.API_PORT)
@@ -3,35 +3,49 @@ import gradio as gr
 import os
 import shutil
 import ssl
+import threading
 
-from config import AppConfig, CUDA_AVAILABLE, MPS_AVAILABLE
-from audio_processing import step1_extract_audio, step2_remove_silence, step3_chunk_audio
+from config import AppConfig, cuda_available, mps_available
+from audio_processing import (discard_chunks, step1_extract_audio, step1_extract_audio_buffer, step1_prepare_audio,
+                              step2_remove_silence, step3_chunk_audio)
 from transcription_logic import step4_run_transcription
 from translation_logic import step5_translate_text
 # update_tts_input_and_lang is currently unused
-from synthesis_logic import step6_synthesize_speech_kokoro
+from synthesis_logic import resolve_kokoro_voice, step6_synthesize_speech_kokoro, step6_stream_speech_kokoro
 from audio_enhancement import enhance_audio
+from pipeline_runner import PipelineRunner, format_stats
+import warmup
 
-print(f"--- Startup Check ---")
-print(f"CUDA Available: {CUDA_AVAILABLE}")
-print(f"MPS (Apple Silicon GPU) Available: {MPS_AVAILABLE}")
-if CUDA_AVAILABLE:
-    import torch
+def print_startup_check():
+    # Imports torch, so it runs in the background rather than delaying the launch.
+    lines = ["--- Startup Check ---", f"CUDA Available: {cuda_available()}",
+             f"MPS (Apple Silicon GPU) Available: {mps_available()}"]
+    if cuda_available():
+        import torch
 
-    print(f"CUDA Device: {torch.cuda.get_device_name(0)}")
-print(f"---------------------")
+        lines.append(f"CUDA Device: {torch.cuda.get_device_name(0)}")
+    lines.append("---------------------")
+    print("\n".join(lines))
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
 def select_audio_for_chunking(choice, original_path, processed_path):
     return original_path if choice == "Use Original Audio" else processed_path
 
+def replace_prepared_chunks(previous, result):
+    # The chunk files made for the last preparation are only deleted once new ones replace them,
+    # so they stay available for download and for transcribing again until then.
+    discard_chunks(previous)
+    return result
+
 with gr.Blocks() as demo:
     gr.Markdown("# AETTS Workflow")
     gr.Markdown(
         "Follow the steps below to extract, transcribe, translate and synthesize audio. "
         "Each section can also be used on its own."
     )
+    readiness_output = gr.Markdown(warmup.status_markdown())
+    readiness_timer = gr.Timer(2)
 
     # --- STATE MANAGEMENT ---
     state_original_audio = gr.State(None)
@@ -47,6 +61,8 @@ with gr.Blocks() as demo:
             with gr.TabItem("From Video File"):
                 video_input = gr.Video(label='Input Video')
                 ffmpeg_path_input = gr.Textbox(label='Path to FFmpeg', value=AppConfig.FFMPEG_PATH)
+                in_memory_checkbox = gr.Checkbox(
+                    label="Keep audio in memory (no temporary WAV files between steps)", value=False)
                 extract_button = gr.Button('1. Extract Audio', variant='primary')
                 audio_output_s1 = gr.Audio(label='Extracted Audio', type='filepath')
 
@@ -73,11 +89,19 @@ with gr.Blocks() as demo:
                 label="Select which audio to use for chunking",
                 value="Use Silence-Removed Audio"
             )
-            chunk_duration_slider = gr.Slider(minimum=30, maximum=600, value=180, step=30, label="Chunk Duration (seconds)")
+            chunk_duration_slider = gr.Slider(minimum=10, maximum=600, value=180, step=10, label="Chunk Duration (seconds)")
     
             process_chunking_button = gr.Button("Prepare for Transcription", variant="primary")
             chunk_download_output = gr.File(label="Download Audio Chunks", interactive=False)
 
+        with gr.Group():
+            gr.Markdown("**2c. One-Pass Preparation from Video (Optional)**")
+            gr.Markdown(
+                "Runs extraction, silence removal and chunking in a single pass over the video from Step 1, "
+                "using the settings above. No intermediate WAV files are written."
+            )
+            prepare_single_pass_button = gr.Button("Prepare from Video in One Pass", variant="secondary")
+
     with gr.Accordion("Step 3: Transcribe to Text", open=False):
         gr.Markdown("#### Step 3: Transcribe to Text")
         gr.Markdown("Convert the prepared audio into text using Whisper.")
@@ -88,7 +112,13 @@ with gr.Blocks() as demo:
             with gr.TabItem("Upload New Audio"):
                 direct_transcribe_audio = gr.Audio(label="Upload Audio File(s)", type="filepath")
 
-        gpu_checkbox = gr.Checkbox(label="Use GPU (CUDA/MPS) if available", value=True, visible=(CUDA_AVAILABLE or MPS_AVAILABLE))
+        gpu_checkbox = gr.Checkbox(label="Use GPU (CUDA/MPS) if available", value=True, visible=False)
+        quantize_checkbox = gr.Checkbox(
+            label="Use int8 quantized models on CPU (faster, slightly less accurate; also applies to translation)",
+            value=AppConfig.QUANTIZE_CPU_MODELS)
+        vad_checkbox = gr.Checkbox(
+            label="Skip silence and decode in batches (much faster on recordings with long pauses)",
+            value=AppConfig.WHISPER_VAD_BATCHING)
         model_size_input = gr.Dropdown(AppConfig.WHISPER_MODELS, value=AppConfig.DEFAULT_WHISPER_MODEL, label="Whisper Model")
         language_input = gr.Dropdown(AppConfig.LANGUAGES, value=AppConfig.DEFAULT_LANGUAGE, label="Audio Language")
         transcribe_button = gr.Button("3. Run Transcription", variant="primary")
@@ -125,10 +155,22 @@ with gr.Blocks() as demo:
 
             sentence_wise_checkbox.change(toggle_pause_slider, sentence_wise_checkbox, pause_duration_slider)
 
-        tts_button = gr.Button("5. Generate Speech", variant="primary")
-        tts_audio_output = gr.Audio(label="Synthesized Speech", type="filepath")
+        with gr.Row():
+            tts_button = gr.Button("5. Generate Speech", variant="primary")
+            tts_stream_button = gr.Button("Stream Speech", variant="secondary")
+        tts_audio_output = gr.Audio(label="Synthesized Speech", type="numpy")
+        tts_stream_output = gr.Audio(label="Streamed Speech", streaming=True, autoplay=True)
         tts_sentence_download_output = gr.File(label="Download Individual Sentences (.zip)", interactive=False)
 
+    with gr.Accordion("Steps 3-5 at Once: Transcribe, Translate and Speak (Pipelined)", open=False):
+        gr.Markdown(
+            "Runs Steps 3, 4 and 5 with their settings above, overlapped: translation starts on the first "
+            "transcribed sentences and speech on the first translated ones. Results appear in the Step 3-5 "
+            "outputs; the queue depths below show which stage the others are waiting for."
+        )
+        pipeline_button = gr.Button("Run Steps 3-5 Pipelined", variant="primary")
+        pipeline_stats_output = gr.Markdown()
+
     with gr.Accordion("Bonus: Audio Enhancement Toolbox", open=False):
         gr.Markdown("#### Bonus: Audio Enhancement Toolbox")
         gr.Markdown(
@@ -148,27 +190,55 @@ with gr.Blocks() as demo:
             noise_reduce_checkbox = gr.Checkbox(label="Enable Noise Reduction (afftdn)", value=False)
             dialogue_enhance_checkbox = gr.Checkbox(label="Enable Dialogue Enhancement", value=False)
         compressor_checkbox = gr.Checkbox(label="Enable Dynamic Range Compressor", value=True)
+        enhance_backend_radio = gr.Radio(
+            ["ffmpeg", "numpy"], value=AppConfig.ENHANCE_BACKEND, label="Processing Engine",
+            info="numpy runs the filters in-process, faster for short clips; noise reduction and dialogue enhancement always use ffmpeg"
+        )
         enhance_button = gr.Button("Enhance Audio", variant="primary")
         with gr.Row():
             enhanced_audio_output = gr.Audio(label="Enhanced Audio Preview", type="filepath")
             enhanced_files_output = gr.File(label="Download Enhanced Files (.zip)")
 
     # --- EVENT HANDLERS ---
+    # Checked when the page loads rather than at import time, which would pull in torch.
+    demo.load(lambda: gr.update(visible=cuda_available() or mps_available()), outputs=[gpu_checkbox])
+    readiness_timer.tick(
+        lambda: (warmup.status_markdown(), gr.Timer(active=not warmup.is_ready())),
+        outputs=[readiness_output, readiness_timer]
+    )
     # ... (no changes to other handlers)
-    extract_button.click(step1_extract_audio, [video_input, ffmpeg_path_input], [audio_output_s1, state_original_audio])
+    extract_button.click(
+        lambda video, ffmpeg, in_memory: (step1_extract_audio_buffer if in_memory else step1_extract_audio)(video, ffmpeg),
+        [video_input, ffmpeg_path_input, in_memory_checkbox], [audio_output_s1, state_original_audio]
+    )
     audio_upload_input.change(lambda x: x, inputs=[audio_upload_input], outputs=[state_original_audio])
     process_silence_button.click(step2_remove_silence, [state_original_audio, min_silence_len_input, silence_thresh_input], [audio_output_s2, state_processed_audio])
     process_chunking_button.click(
-        lambda choice, orig, proc, ffmpeg, dur: step3_chunk_audio(select_audio_for_chunking(choice, orig, proc), True, dur, ffmpeg),
-        inputs=[audio_choice_radio, state_original_audio, state_processed_audio, ffmpeg_path_input, chunk_duration_slider],
+        lambda choice, orig, proc, ffmpeg, dur, previous: replace_prepared_chunks(
+            previous, step3_chunk_audio(select_audio_for_chunking(choice, orig, proc), True, dur, ffmpeg)),
+        inputs=[audio_choice_radio, state_original_audio, state_processed_audio, ffmpeg_path_input, chunk_duration_slider,
+                state_audio_for_transcription],
         outputs=[state_audio_for_transcription, chunk_download_output]
     )
-    transcribe_button.click(
-        lambda prep, direct, model, lang, gpu: step4_run_transcription([d for d in (direct or []) if d] or prep, model, lang, gpu),
-        [state_audio_for_transcription, direct_transcribe_audio, model_size_input, language_input, gpu_checkbox],
-        [editable_transcription_output, segmented_transcription_output, transcript_download_output]
+    prepare_single_pass_button.click(
+        lambda video, ffmpeg, choice, min_len, thresh, dur, in_memory, previous: replace_prepared_chunks(
+            previous, step1_prepare_audio(video, ffmpeg, choice == "Use Silence-Removed Audio", min_len, thresh, dur,
+                                          in_memory)),
+        inputs=[video_input, ffmpeg_path_input, audio_choice_radio, min_silence_len_input, silence_thresh_input,
+                chunk_duration_slider, in_memory_checkbox, state_audio_for_transcription],
+        outputs=[state_audio_for_transcription, chunk_download_output]
     )
-    translate_button.click(step5_translate_text, [editable_transcription_output, gpu_checkbox], [editable_translation_output])
+    @transcribe_button.click(
+        inputs=[state_audio_for_transcription, direct_transcribe_audio, model_size_input, language_input, gpu_checkbox,
+                quantize_checkbox, vad_checkbox],
+        outputs=[editable_transcription_output, segmented_transcription_output, transcript_download_output]
+    )
+    def transcribe_wrapper(prep, direct, model, lang, gpu, int8, vad, progress=gr.Progress()):
+        # A generator function, so Gradio shows each chunk's text as soon as it is transcribed.
+        yield from step4_run_transcription([d for d in (direct or []) if d] or prep, model, lang, gpu, int8, vad,
+                                           progress)
+    translate_button.click(step5_translate_text, [editable_transcription_output, gpu_checkbox, quantize_checkbox],
+                           [editable_translation_output])
     take_from_transcription_button.click(fn=lambda text: text, inputs=[editable_transcription_output], outputs=[tts_input_text])
     take_from_translation_button.click(fn=lambda text: text, inputs=[editable_translation_output], outputs=[tts_input_text])
 
@@ -178,17 +248,40 @@ with gr.Blocks() as demo:
         outputs=[tts_audio_output, tts_sentence_download_output]
     )
     def tts_wrapper(text, voice_label, speed, use_gpu, sentence_wise, pause_duration, progress=gr.Progress()):
-        voice_info = AppConfig.KOKORO_VOICES.get(voice_label)
-        if not voice_info: raise gr.Error(f"Invalid voice selection: {voice_label}")
-        
-        if isinstance(voice_info, tuple):
-            voice_id, lang = voice_info
-        else:
-            voice_id, lang = voice_info, "en"
+        voice_id, lang = resolve_kokoro_voice(voice_label)
 
         # THE FIX: The 'speed' parameter is now correctly passed to the backend function.
         return step6_synthesize_speech_kokoro(text, lang, voice_id, speed, use_gpu, sentence_wise, pause_duration, progress)
 
+    @tts_stream_button.click(
+        inputs=[tts_input_text, kokoro_voice_input, tts_speed_slider, gpu_checkbox],
+        outputs=[tts_stream_output]
+    )
+    def tts_stream_wrapper(text, voice_label, speed, use_gpu, progress=gr.Progress()):
+        voice_id, lang = resolve_kokoro_voice(voice_label)
+        yield from step6_stream_speech_kokoro(text, lang, voice_id, speed, use_gpu, progress)
+
+    @pipeline_button.click(
+        inputs=[state_audio_for_transcription, direct_transcribe_audio, model_size_input, language_input, gpu_checkbox,
+                quantize_checkbox, vad_checkbox, kokoro_voice_input, tts_speed_slider],
+        outputs=[editable_transcription_output, segmented_transcription_output, transcript_download_output,
+                 editable_translation_output, tts_audio_output, pipeline_stats_output]
+    )
+    def pipeline_wrapper(prep, direct, model, lang, gpu, int8, vad, voice_label, speed):
+        runner = PipelineRunner([d for d in (direct or []) if d] or prep, model, lang, voice_label, speed, gpu, int8,
+                                vad)
+        for state in runner.updates():
+            if state["error"]:
+                break
+            yield (state["transcript"], state["segments"], state["transcript_path"] or None, state["translation"],
+                   gr.update(), f"```\n{format_stats(state['stats'])}\n```")
+        try:
+            _, _, speech = runner.result()
+        except RuntimeError as e:
+            raise gr.Error(str(e))
+        yield (state["transcript"], state["segments"], state["transcript_path"] or None, state["translation"],
+               speech.to_gradio(), f"```\n{format_stats(state['stats'])}\n```")
+
     # ... (no changes to enhancement handler)
     enhance_button.click(
         enhance_audio,
@@ -197,7 +290,8 @@ with gr.Blocks() as demo:
             highpass_slider, lowpass_slider,
             compressor_checkbox,
             noise_reduce_checkbox, dialogue_enhance_checkbox,
-            bass_slider, treble_slider, reverb_slider
+            bass_slider, treble_slider, reverb_slider,
+            enhance_backend_radio
         ],
         outputs=[enhanced_audio_output, enhanced_files_output]
     )
@@ -205,4 +299,7 @@ with gr.Blocks() as demo:
 
 if __name__ == "__main__":
     if os.path.exists("transcripts"): shutil.rmtree("transcripts")
+    threading.Thread(target=print_startup_check, daemon=True).start()
+    warmup.start_preload()
+    if AppConfig.PRELOAD_WAIT_BEFORE_LAUNCH: warmup.wait_until_ready()
     demo.launch()
\ No newline at end of file
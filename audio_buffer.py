@@ -0,0 +1,77 @@
+# audio_buffer.py
+import subprocess
+import wave
+
+import numpy as np
+
+
+class AudioBuffer:
+    """
+    Mono float32 audio held in memory, passed between steps (through gr.State or the
+    Python API) instead of a path to a temporary file.
+    """
+
+    def __init__(self, samples, sample_rate):
+        self.samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        self.sample_rate = sample_rate
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __repr__(self):
+        return f"AudioBuffer({self.duration:.2f}s @ {self.sample_rate} Hz)"
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    @classmethod
+    def from_pcm16(cls, samples, sample_rate):
+        """Builds a buffer from int16 samples, scaled the same way whisper.load_audio does."""
+        return cls(np.asarray(samples, dtype=np.int16).astype(np.float32) / 32768.0, sample_rate)
+
+    @classmethod
+    def read_wav(cls, path):
+        """Loads a mono 16-bit PCM WAV file, or returns None for any other format."""
+        try:
+            src = wave.open(path, "rb")
+        except (wave.Error, EOFError):
+            return None
+        with src:
+            if src.getsampwidth() != 2 or src.getnchannels() != 1:
+                return None
+            data = src.readframes(src.getnframes())
+            return cls.from_pcm16(np.frombuffer(data, dtype=np.int16), src.getframerate())
+
+    def to_pcm16(self):
+        """Inverse of from_pcm16; buffers that came from 16-bit PCM round-trip exactly."""
+        return np.clip(np.round(self.samples * 32768.0), -32768, 32767).astype(np.int16)
+
+    def write_wav(self, path):
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(self.to_pcm16().tobytes())
+        return path
+
+    def resample(self, sample_rate):
+        """Linear-interpolation resampling; returns self when the rate already matches."""
+        if sample_rate == self.sample_rate:
+            return self
+        n = int(round(len(self.samples) * sample_rate / self.sample_rate))
+        positions = np.arange(n) * (self.sample_rate / sample_rate)
+        return AudioBuffer(np.interp(positions, np.arange(len(self.samples)), self.samples), sample_rate)
+
+    def to_gradio(self):
+        """(sample_rate, samples) as expected by gr.Audio(type="numpy")."""
+        return self.sample_rate, self.samples
+
+
+def decode_with_ffmpeg(path, ffmpeg_path, sample_rate=16000):
+    """Decodes any file ffmpeg can read into a mono AudioBuffer through a pipe, without a temp file."""
+    cmd = [ffmpeg_path, "-i", path, "-vn", "-loglevel", "error", "-f", "s16le", "-acodec", "pcm_s16le",
+           "-ar", str(sample_rate), "-ac", "1", "pipe:1"]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    data = result.stdout[:len(result.stdout) - len(result.stdout) % 2]
+    return AudioBuffer.from_pcm16(np.frombuffer(data, dtype=np.int16), sample_rate)
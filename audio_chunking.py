@@ -0,0 +1,109 @@
+# audio_chunking.py
+import os
+import wave
+
+import numpy as np
+
+from audio_buffer import AudioBuffer
+from silence_detection import SAMPLE_DTYPES
+
+# Length of the analysis frames compared when looking for a quiet place to cut.
+CUT_FRAME_MS = 20
+
+
+def find_cut_point(frames, frame_rate, target, tolerance):
+    """
+    Frame index near `target` where the audio is quietest.
+    Looks at CUT_FRAME_MS analysis frames within `tolerance` frames either side of
+    the target and cuts in the middle of the lowest-energy one; on ties the frame
+    closest to the target wins.
+    """
+    hop = max(1, frame_rate * CUT_FRAME_MS // 1000)
+    start = max(0, target - tolerance)
+    end = min(len(frames), target + tolerance)
+    n = (end - start) // hop
+    if n <= 0:
+        return min(target, len(frames))
+    region = frames[start:start + n * hop].astype(np.float64)
+    energy = (region * region).reshape(n, hop, -1).sum(axis=(1, 2))
+    centres = start + np.arange(n) * hop + hop // 2
+    order = np.argsort(np.abs(centres - target), kind="stable")
+    return int(centres[order[np.argmin(energy[order])]])
+
+
+class SilenceAwareChunker:
+    """
+    Splits a PCM stream into WAV chunks of roughly `chunk_duration` seconds, cutting
+    at the quietest point within `tolerance` seconds of each target length.
+    Audio is fed in blocks; at most chunk_duration + tolerance seconds are buffered.
+    `chunks` collects (path, start_seconds) for every file written.
+    """
+
+    def __init__(self, output_dir, frame_rate, channels, sample_width, chunk_duration, tolerance):
+        self.output_dir = output_dir
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.target = int(chunk_duration * frame_rate)
+        self.tolerance = int(min(tolerance, chunk_duration / 2) * frame_rate)
+        self.chunks = []
+        self._buffer = np.empty((0, channels), dtype=SAMPLE_DTYPES[sample_width])
+        self._written_frames = 0
+
+    def feed(self, samples):
+        self._buffer = np.concatenate((self._buffer, samples.reshape(-1, self.channels)))
+        while len(self._buffer) >= self.target + self.tolerance:
+            cut = find_cut_point(self._buffer, self.frame_rate, self.target, self.tolerance)
+            self._write(self._buffer[:cut])
+            self._buffer = self._buffer[cut:]
+
+    def finish(self):
+        if len(self._buffer) or not self.chunks:
+            self._write(self._buffer)
+        self._buffer = self._buffer[:0]
+        return self.chunks
+
+    def _write(self, frames):
+        path = os.path.join(self.output_dir, f"chunk_{len(self.chunks):03d}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(self.channels)
+            f.setsampwidth(self.sample_width)
+            f.setframerate(self.frame_rate)
+            f.writeframes(frames.tobytes())
+        self.chunks.append((path, self._written_frames / self.frame_rate))
+        self._written_frames += len(frames)
+
+
+class InMemoryChunker(SilenceAwareChunker):
+    """SilenceAwareChunker for mono 16-bit PCM that keeps each chunk as an AudioBuffer instead of a file."""
+
+    def __init__(self, frame_rate, chunk_duration, tolerance):
+        super().__init__(None, frame_rate, 1, 2, chunk_duration, tolerance)
+
+    def _write(self, frames):
+        self.chunks.append((AudioBuffer.from_pcm16(frames, self.frame_rate), self._written_frames / self.frame_rate))
+        self._written_frames += len(frames)
+
+
+def split_wav_at_silence(input_path, output_dir, chunk_duration, tolerance, block_seconds=10):
+    """
+    Splits a PCM WAV file into chunks cut at low-energy points.
+    Returns [(chunk_path, start_seconds), ...], or None if the file is not PCM WAV.
+    """
+    try:
+        src = wave.open(input_path, "rb")
+    except (wave.Error, EOFError):
+        return None
+    with src:
+        if src.getsampwidth() not in (2, 4):
+            return None
+        dtype = SAMPLE_DTYPES[src.getsampwidth()]
+        chunker = SilenceAwareChunker(output_dir, src.getframerate(), src.getnchannels(), src.getsampwidth(),
+                                      chunk_duration, tolerance)
+        block_frames = int(block_seconds * src.getframerate())
+        while True:
+            data = src.readframes(block_frames)
+            if not data:
+                break
+            chunker.feed(np.frombuffer(data, dtype=dtype))
+        return chunker.finish()
@@ -1,8 +1,77 @@
+import contextlib
 import subprocess
 import os
 import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import gradio as gr
+import dsp_engine
+from config import AppConfig
+from instrumentation import audio_duration, stage
+
+def build_filter_chain(
+    highpass_freq,
+    lowpass_freq,
+    use_compressor,
+    use_noise_reduction,
+    use_dialogue_enhance,
+    bass_gain,
+    treble_gain,
+    reverb_amount,
+):
+    """Returns the ffmpeg -af filter chain for the selected enhancements."""
+    filter_complex = []
+    if highpass_freq > 0:
+        filter_complex.append(f"highpass=f={highpass_freq}")
+    if lowpass_freq > 0:
+        filter_complex.append(f"lowpass=f={lowpass_freq}")
+    if use_noise_reduction:
+        filter_complex.append("afftdn")
+    if use_dialogue_enhance:
+        filter_complex.append("dialoguenhance")
+    if use_compressor:
+        filter_complex.append("acompressor=threshold=0.1:ratio=9:attack=200:release=1000")
+    if bass_gain != 0:
+        filter_complex.append(f"bass=g={bass_gain}")
+    if treble_gain != 0:
+        filter_complex.append(f"treble=g={treble_gain}")
+    if reverb_amount > 0:
+        # a simple reverb using the aecho filter for a warmer feel
+        decays = f"{reverb_amount}|{reverb_amount/2}"
+        filter_complex.append(f"aecho=0.8:0.9:40|60:{decays}")
+    # anull passes the audio through unchanged when nothing is selected
+    return ','.join(filter_complex) or "anull"
+
+def _output_paths(audio_files, temp_dir):
+    """enhanced_<name> for each input; inputs sharing a file name get a numeric suffix."""
+    paths, used = [], set()
+    for i, audio_file in enumerate(audio_files):
+        base, ext = os.path.splitext(os.path.basename(audio_file.name))
+        name = f"enhanced_{base}{ext}"
+        if name in used:
+            name = f"enhanced_{base}_{i + 1}{ext}"
+        used.add(name)
+        paths.append(os.path.join(temp_dir, name))
+    return paths
+
+def _enhance_file(ffmpeg_path, input_path, output_filename, filter_chain, use_dsp, parent):
+    """Enhances one file in-process when use_dsp and soundfile can read it, else with ffmpeg."""
+    if use_dsp and dsp_engine.can_read(input_path):
+        with stage("dsp", parent=parent) as timing:
+            timing.audio_seconds = dsp_engine.process_file(input_path, output_filename, filter_chain)
+        return timing.audio_seconds
+
+    cmd = [
+        ffmpeg_path,
+        '-i', input_path,
+        '-af',
+        filter_chain,
+        '-y', # Overwrite output file if it exists
+        output_filename
+    ]
+    with stage("ffmpeg", audio_seconds=audio_duration(input_path), parent=parent) as timing:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return timing.audio_seconds or 0.0
 
 def enhance_audio(
     audio_files,
@@ -15,64 +84,59 @@ def enhance_audio(
     bass_gain,
     treble_gain,
     reverb_amount,
+    backend=None,
     progress=gr.Progress(),
 ):
     """
-    Enhances audio files using ffmpeg filters.
+    Enhances audio files using ffmpeg filters, or with the same filters in-process
+    when `backend` (default: ENHANCE_BACKEND) is "numpy" (see dsp_engine.py). Up to
+    ENHANCE_WORKERS files are processed at once; with several files, each one is
+    added to the zip as soon as it is done.
     """
     if not audio_files:
         raise gr.Error("No audio files provided.")
 
-    temp_dir = tempfile.mkdtemp()
-    output_paths = []
-
-    for i, audio_file in enumerate(audio_files):
-        progress(i / len(audio_files), desc=f"Processing file {i+1}/{len(audio_files)}")
-        base_name = os.path.basename(audio_file.name)
-        output_filename = os.path.join(temp_dir, f"enhanced_{base_name}")
-
-        filter_complex = []
-        if highpass_freq > 0:
-            filter_complex.append(f"highpass=f={highpass_freq}")
-        if lowpass_freq > 0:
-            filter_complex.append(f"lowpass=f={lowpass_freq}")
-        if use_noise_reduction:
-            filter_complex.append("afftdn")
-        if use_dialogue_enhance:
-            filter_complex.append("dialoguenhance")
-        if use_compressor:
-            filter_complex.append("acompressor=threshold=0.1:ratio=9:attack=200:release=1000")
-        if bass_gain != 0:
-            filter_complex.append(f"bass=g={bass_gain}")
-        if treble_gain != 0:
-            filter_complex.append(f"treble=g={treble_gain}")
-        if reverb_amount > 0:
-            # a simple reverb using the aecho filter for a warmer feel
-            decays = f"{reverb_amount}|{reverb_amount/2}"
-            filter_complex.append(f"aecho=0.8:0.9:40|60:{decays}")
+    filter_chain = build_filter_chain(highpass_freq, lowpass_freq, use_compressor, use_noise_reduction,
+                                      use_dialogue_enhance, bass_gain, treble_gain, reverb_amount)
+    use_dsp = (backend or AppConfig.ENHANCE_BACKEND) == "numpy"
+    if use_dsp and not dsp_engine.supports(filter_chain):
+        print("Noise reduction and dialogue enhancement need ffmpeg; enhancing with ffmpeg instead.")
+        use_dsp = False
+    total = len(audio_files)
+    workers = min(AppConfig.ENHANCE_WORKERS or os.cpu_count() or 1, total)
 
-        cmd = [
-            ffmpeg_path,
-            '-i', audio_file.name,
-            '-af',
-            ','.join(filter_complex),
-            '-y', # Overwrite output file if it exists
-            output_filename
-        ]
+    with stage("enhance_audio", items=total) as timing:
+        temp_dir = tempfile.mkdtemp()
+        output_paths = _output_paths(audio_files, temp_dir)
+        zip_path = os.path.join(temp_dir, "enhanced_audio_files.zip") if total > 1 else None
+        engine = "NumPy" if use_dsp else "ffmpeg"
+        progress(0, desc=f"Processing {total} file(s) with {engine} on {workers} worker(s)...")
 
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
-            output_paths.append(output_filename)
-        except subprocess.CalledProcessError as e:
-            raise gr.Error(f"ffmpeg error: {e.stderr}")
+        with ThreadPoolExecutor(max_workers=workers) as pool, \
+                (zipfile.ZipFile(zip_path, 'w') if zip_path else contextlib.nullcontext()) as zf:
+            futures = {
+                pool.submit(_enhance_file, ffmpeg_path, audio_file.name, output_path, filter_chain, use_dsp, timing): output_path
+                for audio_file, output_path in zip(audio_files, output_paths)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                output_path = futures[future]
+                try:
+                    timing.audio_seconds = (timing.audio_seconds or 0.0) + future.result()
+                except (subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+                    for pending in futures:
+                        pending.cancel()
+                    if isinstance(e, subprocess.CalledProcessError):
+                        raise gr.Error(f"ffmpeg error: {e.stderr}")
+                    raise gr.Error(f"Enhancement error: {e}")
+                if zf is not None:
+                    with stage("write_zip"):
+                        zf.write(output_path, os.path.basename(output_path))
+                    os.remove(output_path)
+                progress(done / total, desc=f"Enhanced {done}/{total} files")
 
-    progress(1, desc="Processing complete!")
+        progress(1, desc="Processing complete!")
 
-    if len(output_paths) == 1:
-        return output_paths[0], None
-    else:
-        zip_path = os.path.join(temp_dir, "enhanced_audio_files.zip")
-        with zipfile.ZipFile(zip_path, 'w') as zf:
-            for f in output_paths:
-                zf.write(f, os.path.basename(f))
-        return None, zip_path
\ No newline at end of file
+        if zip_path is None:
+            return output_paths[0], None
+        else:
+            return None, zip_path
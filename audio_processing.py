@@ -4,10 +4,32 @@ import subprocess
 import os
 import tempfile
 import shutil
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
+import wave
+import numpy as np
+from config import AppConfig
+from audio_buffer import AudioBuffer, decode_with_ffmpeg
+from audio_chunking import InMemoryChunker, SilenceAwareChunker, split_wav_at_silence
+from instrumentation import audio_duration, stage
+from silence_detection import SAMPLE_DTYPES, StreamingSilenceRemover, detect_nonsilent, keep_ranges
+
+# Temporary folders holding chunk files for step 4; only these are removed by discard_chunks().
+CHUNK_DIR_PREFIX = "aetts_chunks_"
+
+
+def discard_chunks(chunks):
+    """
+    Deletes the temporary folder of chunks returned by step1_prepare_audio or step3_chunk_audio.
+    Anything else (in-memory chunks, uploaded or persistent files) is left alone.
+    """
+    for item in chunks or []:
+        path = item[0] if isinstance(item, (tuple, list)) else item
+        if not isinstance(path, str):
+            continue
+        folder = os.path.dirname(os.path.abspath(path))
+        if (os.path.dirname(folder) == os.path.abspath(tempfile.gettempdir())
+                and os.path.basename(folder).startswith(CHUNK_DIR_PREFIX)):
+            shutil.rmtree(folder, ignore_errors=True)
 
-# step1 and step2 functions are unchanged.
 def step1_extract_audio(video_path, ffmpeg_path, progress=gr.Progress()):
     progress(0, desc="Starting...")
     if not video_path: raise gr.Error("Please upload a video file.")
@@ -21,35 +43,181 @@ def step1_extract_audio(video_path, ffmpeg_path, progress=gr.Progress()):
             output_path = temp_file.name
         cmd = [ffmpeg_path, "-i", video_path, "-vn", "-y", "-loglevel", "error", "-acodec", "pcm_s16le", "-ar", "16000",
                "-ac", "1", output_path]
-        subprocess.run(cmd, check=True)
+        with stage("step1_extract") as timing:
+            with stage("ffmpeg"):
+                subprocess.run(cmd, check=True)
+            timing.audio_seconds = audio_duration(output_path)
         progress(1, desc="Audio Extracted!")
         return output_path, output_path
     except Exception as e:
         raise gr.Error(f"Audio extraction failed: {e}")
 
+def _remove_silence_streaming(input_path, output_path, min_silence_len, silence_thresh):
+    """
+    Silence removal for 16-bit PCM WAV files that reads and writes fixed-size blocks,
+    so memory use does not grow with the length of the recording.
+    Returns the number of frames written, or None if the file is not 16-bit PCM WAV.
+    """
+    try:
+        src = wave.open(input_path, "rb")
+    except (wave.Error, EOFError):
+        return None
+    with src:
+        if src.getsampwidth() != 2:
+            return None
+        remover = StreamingSilenceRemover(src.getframerate(), src.getnchannels(), 2, min_silence_len, silence_thresh)
+        block_frames = int(AppConfig.SILENCE_BLOCK_SECONDS * src.getframerate())
+        with wave.open(output_path, "wb") as dst:
+            dst.setnchannels(src.getnchannels())
+            dst.setsampwidth(2)
+            dst.setframerate(src.getframerate())
+            while True:
+                data = src.readframes(block_frames)
+                if not data:
+                    break
+                dst.writeframes(remover.feed(np.frombuffer(data, dtype=np.int16)).tobytes())
+            dst.writeframes(remover.finish().tobytes())
+    return remover.frames_written
+
+def _prepare_from_pcm_stream(stream, chunker, frame_rate, remove_silence, min_silence_len, silence_thresh):
+    """
+    Reads mono 16-bit PCM from a binary stream, drops silence on the fly and feeds
+    the rest to `chunker`. Returns the number of input frames read.
+    """
+    remover = StreamingSilenceRemover(frame_rate, 1, 2, min_silence_len, silence_thresh) if remove_silence else None
+    block_bytes = int(AppConfig.SILENCE_BLOCK_SECONDS * frame_rate) * 2
+    frames_read = 0
+    pending = b""
+    while True:
+        data = stream.read(block_bytes)
+        if not data:
+            break
+        data = pending + data
+        usable = len(data) - len(data) % 2
+        pending = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=np.int16)
+        frames_read += len(samples)
+        chunker.feed(remover.feed(samples) if remover else samples)
+    if remover:
+        chunker.feed(remover.finish())
+    return frames_read
+
+def step1_prepare_audio(video_path, ffmpeg_path, remove_silence, min_silence_len, silence_thresh, chunk_duration,
+                        in_memory=False, progress=gr.Progress()):
+    """
+    Single-pass alternative to steps 1-3: one ffmpeg process decodes the video to
+    16 kHz PCM on stdout, and silence removal and chunking run on that stream in
+    process. Only the final chunks are written to disk, or none at all with
+    `in_memory`, in which case the chunks are returned as AudioBuffers.
+    Returns ([(chunk, start_seconds), ...], chunk paths for download or None).
+    """
+    progress(0, desc="Starting...")
+    if not video_path: raise gr.Error("Please upload a video file.")
+    if not ffmpeg_path or not shutil.which(ffmpeg_path): raise gr.Error(f"FFmpeg not found at '{ffmpeg_path}'.")
+    progress(0.1, desc="Extracting, trimming and chunking audio in one pass...")
+    chunk_dir = None if in_memory else tempfile.mkdtemp(prefix=CHUNK_DIR_PREFIX)
+    tolerance = AppConfig.CHUNK_CUT_TOLERANCE_SECONDS
+    if in_memory:
+        chunker = InMemoryChunker(16000, chunk_duration, tolerance)
+    else:
+        chunker = SilenceAwareChunker(chunk_dir, 16000, 1, 2, chunk_duration, tolerance)
+    try:
+        cmd = [ffmpeg_path, "-i", video_path, "-vn", "-loglevel", "error", "-f", "s16le", "-acodec", "pcm_s16le",
+               "-ar", "16000", "-ac", "1", "pipe:1"]
+        with stage("step1_prepare") as timing:
+            # Decoding, silence removal and chunking overlap, so they are timed together.
+            with stage("ffmpeg_stream"):
+                # stderr goes to a file: a pipe nobody reads while stdout is drained fills up
+                # on a chatty ffmpeg and blocks it, and with it this loop.
+                with tempfile.TemporaryFile() as errors, \
+                        subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors) as proc:
+                    frames_read = _prepare_from_pcm_stream(proc.stdout, chunker, 16000, remove_silence,
+                                                           min_silence_len, silence_thresh)
+                    proc.wait()
+                    errors.seek(0)
+                    stderr = errors.read().decode(errors="replace")
+            if proc.returncode != 0:
+                raise RuntimeError(stderr.strip() or f"ffmpeg exited with code {proc.returncode}")
+            if not frames_read:
+                raise RuntimeError("No audio stream found.")
+            timing.audio_seconds = frames_read / 16000
+            with stage("write_chunks"):
+                chunks = chunker.finish()
+            timing.items = len(chunks)
+        progress(1, desc=f"Created {len(chunks)} chunks.")
+        return chunks, (None if in_memory else [path for path, _ in chunks])
+    except Exception as e:
+        if chunk_dir: shutil.rmtree(chunk_dir, ignore_errors=True)
+        raise gr.Error(f"Audio preparation failed: {e}")
+
+def step1_extract_audio_buffer(video_path, ffmpeg_path, progress=gr.Progress()):
+    """In-memory variant of step1_extract_audio: returns a numpy preview for gr.Audio and an AudioBuffer."""
+    progress(0, desc="Starting...")
+    if not video_path: raise gr.Error("Please upload a video file.")
+    if not ffmpeg_path or not shutil.which(ffmpeg_path): raise gr.Error(f"FFmpeg not found at '{ffmpeg_path}'.")
+    progress(0.3, desc="Extracting audio...")
+    try:
+        with stage("step1_extract") as timing:
+            with stage("ffmpeg"):
+                buffer = decode_with_ffmpeg(video_path, ffmpeg_path, 16000)
+            timing.audio_seconds = buffer.duration
+        progress(1, desc="Audio Extracted!")
+        return buffer.to_gradio(), buffer
+    except Exception as e:
+        raise gr.Error(f"Audio extraction failed: {e}")
+
 def step2_remove_silence(original_audio_path, min_silence_len, silence_thresh, progress=gr.Progress()):
     progress(0, desc="Removing silence...")
     if not original_audio_path: raise gr.Error("No original audio file found to process.")
     input_file = original_audio_path
     try:
-        audio = AudioSegment.from_file(input_file)
-        nonsilent_parts = detect_nonsilent(audio, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
-        if not nonsilent_parts: raise gr.Error("No non-silent parts detected.")
+        with stage("step2_remove_silence") as timing:
+            timing.audio_seconds = (input_file.duration if isinstance(input_file, AudioBuffer)
+                                    else audio_duration(input_file))
+            if isinstance(input_file, AudioBuffer):
+                samples = input_file.to_pcm16()
+                nonsilent_parts = detect_nonsilent(samples, input_file.sample_rate, 1, 2, min_silence_len, silence_thresh)
+                if not nonsilent_parts: raise gr.Error("No non-silent parts detected.")
+                processed = AudioBuffer.from_pcm16(keep_ranges(samples, input_file.sample_rate, 1, nonsilent_parts),
+                                                   input_file.sample_rate)
+                progress(1, desc="Silence Removed!")
+                return processed.to_gradio(), processed
 
-        processed_audio = AudioSegment.empty()
-        for start, end in nonsilent_parts:
-            processed_audio += audio[start:end]
+            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+                processed_path = temp_file.name
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            processed_path = temp_file.name
-        processed_audio.export(processed_path, format="wav")
-        progress(1, desc="Silence Removed!")
-        return processed_path, processed_path
+            # PCM WAV (e.g. from step 1) is streamed block by block; other formats are decoded by pydub.
+            frames_written = _remove_silence_streaming(input_file, processed_path, min_silence_len, silence_thresh)
+            if frames_written is not None:
+                if not frames_written: raise gr.Error("No non-silent parts detected.")
+                progress(1, desc="Silence Removed!")
+                return processed_path, processed_path
+
+            from pydub import AudioSegment
+            with stage("decode"):
+                audio = AudioSegment.from_file(input_file)
+            samples = np.frombuffer(audio.raw_data, dtype=SAMPLE_DTYPES[audio.sample_width])
+            nonsilent_parts = detect_nonsilent(samples, audio.frame_rate, audio.channels, audio.sample_width,
+                                               min_silence_len, silence_thresh)
+            if not nonsilent_parts: raise gr.Error("No non-silent parts detected.")
+
+            kept = keep_ranges(samples, audio.frame_rate, audio.channels, nonsilent_parts)
+            processed_audio = AudioSegment(data=kept.tobytes(), sample_width=audio.sample_width,
+                                           frame_rate=audio.frame_rate, channels=audio.channels)
+
+            with stage("export"):
+                processed_audio.export(processed_path, format="wav")
+            progress(1, desc="Silence Removed!")
+            return processed_path, processed_path
     except Exception as e:
         raise gr.Error(f"Error during silence removal: {str(e)}")
 
 # --- MODIFIED FUNCTION ---
 def step3_chunk_audio(audio_to_chunk_path, do_chunking, chunk_duration, ffmpeg_path, progress=gr.Progress()):
+    """
+    Chunks are returned for step 4 as (chunk, start_seconds) pairs, so segment times
+    refer to the position in the chunked audio; the download list holds only the paths.
+    """
     progress(0, desc="Preparing audio...")
     if not audio_to_chunk_path:
         raise gr.Error("No audio selected for chunking.")
@@ -60,27 +228,49 @@ def step3_chunk_audio(audio_to_chunk_path, do_chunking, chunk_duration, ffmpeg_p
         # Return signature: [files_for_state], [files_for_download_component], [update_for_next_group]
         return [audio_to_chunk_path], None, gr.update(visible=True)
 
-    progress(0.2, desc=f"Chunking into {chunk_duration}-second segments...")
+    progress(0.2, desc=f"Chunking into ~{chunk_duration}-second segments...")
+    if isinstance(audio_to_chunk_path, AudioBuffer):
+        with stage("step3_chunk", audio_seconds=audio_to_chunk_path.duration) as timing:
+            chunker = InMemoryChunker(audio_to_chunk_path.sample_rate, chunk_duration,
+                                      AppConfig.CHUNK_CUT_TOLERANCE_SECONDS)
+            chunker.feed(audio_to_chunk_path.to_pcm16())
+            chunks = chunker.finish()
+            timing.items = len(chunks)
+        progress(1, desc=f"Created {len(chunks)} chunks in memory.")
+        return chunks, None
     try:
-        chunk_dir = tempfile.mkdtemp()
-        output_pattern = os.path.join(chunk_dir, "chunk_%03d.wav")
-        cmd = [ffmpeg_path, "-i", audio_to_chunk_path, "-f", "segment", "-segment_time", str(chunk_duration),
-               "-c:a", "copy", output_pattern]
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        chunk_files = sorted([os.path.join(chunk_dir, f) for f in os.listdir(chunk_dir)],
-                             key=lambda x: int(os.path.splitext(os.path.basename(x))[0].split('_')[1]))
-
-        if not chunk_files:
-            progress(1, desc="Audio is shorter than chunk duration, using single file.")
-            shutil.rmtree(chunk_dir)
-            # Return None for the download component if no chunks were made
-            return [audio_to_chunk_path], None, gr.update(visible=True)
-
-        progress(1, desc=f"Created {len(chunk_files)} chunks.")
-        os.remove(audio_to_chunk_path)
-        # --- KEY CHANGE: Return the list of chunks for both the state and the download component ---
-        return chunk_files, chunk_files
+        chunk_dir = tempfile.mkdtemp(prefix=CHUNK_DIR_PREFIX)
+        with stage("step3_chunk", audio_seconds=audio_duration(audio_to_chunk_path)) as timing:
+            # PCM WAV is cut at the quietest point near each boundary so words are not split;
+            # other formats fall back to fixed-length ffmpeg segments.
+            chunks = split_wav_at_silence(audio_to_chunk_path, chunk_dir, chunk_duration,
+                                          AppConfig.CHUNK_CUT_TOLERANCE_SECONDS, AppConfig.SILENCE_BLOCK_SECONDS)
+            if chunks is not None:
+                chunk_files = [path for path, _ in chunks]
+            else:
+                output_pattern = os.path.join(chunk_dir, "chunk_%03d.wav")
+                cmd = [ffmpeg_path, "-i", audio_to_chunk_path, "-f", "segment", "-segment_time", str(chunk_duration),
+                       "-c:a", "copy", output_pattern]
+                with stage("ffmpeg"):
+                    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+                chunk_files = sorted([os.path.join(chunk_dir, f) for f in os.listdir(chunk_dir)],
+                                     key=lambda x: int(os.path.splitext(os.path.basename(x))[0].split('_')[1]))
+                # Segments are cut at packet boundaries, so each start is the length of the ones before it.
+                starts = np.cumsum([0.0] + [audio_duration(path) for path in chunk_files[:-1]])
+                chunks = list(zip(chunk_files, starts.tolist()))
+
+            if not chunk_files:
+                progress(1, desc="Audio is shorter than chunk duration, using single file.")
+                shutil.rmtree(chunk_dir)
+                # Return None for the download component if no chunks were made
+                return [audio_to_chunk_path], None, gr.update(visible=True)
+
+            timing.items = len(chunk_files)
+            progress(1, desc=f"Created {len(chunk_files)} chunks.")
+            os.remove(audio_to_chunk_path)
+            # --- KEY CHANGE: Return the chunks with their start times for the state, and their paths for download ---
+            return chunks, chunk_files
     except Exception as e:
         if 'chunk_dir' in locals() and os.path.exists(chunk_dir): shutil.rmtree(chunk_dir)
         raise gr.Error(f"Error during chunking: {e}")
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Checks where the silence-aware chunker cuts and how fast it is.
+
+A synthetic recording of speech-like bursts with known pauses is split into
+chunks; a cut counts as clean when it falls inside a pause. Fixed-length cuts
+(what `ffmpeg -segment_time` does) are shown for comparison. That cuts land in
+pauses and lengths stay within the tolerance is tested in tests/test_audio_chunking.py.
+
+Run from the repository root:
+    python benchmarks/bench_chunking.py --minutes 60 --chunk-seconds 30
+"""
+import argparse
+import os
+import sys
+import tempfile
+import shutil
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_chunking import split_wav_at_silence
+
+FRAME_RATE = 16000
+
+
+def write_bursts(path, minutes, seed=0):
+    """Writes bursts of 1-8 s separated by 0.3-1.2 s pauses; returns the pause intervals in seconds."""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * FRAME_RATE)
+    audio = 0.002 * rng.standard_normal(total)
+    pauses = []
+    position = 0
+    while position < total:
+        burst = int(rng.uniform(1, 8) * FRAME_RATE)
+        end = min(position + burst, total)
+        t = np.arange(end - position) / FRAME_RATE
+        audio[position:end] += 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) + 0.05 * rng.standard_normal(end - position)
+        pause = int(rng.uniform(0.3, 1.2) * FRAME_RATE)
+        pauses.append((end / FRAME_RATE, (end + pause) / FRAME_RATE))
+        position = end + pause
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(FRAME_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+    return np.array(pauses)
+
+
+def clean_fraction(cuts, pauses):
+    if not len(cuts):
+        return 1.0
+    inside = [np.any((pauses[:, 0] <= c) & (c <= pauses[:, 1])) for c in cuts]
+    return float(np.mean(inside))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=30.0)
+    parser.add_argument("--chunk-seconds", type=float, default=30.0)
+    parser.add_argument("--tolerance", type=float, default=5.0)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(work_dir, "source.wav")
+        pauses = write_bursts(source, args.minutes)
+        chunk_dir = os.path.join(work_dir, "chunks")
+        os.makedirs(chunk_dir)
+
+        started = time.perf_counter()
+        chunks = split_wav_at_silence(source, chunk_dir, args.chunk_seconds, args.tolerance)
+        elapsed = time.perf_counter() - started
+
+        cuts = np.array([start for _, start in chunks[1:]])
+        fixed_cuts = np.arange(args.chunk_seconds, args.minutes * 60, args.chunk_seconds)
+        lengths = np.diff(np.concatenate(([0.0], cuts, [args.minutes * 60])))
+
+        print(f"{len(chunks)} chunks in {elapsed:.2f}s ({args.minutes * 60 / elapsed:.0f}x real time)")
+        print(f"chunk length: min {lengths.min():.1f}s, max {lengths.max():.1f}s")
+        print(f"cuts inside a pause: silence-aware {clean_fraction(cuts, pauses):.0%}, "
+              f"fixed-length {clean_fraction(fixed_cuts, pauses):.0%}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
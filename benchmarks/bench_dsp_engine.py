@@ -0,0 +1,74 @@
+"""
+Compares the per-clip latency of the in-process enhancement engine
+(dsp_engine.py) with ffmpeg. Output parity with ffmpeg is tested in
+tests/test_dsp_engine.py.
+
+Each figure is the median time to enhance one clip file to another, including file
+I/O and, for ffmpeg, starting the process.
+
+Run from the repository root:
+    python benchmarks/bench_dsp_engine.py
+    python benchmarks/bench_dsp_engine.py --seconds 2 5 30 --repeat 20
+Without ffmpeg only the NumPy latency is measured.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dsp_engine
+import fixtures
+from config import AppConfig
+
+# The UI defaults: high-pass 100 Hz, low-pass 4 kHz, compressor, bass +3 dB, treble -2 dB, reverb 0.1.
+DEFAULT_CHAIN = ("highpass=f=100,lowpass=f=4000,acompressor=threshold=0.1:ratio=9:attack=200:release=1000,"
+                 "bass=g=3,treble=g=-2,aecho=0.8:0.9:40|60:0.1|0.05")
+
+
+def run_ffmpeg(ffmpeg, input_path, output_path, chain):
+    subprocess.run([ffmpeg, "-i", input_path, "-af", chain, "-y", output_path], check=True, capture_output=True)
+
+
+def median_seconds(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[1, 5, 30], help="Clip lengths to time")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    ffmpeg = shutil.which(AppConfig.FFMPEG_PATH) or shutil.which("ffmpeg")
+    workdir = tempfile.mkdtemp(prefix="bench_dsp_")
+    if not ffmpeg:
+        print("ffmpeg not found: NumPy latency only")
+    try:
+        print(f"{'clip s':>7} {'ffmpeg ms':>10} {'numpy ms':>10} {'speedup':>8}")
+        output = os.path.join(workdir, "out.wav")
+        for seconds in args.seconds:
+            clip = fixtures.write_wav(os.path.join(workdir, f"clip_{seconds:g}.wav"), fixtures.speech_like(seconds, seed=2))
+            numpy_s = median_seconds(lambda: dsp_engine.process_file(clip, output, DEFAULT_CHAIN), args.repeat)
+            if ffmpeg:
+                ffmpeg_s = median_seconds(lambda: run_ffmpeg(ffmpeg, clip, output, DEFAULT_CHAIN), args.repeat)
+                print(f"{seconds:>7g} {ffmpeg_s * 1000:>10.1f} {numpy_s * 1000:>10.1f} {ffmpeg_s / numpy_s:>7.1f}x")
+            else:
+                print(f"{seconds:>7g} {'-':>10} {numpy_s * 1000:>10.1f} {'-':>8}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Enhancement throughput for a batch of clips: one ffmpeg process at a time
+versus ENHANCE_WORKERS (default: one per CPU core), with the UI's default
+filters. The clips are synthetic speech from benchmarks/fixtures.py.
+
+Run from the repository root (needs ffmpeg):
+    python benchmarks/bench_enhance_parallel.py --clips 200 --seconds 10
+    python benchmarks/bench_enhance_parallel.py --workers 1 2 4 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+from config import AppConfig
+from audio_enhancement import enhance_audio
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+def run(files, ffmpeg, workers):
+    AppConfig.ENHANCE_WORKERS = workers
+    start = time.perf_counter()
+    # The UI defaults: high-pass 100 Hz, low-pass 4 kHz, compressor, bass +3 dB, treble -2 dB, reverb 0.1.
+    _, zip_path = enhance_audio(files, ffmpeg, 100, 4000, True, False, False, 3, -2, 0.1, progress=_no_progress)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(os.path.dirname(zip_path), ignore_errors=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Length of each clip")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    ffmpeg = shutil.which(AppConfig.FFMPEG_PATH) or shutil.which("ffmpeg")
+    if ffmpeg is None:
+        sys.exit("ffmpeg not found; set FFMPEG_PATH in config.py")
+
+    workdir = tempfile.mkdtemp(prefix="bench_enhance_")
+    try:
+        files = []
+        for i in range(args.clips):
+            samples = fixtures.speech_like(args.seconds, seed=i)
+            files.append(SimpleNamespace(name=fixtures.write_wav(os.path.join(workdir, f"clip_{i:04d}.wav"), samples)))
+
+        run(files[:2], ffmpeg, 2)  # warm the page cache and ffmpeg binary
+        print(f"{args.clips} clips of {args.seconds:g} s, {os.cpu_count()} CPU cores")
+        print(f"{'workers':>8} {'seconds':>9} {'clips/s':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            elapsed = run(files, ffmpeg, workers)
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.clips / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
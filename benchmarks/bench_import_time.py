@@ -0,0 +1,70 @@
+"""
+Guards start-up time: imports each entry module in a fresh interpreter with
+`python -X importtime`, reports the cumulative import time and fails when a
+heavy ML dependency is imported eagerly or a module exceeds its time budget.
+
+torch, whisper, transformers, kokoro and pydub must only be imported when the
+step that needs them first runs.
+
+Run from the repository root:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --modules app aetts --max-seconds 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["app", "aetts", "api_server", "audio_processing", "transcription_logic", "translation_logic",
+                   "synthesis_logic"]
+HEAVY_MODULES = {"torch", "whisper", "transformers", "kokoro", "misaki", "spacy", "pydub"}
+
+
+def import_profile(module):
+    """
+    Returns [(cumulative_us, name), ...] for every module imported by `import module`.
+    Nested imports keep the indentation -X importtime gives them.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile.append((int(cumulative), name[1:].rstrip()))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="Budget for importing each module")
+    parser.add_argument("--top", type=int, default=5, help="Slowest direct imports to list per module")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<22} {'import (s)':>10}  slowest dependencies")
+    for module in args.modules:
+        profile = import_profile(module)
+        total = next(us for us, name in profile if name == module) / 1e6
+        heavy = sorted({name.strip().split(".")[0] for _, name in profile} & HEAVY_MODULES)
+        direct = [(us, name.strip()) for us, name in profile if name.startswith("  ") and not name.startswith("    ")]
+        top_level = sorted(direct, reverse=True)[:args.top]
+        print(f"{module:<22} {total:>10.2f}  " + ", ".join(f"{name} {us / 1e6:.2f}s" for us, name in top_level))
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)} at start-up")
+        if total > args.max_seconds:
+            failures.append(f"{module} takes {total:.2f}s to import (budget {args.max_seconds:.2f}s)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Drives the HTTP API with a stub client against stub stage runners (no models
+needed) and reports job latency for short and long jobs, with and without
+shortest-job-first scheduling, plus how many submissions backpressure rejected.
+
+Each stub stage sleeps in proportion to the job's text length, so a burst of
+mixed jobs shows how long short requests wait behind long ones.
+
+Run from the repository root:
+    python benchmarks/bench_job_queue.py --jobs 40 --long-every 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import job_queue
+from api_server import create_app
+from job_queue import JobQueue
+
+STAGES = ["translate", "tts"]
+
+
+def stub_runners(seconds_per_char):
+    def make(stage):
+        def run(job):
+            time.sleep(len(job.payload["text"]) * seconds_per_char)
+            return {stage: f"{stage} of {len(job.payload['text'])} chars"}
+        return run
+    return {stage: make(stage) for stage in STAGES}
+
+
+def run_burst(args, prioritize):
+    if not prioritize:
+        # Equal cost for every job turns each stage queue into plain FIFO.
+        original = job_queue.estimate_cost
+        job_queue.estimate_cost = lambda payload: 0.0
+    queue = JobQueue(stub_runners(args.ms_per_char / 1000), pool_sizes={stage: 1 for stage in STAGES},
+                     max_pending=args.max_pending)
+    client = TestClient(create_app(queue, mount_ui=False))
+    submitted, rejected = [], 0
+    lock = threading.Lock()
+
+    def submit(i):
+        nonlocal rejected
+        long_job = i % args.long_every == 0
+        text = "x" * (args.long_chars if long_job else args.short_chars)
+        response = client.post("/jobs", data={"stages": ",".join(STAGES), "text": text})
+        with lock:
+            if response.status_code == 429:
+                rejected += 1
+            else:
+                submitted.append((response.json()["id"], long_job))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(args.jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    while queue.stats()["jobs"]["queued"] or queue.stats()["jobs"]["running"]:
+        time.sleep(0.02)
+    latencies = {False: [], True: []}
+    for job_id, long_job in submitted:
+        status = client.get(f"/jobs/{job_id}").json()
+        latencies[long_job].append(status["finished_at"] - status["submitted_at"])
+    queue.shutdown()
+    if not prioritize:
+        job_queue.estimate_cost = original
+    return latencies, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--long-every", type=int, default=4, help="Every n-th job is a long one")
+    parser.add_argument("--short-chars", type=int, default=20)
+    parser.add_argument("--long-chars", type=int, default=200)
+    parser.add_argument("--ms-per-char", type=float, default=0.5)
+    parser.add_argument("--max-pending", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'scheduling':<12} {'short p50':>10} {'short max':>10} {'long p50':>10} {'rejected':>9}")
+    for name, prioritize in (("fifo", False), ("short-first", True)):
+        latencies, rejected = run_burst(args, prioritize)
+        short, long_ = latencies[False] or [0.0], latencies[True] or [0.0]
+        print(f"{name:<12} {statistics.median(short):>10.2f} {max(short):>10.2f} "
+              f"{statistics.median(long_):>10.2f} {rejected:>9}")
+
+
+if __name__ == "__main__":
+    main()
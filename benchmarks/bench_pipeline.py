@@ -0,0 +1,109 @@
+"""
+Compares running transcription, translation and speech synthesis one after
+another with the pipelined mode (pipeline_runner.py), where the three stages
+overlap: total time, time until the first speech is ready, how long each stage
+was busy, and the depth of the queues between them.
+
+Pipelined, the total should approach the busiest stage rather than the sum of
+all three; a queue that is often full points at the stage after it as the
+bottleneck.
+
+Run from the repository root; models whose weights are not downloaded are
+replaced by the stand-ins from fixtures.py:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --chunks 12 --queue-sizes 1 4 16 --stand-ins
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+from config import AppConfig
+from pipeline_runner import PipelineRunner, format_stats
+from transcription_logic import step4_run_transcription
+from translation_logic import step5_translate_text
+from synthesis_logic import resolve_kokoro_voice, synthesize_speech_buffer
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+def sequential(audio_files, args):
+    voice_id, lang = resolve_kokoro_voice(args.voice)
+    busy = {}
+    started = time.perf_counter()
+    for transcript, _, txt_path in step4_run_transcription(audio_files, args.model, args.language, False,
+                                                           progress=_no_progress):
+        pass
+    busy["transcribe"] = time.perf_counter() - started
+    for translation in step5_translate_text(transcript, False, progress=_no_progress):
+        pass
+    busy["translate"] = time.perf_counter() - started - busy["transcribe"]
+    speech = synthesize_speech_buffer(translation, lang, voice_id, use_gpu=False)
+    elapsed = time.perf_counter() - started
+    busy["tts"] = elapsed - busy["transcribe"] - busy["translate"]
+    os.remove(txt_path)
+    return elapsed, busy, speech.duration
+
+
+def pipelined(audio_files, args, queue_size):
+    runner = PipelineRunner(audio_files, args.model, args.language, args.voice, queue_size=queue_size)
+    for state in runner.updates(interval=0.05):
+        pass
+    _, _, speech = runner.result()
+    os.remove(state["transcript_path"])
+    return state["stats"], speech.duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=6, help="Prepared audio chunks to process")
+    parser.add_argument("--chunk-seconds", type=float, default=30.0)
+    parser.add_argument("--queue-sizes", type=int, nargs="+", default=[AppConfig.PIPELINE_QUEUE_SIZE])
+    parser.add_argument("--model", default=AppConfig.DEFAULT_WHISPER_MODEL, choices=AppConfig.WHISPER_MODELS)
+    parser.add_argument("--language", default=AppConfig.DEFAULT_LANGUAGE)
+    parser.add_argument("--voice", default=AppConfig.DEFAULT_KOKORO_VOICE_LABEL)
+    parser.add_argument("--stand-ins", action="store_true", help="Use the stand-in models even if real ones exist")
+    args = parser.parse_args()
+
+    # Cached sentences would make whichever run goes second look faster.
+    AppConfig.TRANSLATION_CACHE_ENABLED = AppConfig.TTS_CACHE_ENABLED = False
+    voice_id, lang = resolve_kokoro_voice(args.voice)
+    models_used = fixtures.install_stand_in_models(force=args.stand_ins, voice_id=voice_id,
+                                                   lang_code=AppConfig.KOKORO_LANG_MAP.get(lang, "a"))
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        audio_files = [fixtures.write_wav(os.path.join(workdir, f"part_{i:03d}.wav"),
+                                          fixtures.speech_like(args.chunk_seconds, seed=i))
+                       for i in range(args.chunks)]
+        print(f"Models: {', '.join(f'{name} {kind}' for name, kind in models_used.items())}")
+        print(f"{args.chunks} chunk(s) of {args.chunk_seconds:g} s\n")
+        sequential(audio_files[:1], args)  # warm-up
+
+        elapsed, busy, speech_seconds = sequential(audio_files, args)
+        print(f"{'mode':<22} {'seconds':>8} {'first speech s':>15} {'speech s':>9}  busy per stage")
+        print(f"{'sequential':<22} {elapsed:>8.2f} {elapsed:>15.2f} {speech_seconds:>9.1f}  "
+              + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in busy.items()))
+        details = []
+        for queue_size in args.queue_sizes:
+            stats, speech_seconds = pipelined(audio_files, args, queue_size)
+            print(f"{f'pipelined, queue {queue_size}':<22} {stats['elapsed_s']:>8.2f} "
+                  f"{stats['first_speech_s'] or 0:>15.2f} {speech_seconds:>9.1f}  "
+                  + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stats["busy_s"].items())
+                  + f"  ({elapsed / stats['elapsed_s']:.2f}x)")
+            details.append((queue_size, stats))
+        for queue_size, stats in details:
+            print(f"\nQueues with room for {queue_size}:\n{format_stats(stats)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
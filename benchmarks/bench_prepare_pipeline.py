@@ -0,0 +1,91 @@
+"""
+Compares the three-step audio preparation (extract, remove silence, chunk) with
+the single-pass pipeline that streams ffmpeg's output through silence removal
+and chunking in process.
+
+Reports wall time and the bytes each path writes to disk. Needs ffmpeg; any
+file ffmpeg can read works as input, and a synthetic WAV is generated when no
+input is given.
+
+Run from the repository root:
+    python benchmarks/bench_prepare_pipeline.py --input talk.mp4
+    python benchmarks/bench_prepare_pipeline.py --minutes 30
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_chunking import write_bursts
+from audio_processing import step1_extract_audio, step1_prepare_audio, step2_remove_silence, step3_chunk_audio
+from config import AppConfig
+
+
+def no_progress(*args, **kwargs):
+    pass
+
+
+def file_bytes(paths):
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def run_three_step(input_path, ffmpeg_path, min_silence_len, silence_thresh, chunk_seconds):
+    start = time.perf_counter()
+    extracted, _ = step1_extract_audio(input_path, ffmpeg_path, progress=no_progress)
+    written = os.path.getsize(extracted)
+    processed, _ = step2_remove_silence(extracted, min_silence_len, silence_thresh, progress=no_progress)
+    written += os.path.getsize(processed)
+    _, chunks = step3_chunk_audio(processed, True, chunk_seconds, ffmpeg_path, progress=no_progress)
+    elapsed = time.perf_counter() - start
+    written += file_bytes(chunks)
+    os.remove(extracted)
+    return elapsed, written, chunks
+
+
+def run_single_pass(input_path, ffmpeg_path, min_silence_len, silence_thresh, chunk_seconds):
+    start = time.perf_counter()
+    _, chunks = step1_prepare_audio(input_path, ffmpeg_path, True, min_silence_len, silence_thresh, chunk_seconds,
+                                    progress=no_progress)
+    elapsed = time.perf_counter() - start
+    return elapsed, file_bytes(chunks), chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", help="Video or audio file (default: synthetic WAV)")
+    parser.add_argument("--minutes", type=float, default=10.0, help="Length of the synthetic input")
+    parser.add_argument("--ffmpeg", default=AppConfig.FFMPEG_PATH)
+    parser.add_argument("--min-silence-len", type=int, default=500)
+    parser.add_argument("--silence-thresh", type=int, default=-50)
+    parser.add_argument("--chunk-seconds", type=int, default=180)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        input_path = args.input
+        if not input_path:
+            input_path = os.path.join(work_dir, "input.wav")
+            write_bursts(input_path, args.minutes)
+
+        settings = (args.min_silence_len, args.silence_thresh, args.chunk_seconds)
+        results = {}
+        for name, run in (("three-step", run_three_step), ("single-pass", run_single_pass)):
+            elapsed, written, chunks = run(input_path, args.ffmpeg, *settings)
+            results[name] = (elapsed, written, len(chunks))
+            shutil.rmtree(os.path.dirname(chunks[0]), ignore_errors=True)
+
+        print(f"{'path':<12} {'wall (s)':>9} {'written (MB)':>13} {'chunks':>7}")
+        for name, (elapsed, written, count) in results.items():
+            print(f"{name:<12} {elapsed:>9.2f} {written / 1e6:>13.1f} {count:>7}")
+        three, single = results["three-step"], results["single-pass"]
+        print(f"speedup {three[0] / single[0]:.2f}x, {100 * (1 - single[1] / three[1]):.0f}% fewer bytes written")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
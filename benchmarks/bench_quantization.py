@@ -0,0 +1,121 @@
+"""
+Compares the float32 and int8 (dynamically quantised) CPU models: accuracy,
+latency and memory for Whisper and the translation model.
+
+Translation is scored with BLEU against the English references in
+data/de_en_sample.tsv. Whisper is scored with WER on those English references,
+spoken by Kokoro (no recordings are bundled), or on your own recordings:
+    --audio clip1.wav clip2.wav --transcripts clip1.txt clip2.txt
+
+Run from the repository root after downloading the models:
+    python benchmarks/bench_quantization.py
+    python benchmarks/bench_quantization.py --skip whisper --threads 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import corpus_bleu, word_error_rate
+from config import AppConfig
+from model_manager import model_nbytes
+from transcription_logic import _load_for_whisper, load_model
+from translation_logic import load_translator
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "de_en_sample.tsv")
+
+
+def load_sample():
+    with open(SAMPLE_PATH, encoding="utf-8") as f:
+        pairs = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+    return [german for german, _ in pairs], [english for _, english in pairs]
+
+
+def spoken_references(sentences, voice_label):
+    """Speaks each sentence with Kokoro, so the transcript should match it word for word."""
+    from synthesis_logic import resolve_kokoro_voice, synthesize_speech_buffer
+    voice_id, lang = resolve_kokoro_voice(voice_label)
+    return [synthesize_speech_buffer(sentence, lang, voice_id) for sentence in sentences]
+
+
+def bench_translation(sources, references, batch_size):
+    rows = []
+    for quantize in (False, True):
+        translator = load_translator("cpu", quantize)
+        translator(sources[:2], max_length=512)  # warm-up
+        started = time.perf_counter()
+        outputs = []
+        for i in range(0, len(sources), batch_size):
+            batch = sources[i:i + batch_size]
+            outputs += [r["translation_text"] for r in translator(batch, max_length=512, batch_size=len(batch))]
+        elapsed = time.perf_counter() - started
+        rows.append(("int8" if quantize else "fp32", model_nbytes(translator), elapsed / len(sources),
+                     corpus_bleu(references, outputs)))
+    return rows
+
+
+def bench_whisper(clips, transcripts, model_name, language):
+    audio = [_load_for_whisper(clip) for clip in clips]
+    seconds = sum(len(a) for a in audio) / 16000
+    rows = []
+    for quantize in (False, True):
+        model = load_model(model_name, "cpu", quantize)
+        model.transcribe(audio[0], fp16=False, language=language, temperature=0.0)  # warm-up
+        started = time.perf_counter()
+        outputs = [model.transcribe(a, fp16=False, language=language, temperature=0.0)["text"] for a in audio]
+        elapsed = time.perf_counter() - started
+        rows.append(("int8" if quantize else "fp32", model_nbytes(model), elapsed / seconds,
+                     100 * word_error_rate(transcripts, outputs)))
+    return rows
+
+
+def report(title, metric, rows):
+    print(f"\n{title}")
+    print(f"{'model':<6} {'MB':>8} {'latency':>10} {metric:>8}")
+    for name, nbytes, latency, score in rows:
+        print(f"{name:<6} {nbytes / 2 ** 20:>8.1f} {latency:>10.4f} {score:>8.2f}")
+    (_, fp32_bytes, fp32_latency, fp32_score), (_, int8_bytes, int8_latency, int8_score) = rows
+    print(f"int8 vs fp32: {fp32_latency / int8_latency:.2f}x faster, {fp32_bytes / max(int8_bytes, 1):.2f}x smaller, "
+          f"{metric} {int8_score - fp32_score:+.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["whisper", "translation"])
+    parser.add_argument("--model", default=AppConfig.DEFAULT_WHISPER_MODEL, choices=AppConfig.WHISPER_MODELS)
+    parser.add_argument("--batch-size", type=int, default=AppConfig.TRANSLATION_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads (default: torch's choice)")
+    parser.add_argument("--audio", nargs="+", help="Recordings to transcribe instead of Kokoro speech")
+    parser.add_argument("--transcripts", nargs="+", help="Reference transcript files, one per --audio file")
+    parser.add_argument("--language", default=None, help="Language of --audio (default: en for Kokoro speech)")
+    parser.add_argument("--voice", default=AppConfig.DEFAULT_KOKORO_VOICE_LABEL)
+    args = parser.parse_args()
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    sources, references = load_sample()
+    if "translation" not in args.skip:
+        rows = bench_translation(sources, references, args.batch_size)
+        report(f"Translation, {len(sources)} sentences (latency: s/sentence)", "BLEU", rows)
+
+    if "whisper" not in args.skip:
+        if args.audio:
+            if len(args.audio) != len(args.transcripts or []):
+                parser.error("--transcripts needs one file per --audio file")
+            clips, transcripts = args.audio, []
+            for path in args.transcripts:
+                with open(path, encoding="utf-8") as f:
+                    transcripts.append(f.read())
+            language = args.language or AppConfig.DEFAULT_LANGUAGE
+        else:
+            clips, transcripts, language = spoken_references(references, args.voice), references, args.language or "en"
+        rows = bench_whisper(clips, transcripts, args.model, language)
+        report(f"Whisper '{args.model}', {len(clips)} clips (latency: real-time factor)", "WER %", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares the speed of the NumPy silence detector with pydub.silence.detect_nonsilent.
+That both return the same ranges and audio is checked by tests/test_silence_detection.py.
+
+Run from the repository root:
+    python benchmarks/bench_silence_removal.py --minutes 2
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent as pydub_detect_nonsilent
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from silence_detection import detect_nonsilent, keep_ranges
+
+
+def synthetic_speech(seconds, frame_rate=16000, channels=1, seed=0):
+    """Bursts of noisy tones separated by quiet gaps of random length."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * frame_rate)
+    t = np.arange(n) / frame_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * rng.standard_normal(n)
+    gate = np.zeros(n)
+    position = 0
+    while position < n:
+        voiced = int(rng.uniform(0.3, 3.0) * frame_rate)
+        gate[position:position + voiced] = 1
+        position += voiced + int(rng.uniform(0.1, 1.5) * frame_rate)
+    audio = signal * gate + 0.001 * rng.standard_normal(n)
+    pcm = np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+    return np.repeat(pcm, channels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=1.0)
+    args = parser.parse_args()
+
+    cases = [(16000, 1, 500, -50), (16000, 1, 300, -35), (44100, 2, 700, -40), (22050, 1, 1000, -60)]
+    for frame_rate, channels, min_silence_len, silence_thresh in cases:
+        samples = synthetic_speech(args.minutes * 60, frame_rate, channels)
+        segment = AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=frame_rate, channels=channels)
+
+        started = time.perf_counter()
+        expected = pydub_detect_nonsilent(segment, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+        expected_audio = AudioSegment.empty()
+        for start, end in expected:
+            expected_audio += segment[start:end]
+        pydub_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        ranges = detect_nonsilent(samples, frame_rate, channels, 2, min_silence_len, silence_thresh)
+        kept = keep_ranges(samples, frame_rate, channels, ranges)
+        numpy_seconds = time.perf_counter() - started
+
+        same = ranges == expected and kept.tobytes() == expected_audio.raw_data
+        print(
+            f"{frame_rate} Hz x{channels}, {min_silence_len} ms @ {silence_thresh} dB: {len(ranges)} ranges"
+            f"{'' if same else ' (differ from pydub, see tests/test_silence_detection.py)'} | "
+            f"pydub {pydub_seconds:.2f}s, numpy {numpy_seconds:.3f}s ({pydub_seconds / numpy_seconds:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
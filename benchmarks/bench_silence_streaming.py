@@ -0,0 +1,92 @@
+"""
+Peak memory of streaming vs in-memory silence removal on a synthetic multi-hour
+16 kHz PCM WAV. Each mode runs in a fresh subprocess so peak RSS is not shared.
+
+Run from the repository root:
+    python benchmarks/bench_silence_streaming.py --hours 2
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FRAME_RATE = 16000
+
+
+def write_synthetic_wav(path, hours, seed=0):
+    """Writes speech-like bursts and pauses one minute at a time, so generation itself stays small."""
+    rng = np.random.default_rng(seed)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(FRAME_RATE)
+        for _ in range(int(hours * 60)):
+            n = 60 * FRAME_RATE
+            t = np.arange(n) / FRAME_RATE
+            gate = (np.sin(2 * np.pi * t / rng.uniform(2, 6)) > 0.2).astype(np.float32)
+            audio = gate * (0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(n)) \
+                + 0.001 * rng.standard_normal(n)
+            f.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, path):
+    import audio_processing
+    from audio_processing import _remove_silence_streaming, step2_remove_silence
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "streaming":
+        output = tempfile.mktemp(suffix=".wav")
+        _remove_silence_streaming(path, output, 500, -50)
+    else:
+        # Force the decode-everything path that non-WAV inputs take.
+        audio_processing._remove_silence_streaming = lambda *args: None
+        output, _ = step2_remove_silence(path, 500, -50, progress=lambda *args, **kwargs: None)
+    elapsed = time.perf_counter() - started
+    output_bytes = os.path.getsize(output)
+    os.remove(output)
+    print(json.dumps({"mode": mode, "seconds": elapsed, "baseline_rss_mb": baseline,
+                      "peak_rss_mb": peak_rss_mb(), "output_bytes": output_bytes}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--modes", nargs="+", default=["streaming", "in-memory"])
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(*args.run)
+        return
+
+    path = tempfile.mktemp(suffix=".wav")
+    print(f"Writing {args.hours} h synthetic WAV to {path}...")
+    write_synthetic_wav(path, args.hours)
+    try:
+        print(f"{'mode':>10} {'seconds':>9} {'baseline MB':>12} {'peak MB':>9} {'output MB':>10}")
+        for mode in args.modes:
+            result = subprocess.run([sys.executable, __file__, "--run", mode, path],
+                                    check=True, capture_output=True, text=True)
+            r = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{r['mode']:>10} {r['seconds']:>9.1f} {r['baseline_rss_mb']:>12.0f} "
+                  f"{r['peak_rss_mb']:>9.0f} {r['output_bytes'] / 1e6:>10.1f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Measures translation throughput (sentences/sec) for different batch sizes on a
+fixed German corpus, using the same length-bucketed batching as step 5.
+
+Run from the repository root after downloading the translation model:
+    python benchmarks/bench_translation_batching.py --batch-sizes 1 2 4 8 16
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import AppConfig
+from translation_logic import _length_bucketed_batches, _split_text, load_translator
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "de_corpus.txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        chunks = _split_text(f.read(), sentences_per_chunk=1)
+    translator = load_translator(args.device)
+    translator(chunks[:2], max_length=512)  # warm-up
+
+    print(f"{len(chunks)} sentences")
+    print(f"{'batch':>5} {'seconds':>9} {'sentences/s':>12}")
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        batches = _length_bucketed_batches(
+            chunks, translator.tokenizer, batch_size, AppConfig.TRANSLATION_BUCKET_WINDOW
+        )
+        for batch in batches:
+            translator([chunks[i] for i in batch], max_length=512, batch_size=len(batch))
+        elapsed = time.perf_counter() - started
+        print(f"{batch_size:>5} {elapsed:>9.2f} {len(chunks) / elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
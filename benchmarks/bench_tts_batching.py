@@ -0,0 +1,60 @@
+"""
+Compares sentence-wise Kokoro synthesis throughput for different batch sizes.
+Only the text encoder is batched (see synthesis_logic._forward_batch), so the
+gain is bounded by its share of the time; the decoder runs per sentence.
+
+Run from the repository root after downloading the Kokoro model:
+    python benchmarks/bench_tts_batching.py --max-batch-size 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthesis_logic import _registry, _synthesize_sentences_batched, load_local_kmodel
+
+SENTENCES = [
+    "The museum opens at nine in the morning and closes at six in the evening.",
+    "Please keep your ticket with you at all times.",
+    "Guided tours start every hour from the main entrance.",
+    "Photography without flash is allowed in most rooms.",
+    "The café on the second floor serves lunch until three.",
+    "Lockers for bags and coats are located next to the cloakroom.",
+    "Children under twelve must be accompanied by an adult.",
+    "The special exhibition on ancient maps ends next month.",
+    "Audio guides are available in six languages.",
+    "Thank you for visiting, and we hope to see you again soon.",
+    "Our researchers restored more than forty paintings last year.",
+    "Some of the oldest objects in the collection are over three thousand years old.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=2, help="How many times the sentence list is repeated.")
+    parser.add_argument("--voice", default="af_heart")
+    parser.add_argument("--lang-code", default="a")
+    args = parser.parse_args()
+
+    device = "cpu"
+    model = load_local_kmodel(device)
+    pipeline = _registry.get_pipeline(args.lang_code, device, model)
+    voice = _registry.get_voice(args.voice, device)
+    sentences = SENTENCES * args.repeat
+
+    # Warm-up so the first measured batch size does not pay one-off costs.
+    _synthesize_sentences_batched(pipeline, sentences[:2], voice, 1.0, 1)
+
+    print(f"{'batch':>5} {'seconds':>9} {'sentences/s':>12}")
+    for batch_size in range(1, args.max_batch_size + 1):
+        started = time.perf_counter()
+        _synthesize_sentences_batched(pipeline, sentences, voice, 1.0, batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"{batch_size:>5} {elapsed:>9.2f} {len(sentences) / elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compares Whisper's sliding-window transcription with the VAD mode (speech
+found by vad.py, packed into 30 s windows and decoded in batches) on a
+recording where speech is sparse: real-time factor and WER of both.
+
+By default the recording is the English sentences of data/de_en_sample.tsv
+spoken by Kokoro, separated by pauses of low noise. Your own recording can be
+used instead:
+    --audio meeting.wav --transcripts meeting.txt
+
+Run from the repository root after downloading the models:
+    python benchmarks/bench_vad_transcription.py
+    python benchmarks/bench_vad_transcription.py --pause 30 --batch-sizes 1 4 8 16
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_quantization import load_sample, spoken_references
+from metrics import word_error_rate
+from config import AppConfig
+from audio_buffer import AudioBuffer
+from transcription_logic import WHISPER_SAMPLE_RATE, _load_for_whisper, load_model, step4_run_transcription
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+def sparse_recording(clips, pause_seconds, seed=0):
+    """The clips at 16 kHz, each followed by `pause_seconds` of -60 dBFS noise."""
+    rng = np.random.default_rng(seed)
+    pause = int(pause_seconds * WHISPER_SAMPLE_RATE)
+    parts = []
+    for clip in clips:
+        parts += [clip.resample(WHISPER_SAMPLE_RATE).samples,
+                  (0.001 * rng.standard_normal(pause)).astype(np.float32)]
+    return AudioBuffer(np.concatenate(parts), WHISPER_SAMPLE_RATE)
+
+
+def transcribe(audio, model_name, language, vad_batching, batch_size):
+    AppConfig.WHISPER_BATCH_SIZE = batch_size
+    started = time.perf_counter()
+    for text, _, txt_path in step4_run_transcription(audio, model_name, language, False, vad_batching=vad_batching,
+                                                     progress=_no_progress):
+        pass
+    elapsed = time.perf_counter() - started
+    os.remove(txt_path)
+    return text, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=AppConfig.DEFAULT_WHISPER_MODEL, choices=AppConfig.WHISPER_MODELS)
+    parser.add_argument("--pause", type=float, default=15.0, help="Seconds of silence after each spoken sentence")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, AppConfig.WHISPER_BATCH_SIZE])
+    parser.add_argument("--audio", help="Recording to transcribe instead of Kokoro speech")
+    parser.add_argument("--transcripts", help="Reference transcript of --audio")
+    parser.add_argument("--language", default=None, help="Language of --audio (default: en for Kokoro speech)")
+    parser.add_argument("--voice", default=AppConfig.DEFAULT_KOKORO_VOICE_LABEL)
+    args = parser.parse_args()
+
+    if args.audio:
+        if not args.transcripts:
+            parser.error("--audio needs --transcripts")
+        with open(args.transcripts, encoding="utf-8") as f:
+            reference = f.read()
+        audio = AudioBuffer(_load_for_whisper(args.audio), WHISPER_SAMPLE_RATE)
+        language = args.language or AppConfig.DEFAULT_LANGUAGE
+    else:
+        _, references = load_sample()
+        audio = sparse_recording(spoken_references(references, args.voice), args.pause)
+        reference, language = " ".join(references), args.language or "en"
+
+    load_model(args.model, "cpu")
+    transcribe(AudioBuffer(audio.samples[:5 * WHISPER_SAMPLE_RATE], WHISPER_SAMPLE_RATE), args.model, language,
+               False, 1)  # warm-up
+    print(f"Whisper '{args.model}' on {audio.duration:.0f} s of audio")
+    print(f"{'mode':<24} {'seconds':>9} {'RTF':>8} {'WER %':>7}")
+    runs = [("sliding window", False, 1)] + [(f"VAD, batch {n}", True, n) for n in args.batch_sizes]
+    baseline = None
+    for name, vad_batching, batch_size in runs:
+        text, elapsed = transcribe(audio, args.model, language, vad_batching, batch_size)
+        baseline = baseline or elapsed
+        print(f"{name:<24} {elapsed:>9.2f} {elapsed / audio.duration:>8.4f} "
+              f"{100 * word_error_rate([reference], [text]):>7.2f}  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
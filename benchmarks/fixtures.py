@@ -0,0 +1,209 @@
+"""
+Deterministic synthetic inputs for the benchmarks, and small stand-in models
+used in place of Whisper, the translation model and Kokoro when their weights
+are not downloaded. Everything is generated from a seed, so two runs (or two
+commits) see exactly the same data.
+"""
+import functools
+import importlib.util
+import os
+import sys
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import AppConfig
+from audio_buffer import AudioBuffer
+
+# --- Audio ---
+
+def tone(seconds, frequency=440.0, sample_rate=16000, amplitude=0.3):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def speech_like(seconds, sample_rate=16000, seed=0):
+    """
+    Noise shaped like speech: a 100-250 Hz voiced buzz with harmonics plus
+    breath noise, amplitude-modulated at a syllable rate of ~4 Hz.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(round(seconds * sample_rate))
+    t = np.arange(n) / sample_rate
+    pitch = rng.uniform(100, 250) * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t + rng.uniform(0, np.pi)), 0, None)
+    audio = 0.15 * voiced * syllables + 0.02 * rng.standard_normal(n)
+    return audio.astype(np.float32)
+
+
+@functools.lru_cache(maxsize=8)
+def speech_with_pauses(seconds, sample_rate=16000, seed=0, noise_floor=0.001):
+    """
+    Speech-like bursts of 1-8 s separated by 0.3-1.5 s pauses of low noise.
+    Returns (samples, [(pause_start, pause_end), ...]) with times in seconds.
+    Results are cached, so callers must not modify the samples.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = (noise_floor * rng.standard_normal(total)).astype(np.float32)
+    pauses = []
+    position = 0
+    while position < total:
+        end = min(position + int(rng.uniform(1, 8) * sample_rate), total)
+        audio[position:end] += speech_like((end - position) / sample_rate, sample_rate, int(rng.integers(1 << 31)))
+        pause = int(rng.uniform(0.3, 1.5) * sample_rate)
+        pauses.append((end / sample_rate, min(end + pause, total) / sample_rate))
+        position = end + pause
+    return np.clip(audio, -1, 1), pauses
+
+
+def write_wav(path, samples, sample_rate=16000):
+    """Writes mono 16-bit PCM, the format step 1 produces."""
+    return AudioBuffer(samples, sample_rate).write_wav(path)
+
+
+# --- Text ---
+
+_GERMAN_WORDS = (
+    "der die das und nicht ist ein eine wir sie es mit auf für von den dem zu im auch noch nach heute "
+    "Energie Strom Netz Sonne Wind Haus Stadt Land Jahr Woche Zukunft Preis Arbeit Schule Regierung "
+    "Forscher Unternehmen Menschen Fragen Sendung Wasser Leistung Speicher Anteil Kosten Plan Ergebnis "
+    "wächst steigt braucht liefert plant arbeitet spricht sucht beginnt bleibt zeigt hilft erklärt "
+    "schnell langsam neue große wichtige deutlich stark sicher billig einfach genau später wieder"
+).split()
+_ENGLISH_WORDS = (
+    "the a and not is we they it with on for of to in also still after today energy power grid sun wind "
+    "house city country year week future price work school government researchers companies people "
+    "questions show water storage share costs plan result grows rises needs delivers plans works speaks "
+    "searches begins remains shows helps explains quickly slowly new large important clearly strongly"
+).split()
+
+
+def corpus(n_sentences, language="de", seed=0):
+    """`n_sentences` sentences of 4-18 words ending in . ! or ?, joined with spaces."""
+    rng = np.random.default_rng(seed)
+    words = _GERMAN_WORDS if language == "de" else _ENGLISH_WORDS
+    sentences = []
+    for _ in range(n_sentences):
+        chosen = [words[i] for i in rng.integers(len(words), size=int(rng.integers(4, 19)))]
+        sentence = " ".join(chosen)
+        sentences.append(sentence[0].upper() + sentence[1:] + rng.choice([".", ".", ".", "!", "?"]))
+    return " ".join(sentences)
+
+
+# --- Stand-in models ---
+
+class StandInWhisper:
+    """
+    Mimics whisper.Whisper.transcribe: computes a log-mel spectrogram and a small
+    projection per 30 s window (so cost grows with the audio like the real model)
+    and returns one segment per window.
+    """
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.mel_filters = np.abs(rng.standard_normal((80, 201))).astype(np.float32)
+        self.encoder = (rng.standard_normal((80, 384)) / 9).astype(np.float32)
+
+    def transcribe(self, audio, fp16=False, language=None, temperature=0.0, **kwargs):
+        audio = np.asarray(audio, dtype=np.float32)
+        segments = []
+        window = 30 * 16000
+        for start in range(0, max(len(audio), 1), window):
+            piece = audio[start:start + window]
+            frames = np.lib.stride_tricks.sliding_window_view(np.pad(piece, (0, 400)), 400)[::160]
+            power = np.abs(np.fft.rfft(frames * np.hanning(400), axis=1)) ** 2
+            mel = np.log10(np.maximum(power @ self.mel_filters.T, 1e-10))
+            features = np.tanh(mel @ self.encoder)
+            words = " ".join(f"w{int(v) % 97}" for v in np.abs(features[::50, 0]) * 1000)
+            segments.append({"start": start / 16000, "end": (start + len(piece)) / 16000, "text": " " + words})
+        return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": language}
+
+
+class _StandInTokenizer:
+    def __call__(self, texts):
+        return {"input_ids": [[zlib.crc32(word.encode()) % 32000 for word in text.split()] + [0] for text in texts]}
+
+
+class StandInTranslator:
+    """Mimics a transformers translation pipeline: a few dense layers per token, output is the input tagged."""
+
+    def __init__(self, seed=0, width=256, layers=6):
+        rng = np.random.default_rng(seed)
+        self.tokenizer = _StandInTokenizer()
+        self.embedding = (rng.standard_normal((32000, width)) / 16).astype(np.float32)
+        self.layers = [(rng.standard_normal((width, width)) / 16).astype(np.float32) for _ in range(layers)]
+
+    def __call__(self, texts, max_length=512, batch_size=None, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        ids = self.tokenizer(texts)["input_ids"]
+        longest = max(len(row) for row in ids)
+        padded = np.zeros((len(ids), longest), dtype=np.int64)
+        for i, row in enumerate(ids):
+            padded[i, :len(row)] = row
+        hidden = self.embedding[padded]
+        for weights in self.layers:  # encoder
+            hidden = np.tanh(hidden @ weights)
+        state = hidden.mean(axis=1)
+        for _ in range(longest):  # one decoder pass per output token
+            for weights in self.layers:
+                state = np.tanh(state @ weights)
+        return [{"translation_text": f"[en] {text}"} for text in texts]
+
+
+class StandInKPipeline:
+    """Mimics a KPipeline call: yields (graphemes, phonemes, audio) per sentence at 24 kHz."""
+
+    def __init__(self, lang_code, seed=0):
+        self.lang_code = lang_code
+        self.seed = seed
+
+    def __call__(self, text, voice=None, speed=1.0):
+        for i, sentence in enumerate(s for s in text.replace("!", ".").replace("?", ".").split(".") if s.strip()):
+            seconds = 0.065 * len(sentence) / speed
+            yield sentence, sentence.lower(), speech_like(seconds, 24000, self.seed + i)
+
+
+def real_models_available():
+    """Which real models are present locally: {"whisper": bool, "translation": bool, "kokoro": bool}."""
+    have = lambda module: importlib.util.find_spec(module) is not None
+    whisper_path = os.path.join(AppConfig.WHISPER_MODELS_PATH, f"{AppConfig.DEFAULT_WHISPER_MODEL}.pt")
+    translation_config = os.path.join(AppConfig.LOCAL_TRANSLATION_MODEL_PATH, "config.json")
+    kokoro_path = os.path.join(AppConfig.LOCAL_KOKORO_MODEL_PATH, "kokoro-v1_0.pth")
+    return {
+        "whisper": have("whisper") and os.path.exists(whisper_path),
+        "translation": have("transformers") and os.path.exists(translation_config),
+        "kokoro": have("kokoro") and os.path.exists(kokoro_path),
+    }
+
+
+def install_stand_in_models(force=False, voice_id="af_heart", lang_code="a"):
+    """
+    Registers stand-ins with the shared model manager (and the Kokoro registry) for
+    every model whose weights are missing, or for all of them with `force`, so the
+    step functions run end to end on CPU. Returns {"whisper": "real" | "stand-in", ...}.
+    """
+    from model_manager import models
+    from synthesis_logic import _registry
+
+    available = real_models_available()
+    used = {name: "real" if available[name] and not force else "stand-in" for name in available}
+    stand_ins = []
+    if used["whisper"] == "stand-in":
+        stand_ins += [(("whisper", model_name, "cpu"), StandInWhisper) for model_name in AppConfig.WHISPER_MODELS]
+    if used["translation"] == "stand-in":
+        stand_ins.append((("translation", "cpu"), StandInTranslator))
+    if used["kokoro"] == "stand-in":
+        stand_ins.append((("kokoro", "cpu"), object))
+        _registry._pipelines[(lang_code, "cpu")] = (StandInKPipeline(lang_code), 0.0)
+        _registry._voices[(voice_id, "cpu")] = (np.zeros((510, 1, 256), dtype=np.float32), 0, 0.0)
+    for key, loader in stand_ins:
+        models.get(key, loader)
+        # Pinned so that loading a real model cannot evict a stand-in (and the Kokoro pipeline with it).
+        models.pin(key)
+    return used
@@ -0,0 +1,55 @@
+"""
+Dependency-free accuracy metrics for the benchmarks: word error rate for
+transcripts and corpus BLEU for translations.
+"""
+import math
+import re
+from collections import Counter
+
+
+def _words(text):
+    """Lower-cased words without punctuation, so formatting differences do not count as errors."""
+    return re.findall(r"[\w']+", text.lower())
+
+
+def word_error_rate(references, hypotheses):
+    """Word-level edit distance over all pairs, divided by the number of reference words."""
+    errors = total = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        ref, hyp = _words(reference), _words(hypothesis)
+        previous = list(range(len(hyp) + 1))
+        for i, r in enumerate(ref, start=1):
+            current = [i]
+            for j, h in enumerate(hyp, start=1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+            previous = current
+        errors += previous[-1]
+        total += len(ref)
+    return errors / max(total, 1)
+
+
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def corpus_bleu(references, hypotheses, max_n=4):
+    """
+    Corpus BLEU (0-100) with one reference per sentence: clipped n-gram precisions
+    up to `max_n`, add-one smoothed for n > 1, times the brevity penalty.
+    """
+    matches, counts = [0] * max_n, [0] * max_n
+    ref_len = hyp_len = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        ref, hyp = _words(reference), _words(hypothesis)
+        ref_len += len(ref)
+        hyp_len += len(hyp)
+        for n in range(1, max_n + 1):
+            ref_ngrams, hyp_ngrams = _ngrams(ref, n), _ngrams(hyp, n)
+            matches[n - 1] += sum(min(c, ref_ngrams[g]) for g, c in hyp_ngrams.items())
+            counts[n - 1] += max(len(hyp) - n + 1, 0)
+    if hyp_len == 0 or matches[0] == 0:
+        return 0.0
+    smooth = [0] + [1] * (max_n - 1)
+    log_precision = sum(math.log((matches[n] + smooth[n]) / (counts[n] + smooth[n])) for n in range(max_n)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return 100 * brevity * math.exp(log_precision)
@@ -0,0 +1,281 @@
+"""
+Runs every pipeline stage on deterministic synthetic input (benchmarks/fixtures.py)
+and saves throughput, CPU time and peak memory to benchmarks/results/<commit>.json,
+so a change can be compared with the commit before it.
+
+Works offline on a CPU-only machine: Whisper, the translation model and Kokoro
+are replaced by small stand-ins when their weights are not downloaded (or
+always, with --stand-ins, which makes results comparable between machines).
+Stages that need ffmpeg are skipped when it is not installed. The translation
+and TTS caches are disabled so every run does the full work.
+
+Run from the repository root:
+    python benchmarks/run_benchmarks.py                      # full size, ~1 min with stand-ins
+    python benchmarks/run_benchmarks.py --quick --compare    # small inputs, diff against the previous results
+    python benchmarks/run_benchmarks.py --only split_text step2_remove_silence
+"""
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures
+import instrumentation
+from config import AppConfig
+from audio_buffer import AudioBuffer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+def _find_ffmpeg():
+    return shutil.which(AppConfig.FFMPEG_PATH) or shutil.which("ffmpeg")
+
+
+# Each benchmark prepares its input in `workdir` (untimed) and returns a function
+# that runs the stage once and returns the amount of work done, in the unit given
+# in BENCHMARKS. `scale` shrinks the inputs for --quick.
+
+def bench_step1_prepare_audio(workdir, scale):
+    from audio_processing import step1_prepare_audio
+    samples, _ = fixtures.speech_with_pauses(600 * scale, seed=1)
+    path = fixtures.write_wav(os.path.join(workdir, "step1.wav"), samples)
+    ffmpeg = _find_ffmpeg()
+
+    def run():
+        chunks, _ = step1_prepare_audio(path, ffmpeg, True, 500, -50, 60, in_memory=True, progress=_no_progress)
+        return len(samples) / 16000
+    return run
+
+
+def bench_step2_remove_silence(workdir, scale):
+    from audio_processing import step2_remove_silence
+    samples, _ = fixtures.speech_with_pauses(1800 * scale, seed=2)
+    path = fixtures.write_wav(os.path.join(workdir, "step2.wav"), samples)
+
+    def run():
+        output, _ = step2_remove_silence(path, 500, -50, progress=_no_progress)
+        os.remove(output)
+        return len(samples) / 16000
+    return run
+
+
+def bench_step2_remove_silence_in_memory(workdir, scale):
+    from audio_processing import step2_remove_silence
+    samples, _ = fixtures.speech_with_pauses(1800 * scale, seed=2)
+    buffer = AudioBuffer(samples, 16000)
+
+    def run():
+        step2_remove_silence(buffer, 500, -50, progress=_no_progress)
+        return buffer.duration
+    return run
+
+
+def bench_step3_chunk_audio(workdir, scale):
+    from audio_processing import step3_chunk_audio
+    samples, _ = fixtures.speech_with_pauses(1800 * scale, seed=3)
+    # step 3 deletes its input once it is chunked, so every run gets its own copy.
+    path = fixtures.write_wav(os.path.join(workdir, "step3.wav"), samples)
+
+    def run():
+        _, chunk_files = step3_chunk_audio(path, True, 60, _find_ffmpeg(), progress=_no_progress)
+        shutil.rmtree(os.path.dirname(chunk_files[0]), ignore_errors=True)
+        return len(samples) / 16000
+    return run
+
+
+def bench_enhance_audio(workdir, scale):
+    from audio_enhancement import enhance_audio
+    files, seconds = [], 0.0
+    for i in range(4):
+        samples, _ = fixtures.speech_with_pauses(120 * scale, seed=10 + i)
+        files.append(SimpleNamespace(name=fixtures.write_wav(os.path.join(workdir, f"enhance_{i}.wav"), samples)))
+        seconds += len(samples) / 16000
+    ffmpeg = _find_ffmpeg()
+
+    def run():
+        # The UI defaults: high-pass 100 Hz, low-pass 4 kHz, compressor, bass +3 dB, treble -2 dB, reverb 0.1.
+        _, zip_path = enhance_audio(files, ffmpeg, 100, 4000, True, False, False, 3, -2, 0.1, progress=_no_progress)
+        shutil.rmtree(os.path.dirname(zip_path), ignore_errors=True)
+        return seconds
+    return run
+
+
+def bench_split_text(workdir, scale):
+    from translation_logic import _split_text
+    text = fixtures.corpus(int(20000 * scale), seed=4)
+
+    def run():
+        return len(_split_text(text, sentences_per_chunk=1))
+    return run
+
+
+def bench_transcription(workdir, scale):
+    from transcription_logic import step4_run_transcription
+    samples, _ = fixtures.speech_with_pauses(300 * scale, seed=5)
+    chunks = [AudioBuffer(samples[i:i + 60 * 16000], 16000) for i in range(0, len(samples), 60 * 16000)]
+
+    def run():
+        for _, _, txt_path in step4_run_transcription(chunks, AppConfig.DEFAULT_WHISPER_MODEL, "de", False,
+                                                      progress=_no_progress):
+            pass
+        os.remove(txt_path)
+        return len(samples) / 16000
+    return run
+
+
+def bench_translation(workdir, scale):
+    from translation_logic import step5_translate_text
+    n_sentences = max(8, int(200 * scale))
+    text = fixtures.corpus(n_sentences, seed=6)
+
+    def run():
+        for _ in step5_translate_text(text, False, progress=_no_progress):
+            pass
+        return n_sentences
+    return run
+
+
+def bench_synthesis(workdir, scale):
+    from synthesis_logic import SAMPLE_RATE, step6_synthesize_speech_kokoro
+    text = fixtures.corpus(max(4, int(40 * scale)), language="en", seed=7)
+
+    def run():
+        (_, audio), _ = step6_synthesize_speech_kokoro(text, "en", "af_heart", 1.0, False, False, 0,
+                                                       progress=_no_progress)
+        return len(audio) / SAMPLE_RATE
+    return run
+
+
+# name: (benchmark, unit of the amount it returns, needs ffmpeg)
+BENCHMARKS = {
+    "step1_prepare_audio": (bench_step1_prepare_audio, "audio s", True),
+    "step2_remove_silence": (bench_step2_remove_silence, "audio s", False),
+    "step2_remove_silence_in_memory": (bench_step2_remove_silence_in_memory, "audio s", False),
+    "step3_chunk_audio": (bench_step3_chunk_audio, "audio s", False),
+    "enhance_audio": (bench_enhance_audio, "audio s", True),
+    "split_text": (bench_split_text, "sentences", False),
+    "transcription": (bench_transcription, "audio s", False),
+    "translation": (bench_translation, "sentences", False),
+    "synthesis": (bench_synthesis, "audio s", False),
+}
+
+
+def measure(name, benchmark, repeat, scale):
+    """Runs one benchmark `repeat` times, each on freshly prepared input."""
+    walls, cpus, peaks, amount = [], [], [], 0
+    instrumentation.reset()
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        try:
+            run = benchmark(workdir, scale)
+            gc.collect()
+            with instrumentation.stage(name) as record:
+                amount = run()
+            walls.append(record.wall_seconds)
+            cpus.append(record.cpu_seconds)
+            peaks.append(record.peak_rss)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    median = statistics.median(walls)
+    phases = {stage: round(total["wall_s"] / repeat, 4) for stage, total in instrumentation.summary().items()
+              if stage != name}
+    return {"amount": round(amount, 3), "runs_s": [round(w, 4) for w in walls], "median_s": round(median, 4),
+            "throughput": round(amount / median, 3) if median else None, "cpu_s": round(statistics.median(cpus), 4),
+            "peak_rss_mb": round(max(peaks) / 2 ** 20, 1), "phases": phases}
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(git("status", "--porcelain", "--untracked-files=no"))
+    return commit, dirty
+
+
+def compare(current, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\nCompared with {os.path.basename(previous_path)} (commit {previous['commit']}, models {previous['models']}):")
+    if (previous.get("scale"), previous.get("models")) != (current["scale"], current["models"]):
+        print("Note: input scale or models differ, so the numbers are not directly comparable.")
+    print(f"{'benchmark':<32} {'before':>12} {'after':>12} {'change':>8}")
+    for name, result in current["benchmarks"].items():
+        before = previous["benchmarks"].get(name, {}).get("throughput")
+        after = result.get("throughput")
+        if before and after:
+            print(f"{name:<32} {before:>12.2f} {after:>12.2f} {(after / before - 1) * 100:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Inputs at 1/10 size, for a fast smoke run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stand-ins", action="store_true", help="Use the stand-in models even if real weights exist")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs="?", const="latest",
+                        help="Results file to compare with (default: the most recent other one)")
+    args = parser.parse_args()
+
+    AppConfig.TRANSLATION_CACHE_ENABLED = False
+    AppConfig.TTS_CACHE_ENABLED = False
+    AppConfig.TRANSCRIPTION_WORKERS = 1
+    AppConfig.INSTRUMENTATION_ENABLED = True
+    scale = 0.1 if args.quick else 1.0
+    models_used = fixtures.install_stand_in_models(force=args.stand_ins)
+    has_ffmpeg = _find_ffmpeg() is not None
+    commit, dirty = git_revision()
+
+    results = {"commit": commit, "dirty": dirty, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+               "scale": scale, "repeat": args.repeat, "models": models_used, "benchmarks": {}}
+    print(f"Commit {commit}{' (uncommitted changes)' if dirty else ''}, models: {models_used}")
+    print(f"{'benchmark':<32} {'median s':>9} {'throughput':>24} {'cpu s':>8} {'peak MB':>8}")
+    for name in args.only or BENCHMARKS:
+        benchmark, unit, needs_ffmpeg = BENCHMARKS[name]
+        if needs_ffmpeg and not has_ffmpeg:
+            results["benchmarks"][name] = {"skipped": "ffmpeg not found"}
+            print(f"{name:<32} skipped (ffmpeg not found)")
+            continue
+        result = measure(name, benchmark, args.repeat, scale)
+        result["unit"] = f"{unit}/s"
+        results["benchmarks"][name] = result
+        print(f"{name:<32} {result['median_s']:>9.3f} {result['throughput']:>12.1f} {unit + '/s':<11} "
+              f"{result['cpu_s']:>8.2f} {result['peak_rss_mb']:>8.0f}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    previous = sorted((p for p in glob.glob(os.path.join(RESULTS_DIR, "*.json"))
+                       if os.path.abspath(p) != os.path.abspath(output)), key=os.path.getmtime)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        if args.compare != "latest":
+            compare(results, args.compare)
+        elif previous:
+            compare(results, previous[-1])
+        else:
+            print("No earlier results to compare with.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import torch
+import functools
 
 class AppConfig:
     # --- Paths ---
@@ -17,6 +17,87 @@ class AppConfig:
     WHISPER_MODELS = ["tiny", "base", "small", "medium", "large-v3"]
     LANGUAGES = ["de", "en", "fr", "es", "it"]
 
+    # --- Startup ---
+    # Models loaded and warmed up in background threads at launch ("whisper", "translation", "kokoro");
+    # an empty list loads every model on first use instead
+    PRELOAD_MODELS = ["whisper", "translation", "kokoro"]
+    # Wait for the preload to finish before the server starts accepting requests; with False the
+    # interface opens at once and a request made during warm-up waits for the model it needs
+    PRELOAD_WAIT_BEFORE_LAUNCH = True
+
+    # --- Model Memory ---
+    # Total size of loaded Whisper, translation and Kokoro models; least recently used
+    # models are unloaded to stay under it (see model_manager.py)
+    MODEL_MEMORY_BUDGET_MB = 8192
+    # Default for "int8 on CPU": Whisper and the translation model run with dynamically
+    # quantised Linear layers when on CPU (faster and ~4x smaller, slightly less accurate;
+    # see benchmarks/bench_quantization.py). Has no effect on CUDA/MPS.
+    QUANTIZE_CPU_MODELS = False
+
+    # --- Instrumentation (see instrumentation.py) ---
+    # Per-stage wall/CPU time, peak memory and real-time factor; exported at /metrics
+    INSTRUMENTATION_ENABLED = True
+    # Individual stage records kept for to_json(); totals per stage are kept regardless
+    INSTRUMENTATION_KEEP_RECORDS = 1000
+    # How often resident memory is sampled while a stage runs (Linux only)
+    INSTRUMENTATION_RSS_SAMPLE_SECONDS = 0.05
+
+    # --- Audio Pre-processing ---
+    # Block size used when streaming WAV files through silence removal
+    SILENCE_BLOCK_SECONDS = 10
+    # Chunk boundaries may move this far from the requested chunk duration to land in a pause
+    CHUNK_CUT_TOLERANCE_SECONDS = 10
+
+    # --- Audio Enhancement ---
+    # Files enhanced at once (None = one per CPU core)
+    ENHANCE_WORKERS = None
+    # Default engine: "ffmpeg", or "numpy" to run the filters in-process (dsp_engine.py), which
+    # avoids starting ffmpeg per file; noise reduction and dialogue enhancement always use ffmpeg
+    ENHANCE_BACKEND = "ffmpeg"
+
+    # --- Transcription ---
+    # Number of CPU worker processes, each holding its own Whisper model (1 = transcribe in-process)
+    TRANSCRIPTION_WORKERS = 1
+    # Default for "Skip silence and decode in batches": an energy VAD (vad.py) finds the speech,
+    # which is packed into windows of up to 30 s and decoded WHISPER_BATCH_SIZE windows at a time.
+    # Much faster on recordings with long pauses; runs in-process regardless of TRANSCRIPTION_WORKERS
+    WHISPER_VAD_BATCHING = False
+    WHISPER_BATCH_SIZE = 8
+    # Frames this much louder than the noise floor count as speech
+    VAD_MARGIN_DB = 12
+
+    # --- Translation ---
+    # Sentences sent to the translation model per call, and how many batches'
+    # worth of sentences are sorted by length together
+    TRANSLATION_BATCH_SIZE = 8
+    TRANSLATION_BUCKET_WINDOW = 4
+    # On-disk translation memory; sentences seen before are not sent to the model again
+    TRANSLATION_CACHE_ENABLED = True
+    TRANSLATION_CACHE_PATH = "./cache/translations.sqlite3"
+    TRANSLATION_CACHE_MAX_MB = 64
+
+    # --- Batch CLI (python -m aetts) ---
+    CLI_OUTPUT_DIR = "./output"
+    # Files processed concurrently; model stages still run one file at a time
+    CLI_WORKERS = 2
+
+    # --- Pipelined mode (pipeline_runner.py) ---
+    # Transcription, translation and speech run on their own threads and overlap; this many
+    # sentences (or translated batches) may wait between two stages before the earlier one pauses
+    PIPELINE_QUEUE_SIZE = 16
+
+    # --- Job queue / HTTP API (api_server.py) ---
+    # Unfinished jobs accepted before new submissions are rejected with HTTP 429
+    JOB_QUEUE_MAX_PENDING = 32
+    # Finished jobs whose status and results are kept for polling
+    JOB_QUEUE_KEEP_FINISHED = 200
+    # Per-stage worker overrides, e.g. {"extract": 4}; see job_queue.default_pool_sizes. Only the
+    # extract pool is sized by device; the model stages keep one worker, as their models are shared
+    JOB_QUEUE_WORKERS = {}
+    JOB_OUTPUT_DIR = "./output/jobs"
+    API_HOST = "127.0.0.1"
+    API_PORT = 7861
+
     # --- Kokoro TTS Configuration ---
     KOKORO_LANG_MAP = {
         "en": "a",
@@ -24,6 +105,17 @@ class AppConfig:
         "fr": "f",
         "it": "i",
     }
+    # Warm KPipelines (one per language/device) and voice tensors kept between requests
+    KOKORO_PIPELINE_CACHE_SIZE = 4
+    KOKORO_VOICE_CACHE_SIZE = 16
+    KOKORO_VOICE_CACHE_MAX_MB = 64
+    # Sentence-wise synthesis runs this many sentences through Kokoro's text encoder together
+    # (the decoder still runs per sentence; see synthesis_logic._forward_batch)
+    KOKORO_BATCH_SIZE = 8
+    # On-disk cache of synthesized sentences keyed by text, voice, speed, language and model checksum
+    TTS_CACHE_ENABLED = True
+    TTS_CACHE_PATH = "./cache/tts_audio.sqlite3"
+    TTS_CACHE_MAX_MB = 512
     # Structure: "UI Label": ("voice_id", "language_code")
     KOKORO_VOICES = {
         "EN: Heart": ("af_heart", "en"),
@@ -45,5 +137,35 @@ class AppConfig:
     }
 
 # --- System Checks ---
-CUDA_AVAILABLE = torch.cuda.is_available()
-MPS_AVAILABLE = torch.backends.mps.is_available()
\ No newline at end of file
+# Evaluated on first use so that importing the config does not import torch.
+@functools.lru_cache(maxsize=None)
+def cuda_available():
+    import torch
+    return torch.cuda.is_available()
+
+
+@functools.lru_cache(maxsize=None)
+def mps_available():
+    import torch
+    return torch.backends.mps.is_available()
+
+
+def default_device():
+    """The device the steps pick with 'Use GPU' ticked, which is the UI default; "cpu" without torch."""
+    try:
+        if cuda_available():
+            return "cuda"
+        if mps_available():
+            return "mps"
+    except ImportError:
+        pass
+    return "cpu"
+
+
+def __getattr__(name):
+    # CUDA_AVAILABLE / MPS_AVAILABLE are still importable, at the cost of importing torch.
+    if name == "CUDA_AVAILABLE":
+        return cuda_available()
+    if name == "MPS_AVAILABLE":
+        return mps_available()
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
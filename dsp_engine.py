@@ -0,0 +1,216 @@
+# dsp_engine.py
+"""
+In-process NumPy/SciPy versions of the ffmpeg filters used by the enhancement
+toolbox, so short clips can be enhanced without starting ffmpeg.
+
+    steps = parse_filter_chain("highpass=f=100,acompressor=threshold=0.1,bass=g=3")
+    out = apply_chain(samples, 16000, steps)
+
+The filters follow ffmpeg's definitions and defaults: highpass/lowpass/bass/treble
+are the same two-pole biquads (RBJ cookbook, Q 0.707 for the passes and 0.5 for
+the shelves), acompressor uses the same RMS detector, soft knee and gain curve,
+and aecho mixes delayed copies of the input and keeps the echo tail. The only
+intended difference is the compressor's envelope, which is followed per block of
+COMPRESSOR_BLOCK samples instead of per sample (1 reproduces ffmpeg exactly but
+is several times slower); benchmarks/bench_dsp_engine.py measures how close the
+output is to ffmpeg's. afftdn and dialoguenhance have no
+NumPy version, see supports().
+"""
+import math
+import os
+
+import numpy as np
+
+# Samples per step of the compressor's envelope follower.
+COMPRESSOR_BLOCK = 8
+
+# Option names in ffmpeg's positional order, and their defaults.
+FILTER_OPTIONS = {
+    "highpass": {"frequency": 3000.0, "width_type": "q", "width": 0.707},
+    "lowpass": {"frequency": 500.0, "width_type": "q", "width": 0.707},
+    "bass": {"frequency": 100.0, "width_type": "q", "width": 0.5, "gain": 0.0},
+    "treble": {"frequency": 3000.0, "width_type": "q", "width": 0.5, "gain": 0.0},
+    "acompressor": {"level_in": 1.0, "mode": "downward", "threshold": 0.125, "ratio": 2.0, "attack": 20.0,
+                    "release": 250.0, "makeup": 1.0, "knee": 2.82843, "link": "average", "detection": "rms"},
+    "aecho": {"in_gain": 0.6, "out_gain": 0.3, "delays": "1000", "decays": "0.5"},
+    "anull": {},
+}
+_ALIASES = {"f": "frequency", "t": "width_type", "w": "width", "g": "gain"}
+_BIQUADS = ("highpass", "lowpass", "bass", "treble")
+
+
+def parse_filter_chain(chain):
+    """
+    Parses an ffmpeg -af chain into [(filter, options), ...]. Raises ValueError
+    for filters or option values this module does not implement.
+    """
+    steps = []
+    for spec in filter(None, (part.strip() for part in chain.split(","))):
+        name, _, args = spec.partition("=")
+        if name not in FILTER_OPTIONS:
+            raise ValueError(f"Filter '{name}' is not available in the NumPy engine")
+        options = dict(FILTER_OPTIONS[name])
+        positional = list(options)
+        for i, arg in enumerate(filter(None, args.split(":"))):
+            key, sep, value = arg.partition("=")
+            if not sep:
+                key, value = (positional[i] if i < len(positional) else None), key
+            key = _ALIASES.get(key, key)
+            if key not in options:
+                raise ValueError(f"Option '{key}' of filter '{name}' is not available in the NumPy engine")
+            options[key] = value if isinstance(options[key], str) else float(value)
+        for key, required in {"width_type": "q", "mode": "downward", "link": "average", "detection": "rms"}.items():
+            if options.get(key, required) != required:
+                raise ValueError(f"{name}: only {key}={required} is available in the NumPy engine")
+        steps.append((name, options))
+    return steps
+
+
+def supports(chain):
+    """True when every filter in the chain has a NumPy version."""
+    try:
+        parse_filter_chain(chain)
+        return True
+    except ValueError:
+        return False
+
+
+def biquad(name, options, sample_rate):
+    """Second-order section [b0, b1, b2, 1, a1, a2] for a highpass, lowpass, bass or treble filter."""
+    w0 = 2 * math.pi * options["frequency"] / sample_rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2 * options["width"])
+    if name == "highpass":
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif name == "lowpass":
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    else:
+        A = 10 ** (options["gain"] / 40)
+        root = 2 * math.sqrt(A) * alpha
+        sign = 1 if name == "bass" else -1  # bass is a low shelf, treble a high shelf
+        b = [A * ((A + 1) - sign * (A - 1) * cos_w0 + root),
+             sign * 2 * A * ((A - 1) - sign * (A + 1) * cos_w0),
+             A * ((A + 1) - sign * (A - 1) * cos_w0 - root)]
+        a = [(A + 1) + sign * (A - 1) * cos_w0 + root,
+             -sign * 2 * ((A - 1) + sign * (A + 1) * cos_w0),
+             (A + 1) + sign * (A - 1) * cos_w0 - root]
+    return np.array(b + a) / a[0]
+
+
+def _hermite(x, x0, x1, p0, p1, m0, m1):
+    width = x1 - x0
+    t = (x - x0) / width
+    m0, m1 = m0 * width, m1 * width
+    return ((2 * p0 + m0 - 2 * p1 + m1) * t ** 3 + (-3 * p0 - 2 * m0 + 3 * p1 - m1) * t ** 2
+            + m0 * t + p0)
+
+
+def compress(samples, sample_rate, options, block=COMPRESSOR_BLOCK):
+    """
+    ffmpeg's acompressor (downward, RMS detection, channels linked by their
+    average). The envelope moves once per `block` samples, with the per-sample
+    attack/release coefficients compounded over the block, and is interpolated
+    linearly between block centres before the gain curve is applied.
+    """
+    threshold, ratio, knee = options["threshold"], options["ratio"], options["knee"]
+    x = samples * options["level_in"]
+    power = np.abs(x).mean(axis=1) ** 2
+    attack = min(1.0, 4000.0 / (options["attack"] * sample_rate))
+    release = min(1.0, 4000.0 / (options["release"] * sample_rate))
+    attack_block, release_block = 1 - (1 - attack) ** block, 1 - (1 - release) ** block
+
+    n_blocks = -(-len(power) // block)
+    padded = np.zeros(n_blocks * block)
+    padded[:len(power)] = power
+    block_power = padded.reshape(n_blocks, block).mean(axis=1)
+    envelope = np.empty(n_blocks)
+    level = 0.0
+    for i, p in enumerate(block_power.tolist()):
+        level += (p - level) * (attack_block if p > level else release_block)
+        envelope[i] = level
+    envelope = np.interp(np.arange(len(power)), np.arange(n_blocks) * block + (block - 1) / 2, envelope)
+
+    thres = math.log(threshold)
+    knee_start, knee_stop = math.log(threshold / math.sqrt(knee)), math.log(threshold * math.sqrt(knee))
+    compressed_knee_stop = (knee_stop - thres) / ratio + thres
+    gain = np.ones(len(power))
+    active = envelope > (threshold / math.sqrt(knee)) ** 2
+    slope = 0.5 * np.log(envelope[active])
+    curve = (slope - thres) / ratio + thres
+    if knee > 1.0:
+        in_knee = slope < knee_stop
+        curve[in_knee] = _hermite(slope[in_knee], knee_start, knee_stop, knee_start, compressed_knee_stop,
+                                  1.0, 1.0 / ratio)
+    gain[active] = np.exp(curve - slope)
+    return x * (gain * options["makeup"])[:, None]
+
+
+def echo(samples, sample_rate, options):
+    """ffmpeg's aecho: the input plus delayed, decayed copies of it; the output keeps the echo tail."""
+    delays = [int(float(d) * sample_rate / 1000) for d in options["delays"].split("|")]
+    decays = [float(d) for d in options["decays"].split("|")]
+    if len(delays) != len(decays):
+        raise ValueError("aecho: delays and decays must have the same number of entries")
+    tail = max(delays)
+    out = np.zeros((len(samples) + tail, samples.shape[1]))
+    out[:len(samples)] = samples * options["in_gain"]
+    for delay, decay in zip(delays, decays):
+        out[delay:delay + len(samples)] += samples * decay
+    return out * options["out_gain"]
+
+
+def apply_chain(samples, sample_rate, steps):
+    """
+    Runs parsed steps over float samples shaped (frames,) or (frames, channels).
+    Consecutive biquads are filtered in one sosfilt call.
+    """
+    from scipy.signal import sosfilt
+    x = np.asarray(samples, dtype=np.float64)
+    mono = x.ndim == 1
+    x = x.reshape(len(x), -1)
+    sections = []
+    for name, options in steps + [("end", None)]:
+        if name in _BIQUADS:
+            sections.append(biquad(name, options, sample_rate))
+            continue
+        if sections:
+            x = sosfilt(np.array(sections), x, axis=0)
+            sections = []
+        if name == "acompressor":
+            x = compress(x, sample_rate, options)
+        elif name == "aecho":
+            x = echo(x, sample_rate, options)
+    return x[:, 0] if mono else x
+
+
+def can_read(path):
+    """True for files soundfile can both read and write back in the same format."""
+    import soundfile as sf
+    if os.path.splitext(path)[1][1:].upper() not in sf.available_formats():
+        return False
+    try:
+        sf.info(path)
+        return True
+    except Exception:
+        return False
+
+
+def process_file(input_path, output_path, chain):
+    """
+    Applies an ffmpeg filter chain to an audio file in-process; the output keeps
+    the input's format and, for 16-bit PCM, is rounded the way ffmpeg does.
+    Returns the duration of the input in seconds.
+    """
+    import soundfile as sf
+    steps = parse_filter_chain(chain)
+    info = sf.info(input_path)
+    samples, sample_rate = sf.read(input_path, dtype="float64", always_2d=True)
+    out = apply_chain(samples, sample_rate, steps)
+    if info.subtype == "PCM_16":
+        out = np.clip(np.round(out * 32768.0), -32768, 32767).astype(np.int16)
+    else:
+        out = np.clip(out, -1.0, 1.0)
+    sf.write(output_path, out, sample_rate, subtype=info.subtype, format=info.format)
+    return info.duration
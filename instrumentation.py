@@ -0,0 +1,269 @@
+# instrumentation.py
+"""
+Lightweight per-stage timing for the pipeline steps.
+
+    with stage("step4_transcribe") as s:
+        with stage("model_load"):
+            ...
+        s.audio_seconds = 93.0
+
+A stage opened inside another is recorded as "step4_transcribe/model_load".
+Each record holds wall time, CPU time (this process and finished child processes
+such as ffmpeg), the peak resident memory seen while it ran and, when the stage
+sets `audio_seconds`, its real-time factor (wall / audio). Records are aggregated
+per name and exported with summary(), to_json() and to_prometheus().
+
+CPU time is process-wide, so it is exact only for stages that did not overlap
+with other work.
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+
+from config import AppConfig
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _current_rss():
+    """Resident set size in bytes, or None where it cannot be read cheaply (non-Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss():
+    """Process high-water RSS in bytes (ru_maxrss is KB on Linux, bytes on macOS)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def audio_duration(path):
+    """Duration in seconds of an audio file soundfile can read, else None."""
+    try:
+        import soundfile as sf
+        return sf.info(path).duration
+    except Exception:
+        return None
+
+
+class StageRecord:
+    def __init__(self, name):
+        self.name = name
+        self.audio_seconds = None
+        self.items = None
+        self.error = False
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss = 0
+
+    @property
+    def rtf(self):
+        return self.wall_seconds / self.audio_seconds if self.audio_seconds else None
+
+    def to_dict(self):
+        return {"stage": self.name, "started_at": self.started_at, "wall_s": round(self.wall_seconds, 4),
+                "cpu_s": round(self.cpu_seconds, 4), "peak_rss_mb": round(self.peak_rss / 2 ** 20, 1),
+                "audio_s": self.audio_seconds, "rtf": None if self.rtf is None else round(self.rtf, 4),
+                "items": self.items, "error": self.error}
+
+
+class _Recorder:
+    """Collects finished stage records and samples memory while any stage is open."""
+
+    def __init__(self, keep_records, sample_seconds):
+        self.sample_seconds = sample_seconds
+        self._records = deque(maxlen=keep_records)
+        self._totals = {}
+        self._open = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sampler = None
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def stage(self, name, parent=None):
+        stack = self._stack()
+        parent = parent or (stack[-1] if stack else None)
+        record = StageRecord(f"{parent.name}/{name}" if parent else name)
+        record.peak_rss = _current_rss() or 0
+        stack.append(record)
+        with self._lock:
+            self._open.add(record)
+            self._start_sampler()
+        wall, cpu = time.perf_counter(), _cpu_seconds()
+        try:
+            yield record
+        except BaseException as e:
+            # GeneratorExit only means a streaming consumer stopped reading.
+            record.error = not isinstance(e, GeneratorExit)
+            raise
+        finally:
+            record.wall_seconds = time.perf_counter() - wall
+            record.cpu_seconds = _cpu_seconds() - cpu
+            # Generators resumed on another thread (as Gradio does) leave the record off this thread's stack.
+            if record in stack:
+                stack.remove(record)
+            with self._lock:
+                self._open.discard(record)
+                record.peak_rss = max(record.peak_rss, _current_rss() or _max_rss())
+                self._add(record)
+
+    def _add(self, record):
+        self._records.append(record)
+        total = self._totals.setdefault(record.name, {"count": 0, "errors": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                                      "audio_s": 0.0, "items": 0, "peak_rss_mb": 0.0})
+        total["count"] += 1
+        total["errors"] += record.error
+        total["wall_s"] += record.wall_seconds
+        total["cpu_s"] += record.cpu_seconds
+        total["audio_s"] += record.audio_seconds or 0.0
+        total["items"] += record.items or 0
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], record.peak_rss / 2 ** 20)
+
+    def _start_sampler(self):
+        if self._sampler is None and _current_rss() is not None:
+            self._sampler = threading.Thread(target=self._sample, name="instrumentation-rss", daemon=True)
+            self._sampler.start()
+
+    def _sample(self):
+        while True:
+            time.sleep(self.sample_seconds)
+            rss = _current_rss()
+            with self._lock:
+                for record in self._open:
+                    record.peak_rss = max(record.peak_rss, rss)
+
+    def records(self):
+        with self._lock:
+            return [record.to_dict() for record in self._records]
+
+    def summary(self):
+        with self._lock:
+            summary = {}
+            for name, total in self._totals.items():
+                summary[name] = {key: round(value, 4) if isinstance(value, float) else value
+                                 for key, value in total.items()}
+                summary[name]["rtf"] = round(total["wall_s"] / total["audio_s"], 4) if total["audio_s"] else None
+            return summary
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+
+_recorder = _Recorder(AppConfig.INSTRUMENTATION_KEEP_RECORDS, AppConfig.INSTRUMENTATION_RSS_SAMPLE_SECONDS)
+
+
+@contextlib.contextmanager
+def stage(name, audio_seconds=None, items=None, parent=None):
+    """
+    Times the enclosed block as stage `name`, nested under the enclosing stage in
+    this thread, if any. Work handed to other threads passes that stage's record
+    as `parent` to be nested under it.
+    """
+    if not AppConfig.INSTRUMENTATION_ENABLED:
+        yield StageRecord(name)  # attributes set by the caller are ignored
+        return
+    with _recorder.stage(name, parent) as record:
+        record.audio_seconds = audio_seconds
+        record.items = items
+        yield record
+
+
+def records():
+    """The most recent stage records, oldest first."""
+    return _recorder.records()
+
+
+def summary():
+    """Totals per stage name: count, errors, wall_s, cpu_s, audio_s, items, peak_rss_mb and rtf."""
+    return _recorder.summary()
+
+
+def reset():
+    _recorder.reset()
+
+
+def to_json(path=None):
+    """Summary and recent records as JSON; written to `path` if given."""
+    text = json.dumps({"summary": summary(), "records": records()}, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+
+def to_prometheus():
+    """The per-stage totals in the Prometheus text exposition format."""
+    metrics = [
+        ("aetts_stage_runs_total", "counter", "Times the stage ran", "count"),
+        ("aetts_stage_errors_total", "counter", "Times the stage raised", "errors"),
+        ("aetts_stage_wall_seconds_total", "counter", "Wall-clock time spent in the stage", "wall_s"),
+        ("aetts_stage_cpu_seconds_total", "counter", "Process and child CPU time spent in the stage", "cpu_s"),
+        ("aetts_stage_audio_seconds_total", "counter", "Seconds of audio the stage processed", "audio_s"),
+        ("aetts_stage_items_total", "counter", "Sentences or files the stage processed", "items"),
+        ("aetts_stage_peak_rss_bytes", "gauge", "Highest resident memory seen during the stage", "peak_rss_mb"),
+    ]
+    current = summary()
+    lines = []
+    for metric, kind, help_text, field in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, total in current.items():
+            value = total[field] * 2 ** 20 if field == "peak_rss_mb" else total[field]
+            lines.append(f'{metric}{{stage="{name}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+def format_summary():
+    """Plain-text table of summary() for logs and the CLI."""
+    lines = [f"{'stage':<40} {'runs':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>8} {'RTF':>7}"]
+    for name, total in sorted(summary().items()):
+        rtf = f"{total['rtf']:.4f}" if total["rtf"] is not None else "-"
+        lines.append(f"{name:<40} {total['count']:>5} {total['wall_s']:>9.2f} {total['cpu_s']:>9.2f} "
+                     f"{total['peak_rss_mb']:>8.0f} {rtf:>7}")
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profile(path, top=25):
+    """
+    Runs the enclosed block under cProfile, dumps the stats to `path` (open with
+    pstats or snakeviz) and prints the `top` functions by cumulative time.
+    Only the calling thread is profiled.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        print(f"Profile written to {path}\n{out.getvalue()}")
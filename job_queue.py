@@ -0,0 +1,260 @@
+# job_queue.py
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+import wave
+from collections import OrderedDict
+
+from config import AppConfig, default_device
+from audio_processing import step1_prepare_audio
+from transcription_logic import step4_run_transcription
+from translation_logic import step5_translate_text
+from synthesis_logic import resolve_kokoro_voice, synthesize_speech_buffer
+
+STAGES = ["extract", "transcribe", "translate", "tts"]
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit when too many jobs are already waiting."""
+
+
+class Job:
+    """One request travelling through its stages. `results` collects what each stage produced."""
+
+    def __init__(self, stages, payload, cost):
+        self.id = uuid.uuid4().hex
+        self.stages = stages
+        self.payload = payload
+        self.cost = cost
+        self.status = "queued"
+        self.stage = stages[0]
+        self.results = {}
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.stage_seconds = {}
+
+    def to_dict(self):
+        """JSON-friendly view; in-memory audio and other non-plain results are left out."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": self.stages,
+            "cost": round(self.cost, 2),
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "stage_seconds": self.stage_seconds,
+            "results": {k: v for k, v in self.results.items() if isinstance(v, (str, int, float))},
+        }
+
+
+def estimate_cost(payload):
+    """
+    Rough processing cost in seconds of audio, used to run short jobs first.
+    WAV files are measured exactly; other media assume ~128 kbit/s; text assumes
+    ~15 characters per second of speech.
+    """
+    path = payload.get("input_path")
+    if path:
+        try:
+            with wave.open(path, "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError):
+            return os.path.getsize(path) / 16000
+    return len(payload.get("text", "")) / 15
+
+
+def default_pool_sizes(device=None):
+    """
+    Worker threads per stage for `device` (default: the one the steps pick). Only the
+    extract pool is sized by device: it is ffmpeg and I/O, and may use most cores with the
+    models on a GPU, but only those the model stages leave free on CPU. Each model stage
+    shares a single model per process (the translator's tokenizer and Kokoro's G2P are
+    not thread-safe), so it gets one worker on any device: on a GPU a second call would
+    only wait for the first, and on CPU torch already spreads one call over all cores
+    (TRANSCRIPTION_WORKERS adds Whisper processes).
+    """
+    device = device or default_device()
+    cpus = os.cpu_count() or 1
+    sizes = {stage: 1 for stage in STAGES}
+    if device == "cpu":
+        sizes["extract"] = max(1, min(4, (cpus - AppConfig.TRANSCRIPTION_WORKERS) // 2))
+    else:
+        sizes["extract"] = max(1, min(4, cpus - 1))
+    sizes.update(AppConfig.JOB_QUEUE_WORKERS)
+    return sizes
+
+
+def discard_input(payload):
+    """Deletes the job's input file if the job owns it (an upload saved by api_server.py)."""
+    path = payload.get("input_path")
+    if payload.get("delete_input") and path and os.path.exists(path):
+        os.remove(path)
+
+
+def _discard_outputs(job):
+    path = job.results.get("speech_path")
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class JobQueue:
+    """
+    Runs jobs through per-stage worker pools. Each stage has its own priority queue
+    ordered by estimated cost, so short jobs overtake long ones waiting for the
+    same stage, while a long job already running is never interrupted. At most
+    `max_pending` unfinished jobs are accepted; beyond that submit() raises
+    QueueFullError so callers can back off instead of piling work into memory.
+    `runners` maps stage name -> callable(job) returning a dict merged into job.results.
+    """
+
+    def __init__(self, runners, pool_sizes=None, max_pending=None, keep_finished=None):
+        self.runners = runners
+        self.pool_sizes = pool_sizes or default_pool_sizes()
+        self.max_pending = max_pending or AppConfig.JOB_QUEUE_MAX_PENDING
+        self.keep_finished = keep_finished or AppConfig.JOB_QUEUE_KEEP_FINISHED
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._queues = {stage: queue.PriorityQueue() for stage in runners}
+        self._running = {stage: 0 for stage in runners}
+        self._threads = []
+        for stage in runners:
+            for i in range(self.pool_sizes.get(stage, 1)):
+                thread = threading.Thread(target=self._worker, args=(stage,), name=f"{stage}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, stages, payload, cost=None):
+        unknown = [s for s in stages if s not in self.runners]
+        if not stages or unknown:
+            raise ValueError(f"Unknown or empty stages: {unknown or stages}")
+        stages = sorted(stages, key=list(self.runners).index)
+        job = Job(stages, payload, estimate_cost(payload) if cost is None else cost)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs are already pending; try again later.")
+            self._jobs[job.id] = job
+        self._enqueue(job, stages[0])
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                "queued": {stage: q.qsize() for stage, q in self._queues.items()},
+                "running": dict(self._running),
+                "workers": {stage: self.pool_sizes.get(stage, 1) for stage in self.runners},
+                "jobs": {status: statuses.count(status) for status in ("queued", "running", "done", "failed")},
+                "max_pending": self.max_pending,
+            }
+
+    def shutdown(self):
+        for stage, q in self._queues.items():
+            for _ in range(self.pool_sizes.get(stage, 1)):
+                q.put((float("inf"), next(self._sequence), None))
+        for thread in self._threads:
+            thread.join()
+
+    def _enqueue(self, job, stage):
+        job.stage = stage
+        self._queues[stage].put((job.cost, next(self._sequence), job))
+
+    def _worker(self, stage):
+        q = self._queues[stage]
+        while True:
+            _, _, job = q.get()
+            if job is None:
+                return
+            with self._lock:
+                job.status = "running"
+                self._running[stage] += 1
+            started = time.perf_counter()
+            try:
+                job.results.update(self.runners[stage](job) or {})
+                error = None
+            except Exception as e:  # gr.Error from the step functions included
+                error = getattr(e, "message", None) or str(e)
+            job.stage_seconds[stage] = round(time.perf_counter() - started, 3)
+            with self._lock:
+                self._running[stage] -= 1
+                next_index = job.stages.index(stage) + 1
+                advance = error is None and next_index < len(job.stages)
+                if advance:
+                    job.status = "queued"
+                else:
+                    job.status = "done" if error is None else "failed"
+                    job.error = error
+                    job.finished_at = time.time()
+                    self._forget_old_jobs()
+            if advance:
+                self._enqueue(job, job.stages[next_index])
+            else:
+                discard_input(job.payload)
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            _discard_outputs(self._jobs.pop(job_id))
+
+
+def pipeline_runners(output_dir=None):
+    """
+    Stage runners backed by the step functions. Audio stays in memory between
+    extraction and transcription, and an uploaded input is deleted once extracted;
+    synthesized speech is written to `output_dir`/<job id>.wav so it can be
+    downloaded, until the job is forgotten.
+    """
+    output_dir = output_dir or AppConfig.JOB_OUTPUT_DIR
+    use_gpu = True  # the steps fall back to the CPU when no GPU is present
+    no_progress = lambda *args, **kwargs: None
+
+    def extract(job):
+        p = job.payload
+        try:
+            chunks, _ = step1_prepare_audio(p["input_path"], p.get("ffmpeg_path", AppConfig.FFMPEG_PATH),
+                                            p.get("remove_silence", True), p.get("min_silence_len", 500),
+                                            p.get("silence_thresh", -50), p.get("chunk_duration", 180),
+                                            in_memory=True, progress=no_progress)
+        finally:
+            discard_input(p)
+        return {"audio": chunks}
+
+    def transcribe(job):
+        p = job.payload
+        audio = job.results["audio"] if "audio" in job.results else [p["input_path"]]
+        full_text = segments_text = ""
+        for full_text, segments_text, _ in step4_run_transcription(
+                audio, p.get("model_size", AppConfig.DEFAULT_WHISPER_MODEL),
+                p.get("language", AppConfig.DEFAULT_LANGUAGE), use_gpu, p.get("quantize", AppConfig.QUANTIZE_CPU_MODELS),
+                p.get("vad_batching", AppConfig.WHISPER_VAD_BATCHING), progress=no_progress):
+            pass
+        job.results.pop("audio", None)
+        return {"transcript": full_text, "segments": segments_text}
+
+    def translate(job):
+        translated = ""
+        for translated in step5_translate_text(job.results.get("transcript") or job.payload["text"], use_gpu,
+                                               job.payload.get("quantize", AppConfig.QUANTIZE_CPU_MODELS),
+                                               progress=no_progress):
+            pass
+        return {"translation": translated}
+
+    def tts(job):
+        text = job.results.get("translation") or job.results.get("transcript") or job.payload["text"]
+        voice_id, lang = resolve_kokoro_voice(job.payload.get("voice", AppConfig.DEFAULT_KOKORO_VOICE_LABEL))
+        buffer = synthesize_speech_buffer(text, lang, voice_id, job.payload.get("speed", 1.0), use_gpu)
+        os.makedirs(output_dir, exist_ok=True)
+        return {"speech_path": buffer.write_wav(os.path.join(output_dir, f"{job.id}.wav"))}
+
+    return {"extract": extract, "transcribe": transcribe, "translate": translate, "tts": tts}
@@ -0,0 +1,177 @@
+# model_manager.py
+import gc
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from config import AppConfig
+
+
+def model_nbytes(model):
+    """
+    Approximate memory held by a model: the bytes of its parameters and buffers.
+    Transformers pipelines are measured through their `.model`; objects without
+    parameters count as 0.
+    """
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    # Dynamically quantised Linear layers keep their int8 weights in packed params, not parameters.
+    for layer in module.modules():
+        if callable(getattr(layer, "weight", None)) and hasattr(layer, "_weight_bias"):
+            tensors.extend(t for t in layer._weight_bias() if t is not None)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def quantize_dynamic_int8(module):
+    """
+    Dynamic int8 quantisation of every Linear layer (weights stored as int8,
+    activations quantised per batch). CPU only; the module is modified in place.
+    """
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+    if "fbgemm" not in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = "qnnpack"  # ARM, e.g. Apple Silicon
+    # quantize_dynamic only swaps exact nn.Linear instances; Whisper subclasses it
+    # to cast weights to the input dtype, which makes no difference in float32 on CPU.
+    for layer in module.modules():
+        if isinstance(layer, torch.nn.Linear) and type(layer) is not torch.nn.Linear:
+            layer.__class__ = torch.nn.Linear
+    return quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class _Entry:
+    def __init__(self, model, nbytes, load_seconds, on_evict):
+        self.model = model
+        self.nbytes = nbytes
+        self.load_seconds = load_seconds
+        self.on_evict = on_evict
+        self.pinned = False
+        self.last_used = time.time()
+
+
+class ModelManager:
+    """
+    Process-wide store for loaded models (Whisper, the translation pipeline, Kokoro)
+    under one memory budget. Models are looked up by key, e.g. ("whisper", "small",
+    "cpu"); when a new model would not fit, the least recently used unpinned models
+    are evicted first. Each key is loaded at most once at a time, so concurrent
+    requests for a model that is still loading wait for it.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key, loader, size_hint=0, on_evict=None):
+        """
+        Returns the model for `key`, calling `loader()` on a miss. `size_hint` (bytes)
+        frees room before loading; the real size is measured afterwards. `on_evict(model)`
+        runs when the model is evicted, to drop other references to it.
+        """
+        with self._lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                model = self._lookup(key)
+                if model is not None:
+                    return model
+                self._make_room(size_hint)
+            started = time.perf_counter()
+            model = loader()
+            entry = _Entry(model, model_nbytes(model), time.perf_counter() - started, on_evict)
+            with self._lock:
+                self.loads += 1
+                self._make_room(entry.nbytes)
+                self._entries[key] = entry
+            print(f"Loaded model {key} ({entry.nbytes / 2 ** 20:.0f} MB) in {entry.load_seconds:.1f}s; "
+                  f"{self.used_bytes() / 2 ** 20:.0f}/{self.budget_bytes / 2 ** 20:.0f} MB in use")
+            return model
+
+    def pin(self, key):
+        """Keeps a loaded model resident regardless of the budget until unpin()."""
+        with self._lock:
+            self._entries[key].pinned = True
+
+    def unpin(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries[key].pinned = False
+                self._make_room(0)
+
+    def evict(self, key):
+        """Drops a model now, pinned or not. Returns False if it was not loaded."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._release(key, entry)
+            return True
+
+    def used_bytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.loads
+            return {
+                "budget_mb": round(self.budget_bytes / 2 ** 20, 1),
+                "used_mb": round(self.used_bytes() / 2 ** 20, 1),
+                "hits": self.hits,
+                "loads": self.loads,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "resident": [
+                    {"key": list(key), "mb": round(entry.nbytes / 2 ** 20, 1), "pinned": entry.pinned,
+                     "load_s": round(entry.load_seconds, 2), "last_used": entry.last_used}
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        entry.last_used = time.time()
+        self.hits += 1
+        return entry.model
+
+    def _make_room(self, incoming_bytes):
+        """Evicts LRU unpinned models until `incoming_bytes` more fit in the budget. Call with the lock held."""
+        while self.used_bytes() + incoming_bytes > self.budget_bytes:
+            victim = next((key for key, entry in self._entries.items() if not entry.pinned), None)
+            if victim is None:
+                print(f"Model memory budget exceeded: only pinned models are resident "
+                      f"({self.used_bytes() / 2 ** 20:.0f} MB + {incoming_bytes / 2 ** 20:.0f} MB).")
+                return
+            self._release(victim, self._entries.pop(victim))
+
+    def _release(self, key, entry):
+        self.evictions += 1
+        print(f"Evicting model {key} ({entry.nbytes / 2 ** 20:.0f} MB)")
+        if entry.on_evict is not None:
+            entry.on_evict(entry.model)
+        entry.model = None
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+models = ModelManager(AppConfig.MODEL_MEMORY_BUDGET_MB * 2 ** 20)
+
+
+def get_model_stats():
+    """Residency, memory use and hit/load/eviction counters of the shared model manager."""
+    return models.stats()
@@ -0,0 +1,325 @@
+# pipeline_runner.py
+"""
+Pipelined transcribe -> translate -> speak. Each stage runs on its own thread and
+hands its output to the next through a bounded queue, so translation starts on the
+first transcribed sentences and speech on the first translated ones; end-to-end
+time approaches that of the slowest stage instead of the sum of all three.
+
+    runner = PipelineRunner(audio_files, "tiny", "de", "EN: Heart")
+    for state in runner.updates():
+        print(format_stats(state["stats"]))
+    transcript, translation, speech = runner.result()
+
+Sentences flow transcribe -> translate and translated batches flow translate ->
+tts; each queue holds at most PIPELINE_QUEUE_SIZE items, so a fast stage waits for
+a slow one instead of piling up work. stats() reports per queue the current, peak
+and time-averaged depth, how long producers were blocked by a full queue and how
+long consumers sat idle on an empty one: the stage after a queue that is usually
+full is the bottleneck.
+"""
+import queue
+import re
+import threading
+import time
+
+import numpy as np
+
+from config import AppConfig
+from audio_buffer import AudioBuffer
+from transcription_logic import step4_run_transcription
+from translation_logic import _split_text, step5_translate_text
+from synthesis_logic import SAMPLE_RATE, resolve_kokoro_voice, synthesize_speech_buffer
+
+PIPELINED_STAGES = ["transcribe", "translate", "tts"]
+# Transcribed text without a sentence end is still passed on once it is this long.
+MAX_PENDING_CHARS = 400
+
+_DONE = object()
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+class _Stopped(Exception):
+    """Raised in a worker when another stage failed and the pipeline is shutting down."""
+
+
+class MeteredQueue:
+    """
+    A bounded FIFO between two stages that keeps depth statistics. put() and get()
+    give up with _Stopped once `stop` is set, so no thread stays blocked on a stage
+    that has failed.
+    """
+
+    def __init__(self, name, maxsize, stop):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize)
+        self._stop = stop
+        self._lock = threading.Lock()
+        self._started = self._changed = time.perf_counter()
+        self._depth_seconds = 0.0
+        self.items = 0
+        self.peak = 0
+        self.producer_blocked = 0.0
+        self.consumer_idle = 0.0
+
+    def _record(self, delta):
+        now = time.perf_counter()
+        depth = self._queue.qsize()
+        # qsize() already includes this change; the time since the last one was spent at the old depth.
+        self._depth_seconds += (depth - delta) * (now - self._changed)
+        self._changed = now
+        self.peak = max(self.peak, depth)
+
+    def put(self, item):
+        started = time.perf_counter()
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self._stop.is_set():
+                    raise _Stopped()
+        with self._lock:
+            self.producer_blocked += time.perf_counter() - started
+            self.items += item is not _DONE
+            self._record(+1)
+
+    def get(self, block=True):
+        started = time.perf_counter()
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1) if block else self._queue.get_nowait()
+                break
+            except queue.Empty:
+                if not block:
+                    raise
+                if self._stop.is_set():
+                    raise _Stopped()
+        with self._lock:
+            self.consumer_idle += time.perf_counter() - started
+            self._record(-1)
+        return item
+
+    def stats(self):
+        with self._lock:
+            elapsed = max(time.perf_counter() - self._started, 1e-9)
+            depth = self._queue.qsize()
+            mean = (self._depth_seconds + depth * (time.perf_counter() - self._changed)) / elapsed
+            return {"depth": depth, "capacity": self.maxsize, "peak": self.peak, "mean_depth": round(mean, 2),
+                    "items": self.items, "producer_blocked_s": round(self.producer_blocked, 3),
+                    "consumer_idle_s": round(self.consumer_idle, 3)}
+
+
+class PipelineRunner:
+    """
+    Runs step 4, step 5 and Kokoro synthesis for one recording on three threads.
+    `audio_files` is what step4_run_transcription takes; the speech uses the voice's
+    language, like the TTS step.
+    """
+
+    def __init__(self, audio_files, model_size, language, voice_label, speed=1.0, use_gpu=False, quantize=False,
+                 vad_batching=False, queue_size=None):
+        self.audio_files = audio_files
+        self.model_size = model_size
+        self.language = language
+        self.voice_id, self.voice_language = resolve_kokoro_voice(voice_label)
+        self.speed = speed
+        self.use_gpu = use_gpu
+        self.quantize = quantize
+        self.vad_batching = vad_batching
+        size = queue_size or AppConfig.PIPELINE_QUEUE_SIZE
+        self._stop = threading.Event()
+        self._changed = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._queues = {"translate": MeteredQueue("transcribe -> translate", size, self._stop),
+                        "tts": MeteredQueue("translate -> tts", size, self._stop)}
+        self._busy = {name: 0.0 for name in PIPELINED_STAGES}
+        self._error = None
+        self.transcript = self.segments = self.transcript_path = ""
+        self._translations = []
+        self._speech = []
+        self._started = self._finished = None
+        self._first_speech = None
+        self._threads = []
+        self._running = 0
+
+    # --- Stages ---
+
+    def _transcribe(self):
+        out = self._queues["translate"]
+        pending, previous = "", ""
+        steps = step4_run_transcription(self.audio_files, self.model_size, self.language, self.use_gpu,
+                                        self.quantize, self.vad_batching, progress=_no_progress)
+        try:
+            while True:
+                started = time.perf_counter()
+                update = next(steps, None)
+                self._busy["transcribe"] += time.perf_counter() - started
+                if update is None:
+                    break
+                full, segments, path = update
+                pending += full[len(previous):]
+                previous = full
+                with self._lock:
+                    self.transcript, self.segments, self.transcript_path = update
+                self._changed.set()
+                sentences = _split_text(pending)
+                # The last sentence may continue in the next chunk unless it ends like a sentence.
+                if sentences and not re.search(r"[.!?]$", sentences[-1]) and len(sentences[-1]) < MAX_PENDING_CHARS:
+                    pending = sentences.pop()
+                else:
+                    pending = ""
+                for sentence in sentences:
+                    out.put(sentence)
+        finally:
+            steps.close()
+        if pending.strip():
+            out.put(pending.strip())
+
+    def _drain(self, source, first, limit):
+        """`first` plus whatever is already waiting in `source`, up to `limit` items; True if _DONE was seen."""
+        items = [first]
+        while len(items) < limit:
+            try:
+                item = source.get(block=False)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _translate(self):
+        source, out = self._queues["translate"], self._queues["tts"]
+        done = False
+        while not done:
+            first = source.get()
+            if first is _DONE:
+                break
+            batch, done = self._drain(source, first, AppConfig.TRANSLATION_BATCH_SIZE)
+            started = time.perf_counter()
+            translated = ""
+            for translated in step5_translate_text(" ".join(batch), self.use_gpu, self.quantize,
+                                                   progress=_no_progress):
+                pass
+            self._busy["translate"] += time.perf_counter() - started
+            with self._lock:
+                self._translations.append(translated)
+            self._changed.set()
+            out.put(translated)
+
+    def _tts(self):
+        source = self._queues["tts"]
+        done = False
+        while not done:
+            first = source.get()
+            if first is _DONE:
+                break
+            texts, done = self._drain(source, first, AppConfig.KOKORO_BATCH_SIZE)
+            started = time.perf_counter()
+            buffer = synthesize_speech_buffer(" ".join(texts), self.voice_language, self.voice_id, self.speed,
+                                              self.use_gpu)
+            self._busy["tts"] += time.perf_counter() - started
+            with self._lock:
+                self._speech.append(buffer.samples)
+                if self._first_speech is None:
+                    self._first_speech = time.perf_counter() - self._started
+            self._changed.set()
+
+    def _worker(self, name, fn, downstream):
+        try:
+            fn()
+        except _Stopped:
+            pass
+        except Exception as e:  # gr.Error from the step functions included
+            with self._lock:
+                if self._error is None:
+                    self._error = (name, getattr(e, "message", None) or str(e))
+            self._stop.set()
+        finally:
+            if downstream is not None and not self._stop.is_set():
+                try:
+                    downstream.put(_DONE)
+                except _Stopped:
+                    pass
+            with self._lock:
+                self._running -= 1
+                if not self._running:
+                    self._finished = time.perf_counter()
+                    self._done.set()
+            self._changed.set()
+
+    # --- Running ---
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._running = 3
+        targets = [("transcribe", self._transcribe, self._queues["translate"]),
+                   ("translate", self._translate, self._queues["tts"]),
+                   ("tts", self._tts, None)]
+        for name, fn, downstream in targets:
+            thread = threading.Thread(target=self._worker, args=(name, fn, downstream), name=f"pipeline-{name}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def updates(self, interval=0.5):
+        """
+        Starts the pipeline if needed and yields a snapshot (see state()) whenever a
+        stage produced output, at most every `interval` seconds, and once at the end.
+        """
+        if not self._threads:
+            self.start()
+        while not self._done.wait(interval):
+            if self._changed.is_set():
+                self._changed.clear()
+                yield self.state()
+        yield self.state()
+
+    def state(self):
+        """The transcript, segments, transcript path and translation so far, the queue stats, and the error if any."""
+        with self._lock:
+            return {"transcript": self.transcript, "segments": self.segments, "transcript_path": self.transcript_path,
+                    "translation": " ".join(self._translations), "stats": self.stats(), "error": self._error}
+
+    def speech(self):
+        """Everything synthesized so far as one AudioBuffer."""
+        with self._lock:
+            parts = list(self._speech)
+        return AudioBuffer(np.concatenate(parts) if parts else np.zeros(0, np.float32), SAMPLE_RATE)
+
+    def stats(self):
+        elapsed = (self._finished or time.perf_counter()) - self._started if self._started else 0.0
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "first_speech_s": None if self._first_speech is None else round(self._first_speech, 3),
+            "busy_s": {name: round(seconds, 3) for name, seconds in self._busy.items()},
+            "queues": {name: q.stats() for name, q in self._queues.items()},
+        }
+
+    def result(self):
+        """Waits for the pipeline; returns (transcript, translation, speech AudioBuffer) or raises RuntimeError."""
+        for thread in self._threads:
+            thread.join()
+        if self._error:
+            name, message = self._error
+            raise RuntimeError(f"Pipeline {name} stage failed: {message}")
+        return self.transcript, " ".join(self._translations), self.speech()
+
+
+def format_stats(stats):
+    """Plain-text summary of PipelineRunner.stats() for logs, the CLI and the UI."""
+    busy = stats["busy_s"]
+    first = f"{stats['first_speech_s']:.1f}s" if stats["first_speech_s"] is not None else "-"
+    lines = [f"elapsed {stats['elapsed_s']:.1f}s, first speech after {first}; busy: "
+             + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in busy.items()),
+             f"{'queue into':<10} {'depth':>9} {'peak':>5} {'mean':>6} {'items':>6} {'blocked s':>10} {'idle s':>8}"]
+    for name, q in stats["queues"].items():
+        lines.append(f"{name:<10} {q['depth']:>4}/{q['capacity']:<4} {q['peak']:>5} {q['mean_depth']:>6.2f} "
+                     f"{q['items']:>6} {q['producer_blocked_s']:>10.2f} {q['consumer_idle_s']:>8.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,230 @@
+# silence_detection.py
+import numpy as np
+
+# Sample widths pydub works with; 24-bit audio is widened to 32-bit when pydub loads it.
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+# Milliseconds processed per vectorised pass, to bound temporary arrays on long inputs.
+_BLOCK_MS = 60_000
+
+
+def ms_to_frame(ms, frame_rate):
+    """Frame index of a millisecond position, rounded down like pydub's slicing."""
+    return (np.asarray(ms, dtype=np.int64) * frame_rate) // 1000
+
+
+def audio_length_ms(n_frames, frame_rate):
+    """Length in milliseconds as pydub reports it (len(AudioSegment))."""
+    return round(1000 * (n_frames / frame_rate))
+
+
+def silence_threshold(silence_thresh_db, sample_width):
+    """Converts a dBFS threshold into the RMS amplitude it corresponds to."""
+    return 10 ** (silence_thresh_db / 20) * (2 ** (sample_width * 8) / 2)
+
+
+def ms_energy(samples, frame_rate, channels, start_ms=0, end_ms=None):
+    """
+    Sum of squared samples for every millisecond in [start_ms, end_ms).
+    `samples` is interleaved PCM starting at start_ms. Frames past the end of the
+    data count as silence, the same way pydub pads slices that run off the end.
+    """
+    frames = samples.reshape(-1, channels)
+    if end_ms is None:
+        end_ms = start_ms + audio_length_ms(len(frames), frame_rate)
+    wide = np.int64 if samples.dtype.itemsize <= 2 else np.float64
+    first_frame = int(ms_to_frame(start_ms, frame_rate))
+    sums = np.empty(end_ms - start_ms, dtype=wide)
+    for block_start in range(start_ms, end_ms, _BLOCK_MS):
+        block_end = min(block_start + _BLOCK_MS, end_ms)
+        bounds = np.minimum(ms_to_frame(np.arange(block_start, block_end + 1), frame_rate) - first_frame, len(frames))
+        block = frames[bounds[0]:bounds[-1]].astype(wide)
+        energy = np.concatenate(([0], np.cumsum((block * block).sum(axis=1))))
+        bounds -= bounds[0]
+        sums[block_start - start_ms:block_end - start_ms] = energy[bounds[1:]] - energy[bounds[:-1]]
+    return sums
+
+
+def silent_window_starts(window_energy, window_samples, threshold):
+    """Boolean mask of windows whose RMS (truncated like audioop.rms) is at or below the threshold."""
+    return np.floor(np.sqrt(window_energy / window_samples)) <= threshold
+
+
+def merge_silent_starts(starts, min_silence_len):
+    """
+    Turns silent window start positions into [start, end] ranges in milliseconds.
+    Starts closer than min_silence_len apart belong to the same range, as in pydub.
+    """
+    if len(starts) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(starts) > min_silence_len)
+    range_starts = np.concatenate(([starts[0]], starts[breaks + 1]))
+    range_ends = np.concatenate((starts[breaks], [starts[-1]])) + min_silence_len
+    return [[int(s), int(e)] for s, e in zip(range_starts, range_ends)]
+
+
+def invert_ranges(silent_ranges, length_ms):
+    """Non-silent [start, end] ranges between the given silent ranges (pydub.silence.detect_nonsilent)."""
+    if not silent_ranges:
+        return [[0, length_ms]]
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == length_ms:
+        return []
+    nonsilent_ranges = []
+    prev_end = 0
+    for start, end in silent_ranges:
+        nonsilent_ranges.append([prev_end, start])
+        prev_end = end
+    if prev_end != length_ms:
+        nonsilent_ranges.append([prev_end, length_ms])
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+    return nonsilent_ranges
+
+
+def detect_nonsilent(samples, frame_rate, channels, sample_width, min_silence_len, silence_thresh):
+    """
+    Vectorised equivalent of pydub.silence.detect_nonsilent (seek_step=1) on raw PCM.
+    Returns [start_ms, end_ms] ranges of audio louder than `silence_thresh` dBFS.
+    """
+    n_frames = len(samples) // channels
+    length_ms = audio_length_ms(n_frames, frame_rate)
+    if length_ms < min_silence_len:
+        return [[0, length_ms]]
+
+    energy = np.concatenate(([0], np.cumsum(ms_energy(samples, frame_rate, channels))))
+    window_starts = np.arange(0, length_ms - min_silence_len + 1)
+    window_energy = energy[window_starts + min_silence_len] - energy[window_starts]
+    window_samples = (ms_to_frame(window_starts + min_silence_len, frame_rate) - ms_to_frame(window_starts, frame_rate)) * channels
+    silent = silent_window_starts(window_energy, window_samples, silence_threshold(silence_thresh, sample_width))
+    silent_ranges = merge_silent_starts(np.flatnonzero(silent), min_silence_len)
+    return invert_ranges(silent_ranges, length_ms)
+
+
+def keep_ranges(samples, frame_rate, channels, ranges_ms, first_frame=0):
+    """
+    Concatenates the given millisecond ranges of interleaved PCM into one preallocated buffer.
+    `first_frame` is the absolute frame index of samples[0] when they are a window into longer audio.
+    """
+    frames = samples.reshape(-1, channels)
+    bounds = [(int(ms_to_frame(start, frame_rate)) - first_frame, int(ms_to_frame(end, frame_rate)) - first_frame)
+              for start, end in ranges_ms]
+    # Zero-initialised, so ranges that run past the data end in silence like pydub's padded slices.
+    output = np.zeros((sum(end - start for start, end in bounds), channels), dtype=samples.dtype)
+    position = 0
+    for start, end in bounds:
+        available = frames[start:end]
+        output[position:position + len(available)] = available
+        position += end - start
+    return output.reshape(-1)
+
+
+class StreamingSilenceRemover:
+    """
+    Incremental detect_nonsilent + keep_ranges for PCM that arrives in blocks.
+    A millisecond's fate is settled once every window starting before it has been
+    checked, so only about min_silence_len of audio (plus the current block) is
+    buffered, however long the input is. The concatenated output of feed() and
+    finish() is identical to the in-memory result.
+    """
+
+    def __init__(self, frame_rate, channels, sample_width, min_silence_len, silence_thresh):
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.min_silence_len = min_silence_len
+        self.threshold = silence_threshold(silence_thresh, sample_width)
+        self.dtype = SAMPLE_DTYPES[sample_width]
+        self.frames_seen = 0
+        self.frames_written = 0
+        self.nonsilent_ranges = []
+        self._frames = np.empty((0, channels), dtype=self.dtype)
+        self._buffer_start = 0  # absolute frame index of self._frames[0]
+        self._energy = np.empty(0, dtype=np.int64 if sample_width <= 2 else np.float64)
+        self._energy_start = 0  # millisecond of self._energy[0]
+        self._next_window = 0
+        self._open_range = None  # [first_start, last_start] of the silent range still growing
+        self._closed_ranges = []
+        self._emitted_ms = 0
+
+    def feed(self, samples):
+        """Adds interleaved samples and returns the kept samples that are now final."""
+        self._frames = np.concatenate((self._frames, samples.reshape(-1, self.channels)))
+        self.frames_seen += len(samples) // self.channels
+        complete_ms = (self.frames_seen * 1000) // self.frame_rate
+        while ms_to_frame(complete_ms + 1, self.frame_rate) <= self.frames_seen:
+            complete_ms += 1
+        self._add_energy(complete_ms)
+        self._check_windows(complete_ms - self.min_silence_len)
+        return self._emit(self._next_window)
+
+    def finish(self):
+        """Flushes the tail once the input is exhausted and returns the remaining kept samples."""
+        length_ms = audio_length_ms(self.frames_seen, self.frame_rate)
+        self._add_energy(length_ms)
+        self._check_windows(length_ms - self.min_silence_len)
+        if self._open_range is not None:
+            self._closed_ranges.append([self._open_range[0], self._open_range[1] + self.min_silence_len])
+            self._open_range = None
+        return self._emit(length_ms)
+
+    def _add_energy(self, end_ms):
+        start_ms = self._energy_start + len(self._energy)
+        if end_ms <= start_ms:
+            return
+        offset = int(ms_to_frame(start_ms, self.frame_rate)) - self._buffer_start
+        energy = ms_energy(self._frames[offset:].reshape(-1), self.frame_rate, self.channels, start_ms, end_ms)
+        self._energy = np.concatenate((self._energy, energy))
+
+    def _check_windows(self, last_start):
+        if last_start < self._next_window:
+            return
+        starts = np.arange(self._next_window, last_start + 1)
+        prefix = np.concatenate(([0], np.cumsum(self._energy)))
+        relative = starts - self._energy_start
+        window_energy = prefix[relative + self.min_silence_len] - prefix[relative]
+        window_samples = (ms_to_frame(starts + self.min_silence_len, self.frame_rate)
+                          - ms_to_frame(starts, self.frame_rate)) * self.channels
+        silent = starts[silent_window_starts(window_energy, window_samples, self.threshold)]
+        if len(silent):
+            ranges = merge_silent_starts(silent, self.min_silence_len)
+            if self._open_range is not None:
+                if silent[0] <= self._open_range[1] + self.min_silence_len:
+                    ranges[0][0] = self._open_range[0]
+                else:
+                    self._closed_ranges.append([self._open_range[0], self._open_range[1] + self.min_silence_len])
+            self._closed_ranges.extend(ranges[:-1])
+            self._open_range = [ranges[-1][0], int(silent[-1])]
+        self._next_window = last_start + 1
+        self._energy = self._energy[self._next_window - self._energy_start:]
+        self._energy_start = self._next_window
+
+    def _emit(self, final_ms):
+        """Returns the kept samples in [emitted, final_ms) and drops what is no longer needed."""
+        covered = list(self._closed_ranges)
+        if self._open_range is not None:
+            covered.append([self._open_range[0], self._open_range[1] + self.min_silence_len])
+        position = self._emitted_ms
+        pieces = []
+        for start, end in covered:
+            if start >= final_ms:
+                break
+            if start > position:
+                pieces.append([position, start])
+            position = max(position, min(end, final_ms))
+        if position < final_ms:
+            pieces.append([position, final_ms])
+        self._closed_ranges = [r for r in self._closed_ranges if r[1] > final_ms]
+        self._emitted_ms = final_ms
+
+        for start, end in pieces:
+            if self.nonsilent_ranges and self.nonsilent_ranges[-1][1] == start:
+                self.nonsilent_ranges[-1][1] = end
+            else:
+                self.nonsilent_ranges.append([start, end])
+        output = keep_ranges(self._frames.reshape(-1), self.frame_rate, self.channels, pieces,
+                             first_frame=self._buffer_start)
+        self.frames_written += len(output) // self.channels
+
+        drop = int(ms_to_frame(final_ms, self.frame_rate)) - self._buffer_start
+        self._frames = self._frames[min(drop, len(self._frames)):]
+        self._buffer_start += drop
+        return output
@@ -1,26 +1,29 @@
 # synthesis_logic.py
 import gradio as gr
-import torch
 import functools
 import tempfile
+import hashlib
+import io
 import soundfile as sf
 import numpy as np
 import os
 import traceback
 import re
 import zipfile
+import time
+import threading
 import warnings  # Enable warning control
+from collections import OrderedDict
 
 
 
 # --- Import from our project files ---
-from config import AppConfig, CUDA_AVAILABLE, MPS_AVAILABLE
+from config import AppConfig, cuda_available, mps_available
+from audio_buffer import AudioBuffer
+from disk_cache import DiskCache
+from instrumentation import stage
+from model_manager import models
 
-try:
-    from kokoro.model import KModel
-    from kokoro.pipeline import KPipeline
-except ImportError:
-    raise ImportError("Kokoro library not found. Please install it with: pip install kokoro>=0.9.4 soundfile numpy")
 REPO_ID = 'hexgrad/Kokoro-82M'
 #LANG_CODE = 'a'
 #VOICE = 'am_michael'
@@ -28,8 +31,29 @@ REPO_ID = 'hexgrad/Kokoro-82M'
 SAMPLE_RATE = 24000
 FRAMES_PER_BUFFER = 1024
 
-@functools.lru_cache(maxsize=1)
+# The kokoro release whose G2P and KModel.forward internals _phonemize and _forward_batch copy.
+_KOKORO_BATCHED_VERSION = "0.9.4"
+
+def _import_kokoro():
+    """Imports Kokoro (and with it torch and the G2P stack) on first use rather than at startup."""
+    try:
+        from kokoro.model import KModel
+        from kokoro.pipeline import KPipeline
+    except ImportError:
+        raise ImportError("Kokoro library not found. Please install it with: pip install kokoro==0.9.4 soundfile numpy")
+    return KModel, KPipeline
+
+
 def load_local_kmodel(device):
+    """
+    Returns the KModel from the shared model manager, loading it on first use.
+    The pipelines built on it are dropped with it when it is evicted.
+    """
+    return models.get(("kokoro", device), lambda: _load_local_kmodel(device), size_hint=int(82e6 * 4),
+                      on_evict=lambda model: _registry.drop_pipelines(device))
+
+
+def _load_local_kmodel(device):
     """
     This function correctly loads the KModel from local files.
     This is the expensive operation we want to cache.
@@ -44,23 +68,477 @@ def load_local_kmodel(device):
             "Please ensure config.json and model.pth exist."
         )
 
+    KModel, _ = _import_kokoro()
     print(f"Loading local KModel from: {model_path} onto device: {device}")
     k_model = KModel(repo_id='hexgrad/Kokoro-82M', config=config_path, model=model_path)
     k_model.to(device)
     k_model.eval()
     return k_model
 
-def _synthesize_text_chunk(pipeline, text, voice_id, speed):
+class _KokoroRegistry:
+    """
+    Bounded LRU store for warm KPipelines and voice tensors.
+    Building a KPipeline loads the G2P/spaCy stack for its language and a voice
+    needs a torch.load, so both are kept around between requests. Every entry
+    remembers how long it took to build, which is what a later hit saves.
+    """
+
+    def __init__(self, max_pipelines, max_voices, max_voice_bytes):
+        self.max_pipelines = max_pipelines
+        self.max_voices = max_voices
+        self.max_voice_bytes = max_voice_bytes
+        self._pipelines = OrderedDict()  # (lang_code, device) -> (pipeline, load_seconds)
+        self._voices = OrderedDict()  # (voice_id, device) -> (tensor, nbytes, load_seconds)
+        self._voice_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}  # (lang_code, device) -> lock held while that pipeline is built
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.time_saved = 0.0
+
+    def _lookup_pipeline(self, key):
+        """The cached pipeline for `key`, counted as a hit, or None. Call with the lock held."""
+        entry = self._pipelines.get(key)
+        if entry is None:
+            return None
+        self._pipelines.move_to_end(key)
+        self.hits += 1
+        self.time_saved += entry[1]
+        return entry[0]
+
+    def get_pipeline(self, lang_code, device, model):
+        """
+        Building a pipeline takes seconds, so it happens outside the registry lock:
+        only requests for the same (lang_code, device) wait for it.
+        """
+        key = (lang_code, device)
+        with self._lock:
+            pipeline = self._lookup_pipeline(key)
+            if pipeline is not None:
+                return pipeline
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                pipeline = self._lookup_pipeline(key)
+                if pipeline is not None:
+                    return pipeline
+                self.misses += 1
+            print(f"Initializing Kokoro pipeline with lang_code: '{lang_code}' on '{device}'")
+            started = time.perf_counter()
+            _, KPipeline = _import_kokoro()
+            pipeline = KPipeline(lang_code=lang_code, model=model, repo_id=REPO_ID)
+            with self._lock:
+                self._pipelines[key] = (pipeline, time.perf_counter() - started)
+                while len(self._pipelines) > self.max_pipelines:
+                    self._pipelines.popitem(last=False)
+                    self.evictions += 1
+            return pipeline
+
+    def get_voice(self, voice_id, device):
+        """
+        Voices are kept on the CPU (pinned when feeding a CUDA model) and handed
+        to the pipeline as tensors; KPipeline moves them onto the model device.
+        """
+        key = (voice_id, device)
+        with self._lock:
+            entry = self._voices.get(key)
+            if entry is not None:
+                self._voices.move_to_end(key)
+                self.hits += 1
+                self.time_saved += entry[2]
+                return entry[0]
+            self.misses += 1
+            voice_file_path = os.path.join(AppConfig.LOCAL_KOKORO_MODEL_PATH, "voices", f"{voice_id}.pt")
+            if not os.path.exists(voice_file_path):
+                raise FileNotFoundError(f"Voice file not found: {voice_file_path}.")
+            import torch
+            started = time.perf_counter()
+            voice_tensor = torch.load(voice_file_path, map_location="cpu", weights_only=True)
+            if device == "cuda":
+                voice_tensor = voice_tensor.pin_memory()
+            nbytes = voice_tensor.numel() * voice_tensor.element_size()
+            self._voices[key] = (voice_tensor, nbytes, time.perf_counter() - started)
+            self._voice_bytes += nbytes
+            while len(self._voices) > 1 and (
+                len(self._voices) > self.max_voices or self._voice_bytes > self.max_voice_bytes
+            ):
+                _, (_, evicted_bytes, _) = self._voices.popitem(last=False)
+                self._voice_bytes -= evicted_bytes
+                self.evictions += 1
+            return voice_tensor
+
+    def drop_pipelines(self, device):
+        """Forgets the pipelines built on the `device` model so that model can be freed."""
+        with self._lock:
+            for key in [key for key in self._pipelines if key[1] == device]:
+                del self._pipelines[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "time_saved_s": round(self.time_saved, 3),
+                "evictions": self.evictions,
+                "pipelines": len(self._pipelines),
+                "voices": len(self._voices),
+                "voice_bytes": self._voice_bytes,
+            }
+
+
+_registry = _KokoroRegistry(
+    AppConfig.KOKORO_PIPELINE_CACHE_SIZE,
+    AppConfig.KOKORO_VOICE_CACHE_SIZE,
+    AppConfig.KOKORO_VOICE_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def get_kokoro_cache_stats():
+    """Returns hit/miss counters, hit rate and load time saved by the pipeline/voice cache."""
+    return _registry.stats()
+
+def _synthesize_text_chunk(pipeline, text, voice, speed):
     """Helper to synthesize a single chunk of text with a given speed."""
-    generator = pipeline(text, voice=voice_id, speed=speed) # Pass speed here
+    generator = pipeline(text, voice=voice, speed=speed) # Pass speed here
     audio_chunks = [audio for _, _, audio in generator]
     if not audio_chunks:
         return None
     return np.concatenate(audio_chunks)
 
+def _phonemize(pipeline, text):
+    """Yields the phoneme strings KPipeline would feed to the model for `text`."""
+    for part in re.split(r'\n+', text.strip()):
+        if not part.strip():
+            continue
+        if pipeline.lang_code in 'ab':
+            _, tokens = pipeline.g2p(part)
+            for _, ps, _ in pipeline.en_tokenize(tokens):
+                if ps:
+                    yield ps[:510]
+        else:
+            ps, _ = pipeline.g2p(part)
+            if ps:
+                yield ps[:510]
+
+@functools.lru_cache(maxsize=None)
+def _installed_kokoro_version():
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version("kokoro")
+    except PackageNotFoundError:
+        return None
+
+def _batching_unsupported(pipeline):
+    """Why batched synthesis cannot run with `pipeline`, or None if it can."""
+    installed = _installed_kokoro_version()
+    if installed != _KOKORO_BATCHED_VERSION:
+        return f"kokoro {installed or 'is not installed as a package'}, batching needs {_KOKORO_BATCHED_VERSION}"
+    if not hasattr(pipeline, "g2p") or not hasattr(getattr(pipeline, "model", None), "predictor"):
+        return "the pipeline has no G2P or KModel predictor"
+    return None
+
+def _forward_batch(model, phoneme_batch, voice, speed):
+    """
+    Runs several phoneme strings through KModel, copying the internals of KModel.forward
+    in kokoro 0.9.4 (checked by _batching_unsupported). Only the text side is batched:
+    ALBERT, the duration and the text encoders run as one padded batch with masks and
+    packed LSTMs, so each item sees exactly what it would alone. Alignment, F0/noise
+    prediction and the decoder, which take most of the time, still run one item at a
+    time: their AdaIN layers normalise over time, so padding would change the audio.
+    """
+    import torch
+
+    with torch.no_grad():
+        device = model.device
+        token_ids = [[0, *(model.vocab[p] for p in ps if p in model.vocab), 0] for ps in phoneme_batch]
+        lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long)
+        input_ids = torch.zeros((len(token_ids), int(lengths.max())), dtype=torch.long)
+        for i, ids in enumerate(token_ids):
+            input_ids[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        input_ids = input_ids.to(device)
+        ref_s = torch.cat([voice[len(ps) - 1] for ps in phoneme_batch]).to(device)
+
+        text_mask = torch.gt(torch.arange(input_ids.shape[1]).unsqueeze(0) + 1, lengths.unsqueeze(1)).to(device)
+        bert_dur = model.bert(input_ids, attention_mask=(~text_mask).int())
+        d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
+        s = ref_s[:, 128:]
+        d = model.predictor.text_encoder(d_en, s, lengths, text_mask)
+        x = torch.nn.utils.rnn.pack_padded_sequence(d, lengths, batch_first=True, enforce_sorted=False)
+        x, _ = model.predictor.lstm(x)
+        x, _ = torch.nn.utils.rnn.pad_packed_sequence(x, batch_first=True, total_length=input_ids.shape[1])
+        duration = torch.sigmoid(model.predictor.duration_proj(x)).sum(axis=-1) / speed
+        t_en = model.text_encoder(input_ids, lengths, text_mask)
+
+        audios = []
+        for i, n in enumerate(lengths.tolist()):
+            pred_dur = torch.round(duration[i, :n]).clamp(min=1).long()
+            indices = torch.repeat_interleave(torch.arange(n, device=device), pred_dur)
+            pred_aln_trg = torch.zeros((n, indices.shape[0]), device=device)
+            pred_aln_trg[indices, torch.arange(indices.shape[0])] = 1
+            pred_aln_trg = pred_aln_trg.unsqueeze(0)
+            en = d[i:i + 1, :n].transpose(-1, -2) @ pred_aln_trg
+            F0_pred, N_pred = model.predictor.F0Ntrain(en, s[i:i + 1])
+            asr = t_en[i:i + 1, :, :n] @ pred_aln_trg
+            audio = model.decoder(asr, F0_pred, N_pred, ref_s[i:i + 1, :128]).squeeze()
+            audios.append(audio.cpu().numpy())
+        return audios
+
+def _synthesize_sentences_batched(pipeline, sentences, voice, speed, batch_size, on_batch=None):
+    """
+    Synthesizes a list of sentences, grouping phonemized chunks of similar length
+    into batches of `batch_size` for the text encoder (see _forward_batch). Returns one
+    array per sentence (None if empty). With a kokoro other than 0.9.4 it makes one
+    KPipeline call per sentence instead.
+    """
+    reason = _batching_unsupported(pipeline)
+    if reason is None:
+        return _synthesize_batches(pipeline, sentences, voice, speed, batch_size, on_batch)
+    print(f"Batched Kokoro synthesis unavailable ({reason}); synthesizing sentence by sentence.")
+    sentence_audio = []
+    for i, sentence in enumerate(sentences):
+        sentence_audio.append(_synthesize_text_chunk(pipeline, sentence, voice, speed) if sentence.strip() else None)
+        if on_batch:
+            on_batch(i + 1, len(sentences))
+    return sentence_audio
+
+def _synthesize_batches(pipeline, sentences, voice, speed, batch_size, on_batch):
+    phonemized = [list(_phonemize(pipeline, sentence)) if sentence.strip() else [] for sentence in sentences]
+    items = sorted(
+        ((i, j, ps) for i, chunks in enumerate(phonemized) for j, ps in enumerate(chunks)),
+        key=lambda item: len(item[2]),
+    )
+    audio_parts = {}
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        audios = _forward_batch(pipeline.model, [ps for _, _, ps in batch], voice, speed)
+        for (i, j, _), audio in zip(batch, audios):
+            audio_parts[(i, j)] = audio
+        if on_batch:
+            on_batch(min(start + batch_size, len(items)), len(items))
+    return [
+        np.concatenate([audio_parts[(i, j)] for j in range(len(chunks))]) if chunks else None
+        for i, chunks in enumerate(phonemized)
+    ]
+
+def resolve_kokoro_voice(voice_label):
+    """Maps a voice label from AppConfig.KOKORO_VOICES to (voice_id, language)."""
+    voice_info = AppConfig.KOKORO_VOICES.get(voice_label)
+    if not voice_info: raise gr.Error(f"Invalid voice selection: {voice_label}")
+    if isinstance(voice_info, tuple):
+        return voice_info
+    return voice_info, "en"
+
+
+def _select_device(use_gpu):
+    if use_gpu:
+        if cuda_available():
+            return "cuda"
+        if mps_available():
+            return "mps"
+    return "cpu"
+
+def _prepare_kokoro(language_for_tts, voice_id, device):
+    """Returns a warm (pipeline, voice_tensor) pair for the language and voice."""
+    with stage("model_load"):
+        return _load_pipeline_and_voice(language_for_tts, voice_id, device)
+
+def _load_pipeline_and_voice(language_for_tts, voice_id, device):
+    loaded_model = load_local_kmodel(device)
+
+    kokoro_lang_code = AppConfig.KOKORO_LANG_MAP.get(language_for_tts)
+    if not kokoro_lang_code:
+        supported_langs = list(AppConfig.KOKORO_LANG_MAP.keys())
+        raise ValueError(
+            f"Language '{language_for_tts}' is not supported by Kokoro TTS. "
+            f"Please choose a voice for a supported language: {supported_langs}"
+        )
+
+    pipeline = _registry.get_pipeline(kokoro_lang_code, device, loaded_model)
+    voice_tensor = _registry.get_voice(voice_id, device)
+    return pipeline, voice_tensor
+
+def _iter_segments(pipeline, text, voice, speed):
+    """Yields each KPipeline segment as a float32 array as soon as it is synthesized."""
+    for _, _, audio in pipeline(text, voice=voice, speed=speed):
+        if audio is not None:
+            yield np.asarray(audio, dtype=np.float32)
+
+def iter_speech_kokoro(text_to_speak, language_for_tts, kokoro_voice_id, speed=1.0, use_gpu=False,
+                       frames_per_buffer=FRAMES_PER_BUFFER):
+    """
+    Streaming API for non-UI callers.
+    Yields float32 PCM frames at SAMPLE_RATE, `frames_per_buffer` samples each
+    (the last frame of a segment may be shorter), while synthesis is still running.
+    Raises ValueError for an empty text or a language Kokoro does not support.
+    """
+    if not text_to_speak or not text_to_speak.strip():
+        raise ValueError("Text for speech synthesis cannot be empty.")
+    pipeline, voice_tensor = _prepare_kokoro(language_for_tts, kokoro_voice_id, _select_device(use_gpu))
+    for segment in _iter_segments(pipeline, text_to_speak, voice_tensor, speed):
+        for start in range(0, len(segment), frames_per_buffer):
+            yield segment[start:start + frames_per_buffer]
+
+def step6_stream_speech_kokoro(text_to_speak, language_for_tts, kokoro_voice_id, speed, use_gpu, progress=gr.Progress()):
+    """
+    Streaming variant of step 6 for a Gradio Audio output with streaming=True.
+    Yields (SAMPLE_RATE, segment) for every segment KPipeline completes; errors
+    are raised as gr.Error.
+    """
+    progress(0, desc="Starting TTS stream...")
+    if not text_to_speak or not text_to_speak.strip():
+        raise gr.Error("Text for speech synthesis cannot be empty.")
+
+    device = _select_device(use_gpu)
+    progress(0.1, desc=f"Loading model on '{device}'...")
+    try:
+        with stage("step6_stream") as timing:
+            pipeline, voice_tensor = _prepare_kokoro(language_for_tts, kokoro_voice_id, device)
+            timing.audio_seconds = 0.0
+            for segment in _iter_segments(pipeline, text_to_speak, voice_tensor, speed):
+                timing.audio_seconds += len(segment) / SAMPLE_RATE
+                yield SAMPLE_RATE, segment
+        if not timing.audio_seconds:
+            raise RuntimeError("TTS generation failed to produce any audio.")
+        progress(1, desc="Speech Streamed!")
+    except Exception as e:
+        print(traceback.format_exc())
+        raise gr.Error(f"An error occurred during speech synthesis: {e}")
+
+@functools.lru_cache(maxsize=1)
+def get_tts_cache():
+    """
+    Synthesized-audio cache shared by all requests: one entry per sentence in sentence-wise
+    mode and one per whole text otherwise, stored as float32 WAV so hits are bit-exact.
+    """
+    return DiskCache(AppConfig.TTS_CACHE_PATH, AppConfig.TTS_CACHE_MAX_MB * 1024 * 1024)
+
+@functools.lru_cache(maxsize=4)
+def _file_checksum(path, size, mtime_ns):
+    """sha256 of a model file; size and mtime are part of the cache key so edits are noticed."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _kokoro_model_checksum():
+    model_path = os.path.join(AppConfig.LOCAL_KOKORO_MODEL_PATH, 'kokoro-v1_0.pth')
+    stat = os.stat(model_path)
+    return _file_checksum(model_path, stat.st_size, stat.st_mtime_ns)
+
+# Part of every cache key; entries written in an older format are never hit and age out.
+_TTS_CACHE_FORMAT = "wav-float32"
+
+def _encode_audio(audio):
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format='WAV', subtype='FLOAT')
+    return buffer.getvalue()
+
+def _decode_audio(data):
+    audio, _ = sf.read(io.BytesIO(data), dtype='float32')
+    return audio
+
+def _synthesize_sentences(sentences, language_for_tts, voice_id, speed, device, on_batch=None):
+    """
+    Returns one audio array per sentence (None for empty ones).
+    Sentences found in the TTS cache are decoded from disk; the model, pipeline
+    and voice are only loaded when at least one sentence is missing.
+    """
+    cache = get_tts_cache() if AppConfig.TTS_CACHE_ENABLED else None
+    sentence_audio = [None] * len(sentences)
+    keys = [None] * len(sentences)
+    if cache is not None:
+        model_checksum = _kokoro_model_checksum()
+        for i, sentence in enumerate(sentences):
+            if sentence.strip():
+                keys[i] = DiskCache.make_key(" ".join(sentence.split()), voice_id, f"{float(speed):.3f}",
+                                             language_for_tts, model_checksum, _TTS_CACHE_FORMAT)
+        with stage("cache_lookup"):
+            cached = cache.get_many([key for key in keys if key is not None])
+        for i, key in enumerate(keys):
+            if key in cached:
+                sentence_audio[i] = _decode_audio(cached[key])
+
+    missing = [i for i, sentence in enumerate(sentences) if sentence.strip() and sentence_audio[i] is None]
+    if missing:
+        pipeline, voice_tensor = _prepare_kokoro(language_for_tts, voice_id, device)
+        with stage("inference", items=len(missing)):
+            synthesized = _synthesize_sentences_batched(
+                pipeline, [sentences[i] for i in missing], voice_tensor, speed, AppConfig.KOKORO_BATCH_SIZE, on_batch
+            )
+        for i, audio in zip(missing, synthesized):
+            sentence_audio[i] = audio
+        if cache is not None:
+            with stage("cache_write"):
+                cache.put_many([(keys[i], _encode_audio(audio)) for i, audio in zip(missing, synthesized)
+                                if audio is not None])
+    return sentence_audio
+
+def _synthesize_full_audio(text_to_speak, language_for_tts, voice_id, speed, device, sentence_wise, pause_duration_ms,
+                           on_batch=None):
+    """
+    Synthesizes the whole text as one float32 array at SAMPLE_RATE. With `sentence_wise`
+    the sentences are joined with `pause_duration_ms` of silence and also returned
+    individually (None where a sentence produced no audio); otherwise that list is None.
+    """
+    if sentence_wise:
+        sentences = re.split('(?<=[.!?]) +', text_to_speak.strip())
+        if not sentences:
+            raise gr.Error("Could not split text into sentences.")
+        pause_audio = np.zeros(int(SAMPLE_RATE * (pause_duration_ms / 1000.0)), dtype=np.float32)
+        sentence_audio = _synthesize_sentences(sentences, language_for_tts, voice_id, speed, device, on_batch)
+        all_audio_segments = []
+        for i, audio_segment in enumerate(sentence_audio):
+            if audio_segment is not None:
+                all_audio_segments.append(audio_segment)
+                if i < len(sentences) - 1:
+                    all_audio_segments.append(pause_audio)
+        if not all_audio_segments:
+            raise gr.Error("Sentence-wise TTS failed to produce any audio.")
+        return np.concatenate(all_audio_segments), sentence_audio
+
+    # The whole text goes through KPipeline in one call, so prosody across sentences is kept;
+    # it is cached as one entry under the exact text.
+    cache = get_tts_cache() if AppConfig.TTS_CACHE_ENABLED else None
+    if cache is not None:
+        key = DiskCache.make_key("whole-text", text_to_speak, voice_id, f"{float(speed):.3f}", language_for_tts,
+                                 _kokoro_model_checksum(), _TTS_CACHE_FORMAT)
+        with stage("cache_lookup"):
+            cached = cache.get(key)
+        if cached is not None:
+            return _decode_audio(cached), None
+
+    pipeline, voice_tensor = _prepare_kokoro(language_for_tts, voice_id, device)
+    with stage("inference"):
+        full_audio = _synthesize_text_chunk(pipeline, text_to_speak, voice_tensor, speed)
+    if full_audio is None:
+        raise gr.Error("TTS generation failed to produce any audio.")
+    if cache is not None:
+        with stage("cache_write"):
+            cache.put(key, _encode_audio(full_audio))
+    return full_audio, None
+
+
+def synthesize_speech_buffer(text_to_speak, language_for_tts, kokoro_voice_id, speed=1.0, use_gpu=False,
+                             sentence_wise=False, pause_duration_ms=0):
+    """Python API: synthesizes `text_to_speak` and returns an AudioBuffer without touching the disk."""
+    if not text_to_speak or not text_to_speak.strip():
+        raise ValueError("Text for speech synthesis cannot be empty.")
+    with stage("step6_synthesize") as timing:
+        full_audio, _ = _synthesize_full_audio(text_to_speak, language_for_tts, kokoro_voice_id, speed,
+                                               _select_device(use_gpu), sentence_wise, pause_duration_ms)
+        timing.audio_seconds = len(full_audio) / SAMPLE_RATE
+    return AudioBuffer(full_audio, SAMPLE_RATE)
+
+
 def step6_synthesize_speech_kokoro(text_to_speak, language_for_tts, kokoro_voice_id, speed, use_gpu, sentence_wise, pause_duration_ms, progress=gr.Progress()):
     """
     Synthesizes speech using the Kokoro TTS library, with sentence-wise processing and speed control.
+    Returns (sample_rate, samples) for gr.Audio(type="numpy"), so the audio is sent to the
+    client without an intermediate WAV file, and the sentence zip path (or None).
     """
     progress(0, desc="Starting TTS...")
     if not text_to_speak or not text_to_speak.strip():
@@ -68,91 +546,30 @@ def step6_synthesize_speech_kokoro(text_to_speak, language_for_tts, kokoro_voice
 
     voice_id = kokoro_voice_id
 
-    device = "cpu"
-    if use_gpu:
-        if CUDA_AVAILABLE:
-            device = "cuda"
-        elif MPS_AVAILABLE:
-            device = "mps"
-
-    progress(0.1, desc=f"Loading model on '{device}'...")
+    device = _select_device(use_gpu)
+    progress(0.1, desc=f"Preparing synthesis on '{device}'...")
 
     try:
-        loaded_model = load_local_kmodel(device)
-        
-        kokoro_lang_code = AppConfig.KOKORO_LANG_MAP.get(language_for_tts)
-        if not kokoro_lang_code:
-            supported_langs = list(AppConfig.KOKORO_LANG_MAP.keys())
-            raise gr.Error(
-                f"Language '{language_for_tts}' is not supported by Kokoro TTS. "
-                f"Please choose a voice for a supported language: {supported_langs}"
-            )
-        
-        print(f"Initializing Kokoro pipeline with lang_code: '{kokoro_lang_code}' (mapped from '{language_for_tts}')")
-        pipeline = KPipeline(
-            lang_code=kokoro_lang_code,
-            model=loaded_model,
-            repo_id=REPO_ID,
-        )
-        
-        voice_file_path = os.path.join(AppConfig.LOCAL_KOKORO_MODEL_PATH, "voices", f"{voice_id}.pt")
-        if not os.path.exists(voice_file_path):
-            raise FileNotFoundError(f"Voice file not found: {voice_file_path}.")
-
-        voice_tensor = torch.load(voice_file_path, map_location=device, weights_only=True)
-        pipeline.voices[voice_id] = voice_tensor
-
-        if sentence_wise:
-            sentences = re.split('(?<=[.!?]) +', text_to_speak.strip())
-            if not sentences:
-                raise gr.Error("Could not split text into sentences.")
-
-            all_audio_segments = []
-            sentence_files = []
-            temp_dir = tempfile.mkdtemp()
-            pause_audio = np.zeros(int(24000 * (pause_duration_ms / 1000.0)), dtype=np.float32)
-
-            for i, sentence in enumerate(sentences):
-                if not sentence.strip(): continue
-                progress(0.2 + (i / len(sentences)) * 0.7, desc=f"Synthesizing sentence {i+1}/{len(sentences)}...")
-                
-                audio_segment = _synthesize_text_chunk(pipeline, sentence, voice_id, speed)
-                
-                if audio_segment is not None:
-                    all_audio_segments.append(audio_segment)
-                    if i < len(sentences) - 1:
-                        all_audio_segments.append(pause_audio)
-                    
-                    sentence_filename = os.path.join(temp_dir, f"sentence_{i+1}.wav")
-                    sf.write(sentence_filename, audio_segment, samplerate=24000)
-                    sentence_files.append(sentence_filename)
-
-            if not all_audio_segments:
-                raise gr.Error("Sentence-wise TTS failed to produce any audio.")
-
-            full_audio = np.concatenate(all_audio_segments)
-            zip_path = os.path.join(temp_dir, "sentences.zip")
-            with zipfile.ZipFile(zip_path, 'w') as zf:
-                for f in sentence_files:
-                    zf.write(f, os.path.basename(f))
-            
-            download_path = zip_path
-
-        else:
-            progress(0.4, desc="Generating audio from text...")
-            
-            full_audio = _synthesize_text_chunk(pipeline, text_to_speak, voice_id, speed)
+        with stage("step6_synthesize") as timing:
+            on_batch = lambda done, total: progress(0.2 + (done / total) * 0.7, desc=f"Synthesized {done}/{total} sentence chunks...")
+            progress(0.2, desc="Generating audio from text...")
+            full_audio, sentence_audio = _synthesize_full_audio(text_to_speak, language_for_tts, voice_id, speed, device,
+                                                                sentence_wise, pause_duration_ms, on_batch)
+            timing.audio_seconds = len(full_audio) / SAMPLE_RATE
 
-            if full_audio is None:
-                raise gr.Error("TTS generation failed to produce any audio.")
             download_path = None
+            if sentence_audio is not None:
+                temp_dir = tempfile.mkdtemp()
+                download_path = os.path.join(temp_dir, "sentences.zip")
+                with stage("write_zip"), zipfile.ZipFile(download_path, 'w') as zf:
+                    for i, audio_segment in enumerate(sentence_audio):
+                        if audio_segment is not None:
+                            wav_bytes = io.BytesIO()
+                            sf.write(wav_bytes, audio_segment, samplerate=SAMPLE_RATE, format="WAV")
+                            zf.writestr(f"sentence_{i+1}.wav", wav_bytes.getvalue())
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            output_wav_path = temp_file.name
-        sf.write(output_wav_path, full_audio, samplerate=24000)
-        progress(1, desc="Speech Generated!")
-        
-        return output_wav_path, download_path
+            progress(1, desc="Speech Generated!")
+            return (SAMPLE_RATE, full_audio), download_path
 
     except Exception as e:
         print(traceback.format_exc())
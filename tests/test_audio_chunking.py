@@ -0,0 +1,100 @@
+"""Chunk boundaries must land in pauses and chunk lengths stay within the tolerance."""
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from audio_chunking import InMemoryChunker, SilenceAwareChunker, find_cut_point, split_wav_at_silence
+
+FRAME_RATE = 16000
+CHUNK_SECONDS = 10
+TOLERANCE = 3
+
+
+def bursts_with_pauses(seconds, seed=0):
+    """16-bit PCM of 2-5 s tone bursts separated by 0.3-1 s pauses; returns (samples, pauses in seconds)."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * FRAME_RATE)
+    audio = 0.002 * rng.standard_normal(total)
+    pauses, position = [], 0
+    while position < total:
+        end = min(position + int(rng.uniform(2, 5) * FRAME_RATE), total)
+        t = np.arange(end - position) / FRAME_RATE
+        audio[position:end] += 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t)
+        pause = int(rng.uniform(0.3, 1.0) * FRAME_RATE)
+        pauses.append((end / FRAME_RATE, (end + pause) / FRAME_RATE))
+        position = end + pause
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16), np.array(pauses)
+
+
+def assert_clean_cuts(starts, total_seconds, pauses):
+    cuts = np.array(starts[1:])
+    assert all(np.any((pauses[:, 0] <= cut) & (cut <= pauses[:, 1])) for cut in cuts), "cut outside a pause"
+    lengths = np.diff(np.concatenate(([0.0], cuts, [total_seconds])))
+    assert np.all(np.abs(lengths[:-1] - CHUNK_SECONDS) <= TOLERANCE), "chunk length outside the tolerance"
+    assert lengths[-1] <= CHUNK_SECONDS + TOLERANCE
+
+
+def test_find_cut_point_picks_the_quiet_frame():
+    frames = np.full((4 * FRAME_RATE, 1), 10000, dtype=np.int16)
+    frames[int(2.6 * FRAME_RATE):int(2.7 * FRAME_RATE)] = 0
+    cut = find_cut_point(frames, FRAME_RATE, 2 * FRAME_RATE, FRAME_RATE)
+    assert 2.6 * FRAME_RATE <= cut <= 2.7 * FRAME_RATE
+
+
+def test_find_cut_point_prefers_the_target_on_ties():
+    frames = np.zeros((4 * FRAME_RATE, 1), dtype=np.int16)
+    cut = find_cut_point(frames, FRAME_RATE, 2 * FRAME_RATE, FRAME_RATE)
+    assert abs(cut - 2 * FRAME_RATE) <= FRAME_RATE * 20 // 1000
+
+
+def test_find_cut_point_near_the_end():
+    frames = np.zeros((100, 1), dtype=np.int16)
+    assert find_cut_point(frames, FRAME_RATE, 200, 50) == 100
+
+
+def test_chunker_cuts_in_pauses(tmp_path):
+    samples, pauses = bursts_with_pauses(95)
+    chunker = SilenceAwareChunker(str(tmp_path), FRAME_RATE, 1, 2, CHUNK_SECONDS, TOLERANCE)
+    for i in range(0, len(samples), 7 * FRAME_RATE):
+        chunker.feed(samples[i:i + 7 * FRAME_RATE])
+    chunks = chunker.finish()
+    assert_clean_cuts([start for _, start in chunks], len(samples) / FRAME_RATE, pauses)
+    written = []
+    for path, start in chunks:
+        with wave.open(path, "rb") as f:
+            assert f.getframerate() == FRAME_RATE
+            written.append(np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16))
+    assert np.array_equal(np.concatenate(written), samples)
+
+
+def test_in_memory_chunker_matches_files(tmp_path):
+    samples, _ = bursts_with_pauses(45, seed=1)
+    on_disk = SilenceAwareChunker(str(tmp_path), FRAME_RATE, 1, 2, CHUNK_SECONDS, TOLERANCE)
+    in_memory = InMemoryChunker(FRAME_RATE, CHUNK_SECONDS, TOLERANCE)
+    for chunker in (on_disk, in_memory):
+        chunker.feed(samples)
+    assert [start for _, start in on_disk.finish()] == [start for _, start in in_memory.finish()]
+
+
+def test_split_wav_at_silence(tmp_path):
+    samples, pauses = bursts_with_pauses(95, seed=2)
+    source = str(tmp_path / "source.wav")
+    with wave.open(source, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(FRAME_RATE)
+        f.writeframes(samples.tobytes())
+    out_dir = tmp_path / "chunks"
+    out_dir.mkdir()
+    chunks = split_wav_at_silence(source, str(out_dir), CHUNK_SECONDS, TOLERANCE, block_seconds=4)
+    assert len(chunks) == len(os.listdir(out_dir)) > 1
+    assert_clean_cuts([start for _, start in chunks], len(samples) / FRAME_RATE, pauses)
+
+
+@pytest.mark.parametrize("content", [b"", b"not a wav file"])
+def test_split_wav_at_silence_rejects_other_files(tmp_path, content):
+    path = tmp_path / "input.mp3"
+    path.write_bytes(content)
+    assert split_wav_at_silence(str(path), str(tmp_path), CHUNK_SECONDS, TOLERANCE) is None
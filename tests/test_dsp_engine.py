@@ -0,0 +1,165 @@
+"""The NumPy enhancement engine against closed-form filter responses and, when installed, ffmpeg."""
+import math
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import dsp_engine
+from config import AppConfig
+from dsp_engine import apply_chain, biquad, parse_filter_chain
+
+RATE = 16000
+
+
+def response(section, frequency):
+    """|H| of a [b0, b1, b2, 1, a1, a2] section at `frequency` Hz."""
+    z = np.exp(-1j * 2 * math.pi * frequency / RATE * np.arange(3))
+    return abs(np.dot(section[:3], z) / np.dot(section[3:], z))
+
+
+def db(gain):
+    return 10 ** (gain / 20)
+
+
+def test_parse_positional_named_and_aliased_options():
+    (name, options), = parse_filter_chain("acompressor=0.5:threshold=0.1:ratio=9")
+    assert name == "acompressor"
+    assert (options["level_in"], options["threshold"], options["ratio"]) == (0.5, 0.1, 9.0)
+    assert options["attack"] == dsp_engine.FILTER_OPTIONS["acompressor"]["attack"]
+    assert parse_filter_chain("highpass=f=100, bass=g=3")[1] == (
+        "bass", {"frequency": 100.0, "width_type": "q", "width": 0.5, "gain": 3.0})
+    assert parse_filter_chain("aecho=0.8:0.9:40|60:0.1|0.05")[0][1]["delays"] == "40|60"
+
+
+@pytest.mark.parametrize("chain", ["afftdn", "highpass=f=100:t=h", "acompressor=detection=peak",
+                                   "lowpass=poles=1"])
+def test_parse_rejects_what_is_not_implemented(chain):
+    with pytest.raises(ValueError):
+        parse_filter_chain(chain)
+    assert not dsp_engine.supports(chain)
+
+
+def test_pass_filters():
+    highpass = biquad("highpass", {"frequency": 100.0, "width": 0.707}, RATE)
+    lowpass = biquad("lowpass", {"frequency": 4000.0, "width": 0.707}, RATE)
+    assert response(highpass, 0) == pytest.approx(0, abs=1e-9)
+    assert response(highpass, RATE / 2) == pytest.approx(1)
+    assert response(lowpass, 0) == pytest.approx(1)
+    assert response(lowpass, RATE / 2) == pytest.approx(0, abs=1e-9)
+    # At the corner frequency a second-order pass filter's gain equals its Q.
+    assert response(highpass, 100) == pytest.approx(0.707)
+    assert response(lowpass, 4000) == pytest.approx(0.707)
+
+
+@pytest.mark.parametrize("gain", [3.0, -2.0])
+def test_shelf_filters(gain):
+    bass = biquad("bass", {"frequency": 100.0, "width": 0.5, "gain": gain}, RATE)
+    treble = biquad("treble", {"frequency": 3000.0, "width": 0.5, "gain": gain}, RATE)
+    assert response(bass, 0) == pytest.approx(db(gain))
+    assert response(bass, RATE / 2) == pytest.approx(1)
+    assert response(treble, 0) == pytest.approx(1)
+    assert response(treble, RATE / 2) == pytest.approx(db(gain))
+    # Shelves pass half the gain (in dB) at their corner frequency.
+    assert response(bass, 100) == pytest.approx(db(gain / 2))
+    assert response(treble, 3000) == pytest.approx(db(gain / 2))
+
+
+def test_biquads_in_a_chain_are_applied_in_order():
+    from scipy.signal import sosfilt
+    x = np.random.default_rng(0).standard_normal(RATE)
+    steps = parse_filter_chain("highpass=f=100,lowpass=f=4000,bass=g=3")
+    expected = x
+    for name, options in steps:
+        expected = sosfilt(biquad(name, options, RATE)[None, :], expected)
+    assert np.allclose(apply_chain(x, RATE, steps), expected)
+
+
+@pytest.mark.parametrize("level, makeup", [(0.8, 1.0), (0.5, 2.0)])
+def test_compressor_gain_above_threshold(level, makeup):
+    # A constant level settles to threshold * (level / threshold) ** (1 / ratio) without a knee.
+    steps = parse_filter_chain(f"acompressor=threshold=0.1:ratio=4:knee=1:makeup={makeup}")
+    out = apply_chain(np.full(RATE, level), RATE, steps)
+    assert out[-1] == pytest.approx(makeup * 0.1 * (level / 0.1) ** 0.25, rel=1e-6)
+
+
+def test_compressor_leaves_quiet_signals_alone():
+    steps = parse_filter_chain("acompressor=threshold=0.1:ratio=4")
+    x = np.full(RATE, 0.02)
+    assert np.allclose(apply_chain(x, RATE, steps), x)
+
+
+def test_compressor_soft_knee_only_changes_levels_inside_the_knee():
+    # knee=4 spans threshold / 2 to threshold * 2; outside it the hard-knee curve applies.
+    steps = parse_filter_chain("acompressor=threshold=0.1:ratio=4:knee=4")
+    assert apply_chain(np.full(RATE, 0.04), RATE, steps)[-1] == pytest.approx(0.04)
+    assert apply_chain(np.full(RATE, 0.4), RATE, steps)[-1] == pytest.approx(0.1 * 4 ** 0.25, rel=1e-6)
+    inside = apply_chain(np.full(RATE, 0.1), RATE, steps)[-1]
+    assert 0.1 * 0.5 ** 0.75 < inside < 0.1
+
+
+def test_echo_impulse_response():
+    x = np.zeros(RATE // 10)
+    x[0] = 1.0
+    out = apply_chain(x, RATE, parse_filter_chain("aecho=0.8:0.9:40|60:0.1|0.05"))
+    assert len(out) == len(x) + 60 * RATE // 1000
+    expected = np.zeros(len(out))
+    expected[0] = 0.8 * 0.9
+    expected[40 * RATE // 1000] = 0.1 * 0.9
+    expected[60 * RATE // 1000] = 0.05 * 0.9
+    assert np.allclose(out, expected)
+
+
+def test_stereo_shape_is_kept():
+    x = np.random.default_rng(1).standard_normal((RATE, 2)) * 0.1
+    out = apply_chain(x, RATE, parse_filter_chain("highpass=f=100,acompressor"))
+    assert out.shape == x.shape
+
+
+# --- Parity with ffmpeg ---
+
+FFMPEG = shutil.which(AppConfig.FFMPEG_PATH) or shutil.which("ffmpeg")
+# The UI defaults: high-pass 100 Hz, low-pass 4 kHz, compressor, bass +3 dB, treble -2 dB, reverb 0.1.
+DEFAULT_CHAIN = ("highpass=f=100,lowpass=f=4000,acompressor=threshold=0.1:ratio=9:attack=200:release=1000,"
+                 "bass=g=3,treble=g=-2,aecho=0.8:0.9:40|60:0.1|0.05")
+# chain: minimum signal-to-difference ratio in dB. 16-bit rounding inside ffmpeg's biquads
+# and the block-wise compressor envelope are the expected differences.
+PARITY_CASES = {
+    "highpass=f=100": 50,
+    "lowpass=f=4000": 50,
+    "bass=g=3": 50,
+    "treble=g=-2": 50,
+    "aecho=0.8:0.9:40|60:0.1|0.05": 50,
+    "acompressor=threshold=0.1:ratio=9:attack=200:release=1000": 30,
+    DEFAULT_CHAIN: 30,
+}
+
+
+@pytest.fixture(scope="module")
+def speech_clip(tmp_path_factory):
+    import soundfile as sf
+    rng = np.random.default_rng(1)
+    t = np.arange(10 * RATE) / RATE
+    gate = (np.sin(2 * np.pi * 0.4 * t) > -0.3).astype(float)
+    audio = gate * (0.3 * np.sin(2 * np.pi * 180 * t) + 0.1 * np.sin(2 * np.pi * 2500 * t)
+                    + 0.05 * rng.standard_normal(len(t))) + 0.002 * rng.standard_normal(len(t))
+    path = str(tmp_path_factory.mktemp("dsp") / "clip.wav")
+    sf.write(path, audio, RATE, subtype="PCM_16")
+    return path
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not found")
+@pytest.mark.parametrize("chain, limit", PARITY_CASES.items(), ids=lambda value: str(value)[:40])
+def test_matches_ffmpeg(speech_clip, tmp_path, chain, limit):
+    import soundfile as sf
+    ffmpeg_path, numpy_path = str(tmp_path / "ffmpeg.wav"), str(tmp_path / "numpy.wav")
+    subprocess.run([FFMPEG, "-i", speech_clip, "-af", chain, "-y", ffmpeg_path], check=True, capture_output=True)
+    dsp_engine.process_file(speech_clip, numpy_path, chain)
+    expected, _ = sf.read(ffmpeg_path, dtype="float64")
+    actual, _ = sf.read(numpy_path, dtype="float64")
+    assert len(expected) == len(actual)
+    difference = expected - actual
+    sdr = 10 * np.log10(np.sum(expected ** 2) / max(np.sum(difference ** 2), 1e-20))
+    assert sdr >= limit
@@ -0,0 +1,63 @@
+"""The NumPy silence detector must return exactly what pydub.silence.detect_nonsilent does."""
+import warnings
+
+import numpy as np
+import pytest
+
+from silence_detection import StreamingSilenceRemover, detect_nonsilent, keep_ranges
+
+
+def synthetic_speech(seconds, frame_rate=16000, channels=1, seed=0):
+    """Bursts of noisy tones separated by quiet gaps of random length, as 16-bit PCM."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * frame_rate)
+    t = np.arange(n) / frame_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * rng.standard_normal(n)
+    gate = np.zeros(n)
+    position = 0
+    while position < n:
+        voiced = int(rng.uniform(0.3, 3.0) * frame_rate)
+        gate[position:position + voiced] = 1
+        position += voiced + int(rng.uniform(0.1, 1.5) * frame_rate)
+    audio = signal * gate + 0.001 * rng.standard_normal(n)
+    pcm = np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+    return np.repeat(pcm, channels)
+
+
+CASES = [(16000, 1, 500, -50), (16000, 1, 300, -35), (44100, 2, 700, -40), (22050, 1, 1000, -60)]
+
+
+@pytest.mark.parametrize("frame_rate, channels, min_silence_len, silence_thresh", CASES)
+def test_matches_pydub(frame_rate, channels, min_silence_len, silence_thresh):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # pydub warns when ffmpeg is missing
+        pydub = pytest.importorskip("pydub")
+        from pydub.silence import detect_nonsilent as pydub_detect_nonsilent
+    samples = synthetic_speech(20, frame_rate, channels)
+    segment = pydub.AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=frame_rate, channels=channels)
+    expected = pydub_detect_nonsilent(segment, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+    expected_audio = pydub.AudioSegment.empty()
+    for start, end in expected:
+        expected_audio += segment[start:end]
+
+    ranges = detect_nonsilent(samples, frame_rate, channels, 2, min_silence_len, silence_thresh)
+    assert ranges == expected
+    assert keep_ranges(samples, frame_rate, channels, ranges).tobytes() == expected_audio.raw_data
+
+
+def test_shorter_than_min_silence_is_kept_whole():
+    samples = np.zeros(16000 // 10, dtype=np.int16)
+    assert detect_nonsilent(samples, 16000, 1, 2, 500, -50) == [[0, 100]]
+
+
+@pytest.mark.parametrize("frame_rate, channels, min_silence_len, silence_thresh", CASES)
+def test_streaming_matches_in_memory(frame_rate, channels, min_silence_len, silence_thresh):
+    samples = synthetic_speech(20, frame_rate, channels, seed=1)
+    ranges = detect_nonsilent(samples, frame_rate, channels, 2, min_silence_len, silence_thresh)
+    expected = keep_ranges(samples, frame_rate, channels, ranges)
+
+    remover = StreamingSilenceRemover(frame_rate, channels, 2, min_silence_len, silence_thresh)
+    block = int(0.37 * frame_rate) * channels  # not a whole number of milliseconds
+    parts = [remover.feed(samples[i:i + block]) for i in range(0, len(samples), block)]
+    parts.append(remover.finish())
+    assert np.array_equal(np.concatenate(parts), expected)
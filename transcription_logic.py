@@ -1,18 +1,60 @@
 import gradio as gr
-import whisper
-import functools
+import contextlib
+import multiprocessing
 import os
 import tempfile
-import shutil
+import threading
+import time
+import itertools
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import vad
+from audio_buffer import AudioBuffer
 # --- IMPORT AppConfig ---
-from config import CUDA_AVAILABLE, AppConfig
+from config import AppConfig, cuda_available
+from instrumentation import stage
+from model_manager import models, quantize_dynamic_int8
 
-@functools.lru_cache(maxsize=2)
-def load_model(model_name, device):
+# whisper.audio.SAMPLE_RATE, repeated here so that reading audio does not import whisper.
+WHISPER_SAMPLE_RATE = 16000
+
+# Parameter counts, used to free memory for a model before it is loaded.
+_WHISPER_PARAMS = {"tiny": 39e6, "base": 74e6, "small": 244e6, "medium": 769e6, "large-v3": 1550e6}
+
+_model_locks = weakref.WeakKeyDictionary()
+_model_locks_guard = threading.Lock()
+
+
+def model_lock(model):
+    """
+    The lock to hold while running a shared Whisper model. transcribe() and decode() install
+    kv-cache hooks on the model for each call, so the UI, the job queue, the CLI and the
+    warm-up must not run the same model at once. Taken per chunk, so requests interleave.
+    """
+    with _model_locks_guard:
+        return _model_locks.setdefault(model, threading.Lock())
+
+
+def load_model(model_name, device, quantize=False):
+    """
+    Returns the Whisper model from the shared model manager, loading it on first use.
+    With `quantize` on CPU the int8 variant is returned; it is cached under its own key.
+    """
+    if quantize and device == "cpu":
+        return models.get(("whisper", model_name, device, "int8"),
+                          lambda: quantize_dynamic_int8(_load_model(model_name, device)),
+                          size_hint=int(_WHISPER_PARAMS.get(model_name, 0) * 4))
+    return models.get(("whisper", model_name, device), lambda: _load_model(model_name, device),
+                      size_hint=int(_WHISPER_PARAMS.get(model_name, 0) * 4))
+
+
+def _load_model(model_name, device):
     """
     Loads a Whisper model. If the models are present locally, it will use them.
     The `download_root` parameter points to our local models directory.
     """
+    import whisper
     print(f"Loading Whisper model '{model_name}' on device '{device}'...")
     # --- MODIFY THIS LINE ---
     # This tells whisper to look for models in the specified local directory.
@@ -25,32 +67,297 @@ def load_model(model_name, device):
     )
 
 
-def step4_run_transcription(audio_files, model_size, language, use_gpu, progress=gr.Progress()):
+# --- Worker pool for parallel CPU transcription ---
+# Each worker process holds its own Whisper model, loaded once by the initializer.
+_worker_model = None
+# (model, workers, quantize) -> [pool, requests using it]; the most recently requested key stays warm.
+_pools = {}
+_pools_lock = threading.Lock()
+_current_pool_key = None
+
+
+def _init_worker(model_name, num_threads, quantize):
+    global _worker_model
+    import torch
+    torch.set_num_threads(num_threads)
+    _worker_model = load_model(model_name, "cpu", quantize)
+
+
+def _load_for_whisper(audio):
+    """
+    Float32 16 kHz samples for Whisper. AudioBuffers and 16 kHz mono PCM WAV chunks
+    are used directly; anything else goes through whisper's own ffmpeg decode.
+    """
+    if isinstance(audio, AudioBuffer):
+        return audio.resample(WHISPER_SAMPLE_RATE).samples
+    buffer = AudioBuffer.read_wav(audio)
+    if buffer is not None and buffer.sample_rate == WHISPER_SAMPLE_RATE:
+        return buffer.samples
+    import whisper
+    return whisper.load_audio(audio)
+
+
+def _transcribe_audio(model, index, audio_path, language, use_fp16):
+    audio = _load_for_whisper(audio_path)
+    with model_lock(model):
+        result = model.transcribe(audio, fp16=use_fp16, language=language, temperature=0.0)
+    return index, result, len(audio) / WHISPER_SAMPLE_RATE
+
+
+def _transcribe_in_worker(index, audio_path, language):
+    return _transcribe_audio(_worker_model, index, audio_path, language, False)
+
+
+@contextlib.contextmanager
+def _worker_pool(model_name, workers, quantize):
+    """
+    A warm process pool for `model_name`, shared by concurrent requests for the same model.
+    `workers` is the configured TRANSCRIPTION_WORKERS, not the request's chunk count, so
+    requests of any length reuse the same pool. A pool for another model is shut down once
+    its last request has finished, never while one is still using it.
+    """
+    global _current_pool_key
+    key = (model_name, workers, quantize)
+    stale = []
+    with _pools_lock:
+        _current_pool_key = key
+        if key not in _pools:
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            _pools[key] = [ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, num_threads, quantize),
+            ), 0]
+        entry = _pools[key]
+        entry[1] += 1
+        for other in [k for k, (_, users) in _pools.items() if k != key and users == 0]:
+            stale.append(_pools.pop(other)[0])
+    for pool in stale:
+        pool.shutdown(wait=False)
+    try:
+        yield entry[0]
+    finally:
+        with _pools_lock:
+            entry[1] -= 1
+            if entry[1] == 0 and key != _current_pool_key:
+                stale = [_pools.pop(key)[0]]
+            else:
+                stale = []
+        for pool in stale:
+            pool.shutdown(wait=False)
+
+
+def _run_serial(model, audio_files, language, use_fp16, progress):
+    for i, audio_path in enumerate(audio_files):
+        progress(i / len(audio_files), desc=f"Transcribing chunk {i + 1}/{len(audio_files)}...")
+        yield _transcribe_audio(model, i, audio_path, language, use_fp16)
+
+
+def _run_parallel(model_name, audio_files, language, workers, quantize, progress):
+    # At most one chunk per worker in flight, so concurrent requests share the pool
+    # instead of queueing behind all of this request's chunks.
+    with _worker_pool(model_name, workers, quantize) as pool:
+        queued = iter(enumerate(audio_files))
+        running, done = set(), 0
+        while True:
+            for i, path in itertools.islice(queued, workers - len(running)):
+                running.add(pool.submit(_transcribe_in_worker, i, path, language))
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done += 1
+                progress(done / len(audio_files),
+                         desc=f"Transcribed {done}/{len(audio_files)} chunks on {workers} workers...")
+                yield future.result()
+
+
+def _log_mel_batch(model, windows):
+    """
+    Log-mel spectrograms of up to 30 s windows, computed in one pass. Each window is
+    padded to 30 s and normalised on its own, as whisper.log_mel_spectrogram does.
+    """
+    import torch
+    import whisper
+    from whisper.audio import HOP_LENGTH, N_FFT, N_SAMPLES, mel_filters
+    audio = torch.from_numpy(np.stack([whisper.pad_or_trim(w, N_SAMPLES) for w in windows])).to(model.device)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=torch.hann_window(N_FFT, device=model.device),
+                      return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    log_spec = torch.clamp(mel_filters(model.device, model.dims.n_mels) @ magnitudes, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(1, 2), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+def _segments_from_tokens(tokens, tokenizer, window_seconds):
+    """(start, end, text) for each timestamped segment of a decoded window, in seconds within the window."""
+    segments, text_tokens, start = [], [], 0.0
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            # Timestamp tokens count 20 ms steps from the start of the window.
+            time_s = (token - tokenizer.timestamp_begin) * 0.02
+            if text_tokens:
+                segments.append((start, time_s, tokenizer.decode(text_tokens)))
+                text_tokens = []
+            start = time_s
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        segments.append((start, window_seconds, tokenizer.decode(text_tokens)))
+    return segments
+
+
+def _run_batched(model, audio_files, language, use_fp16, progress):
+    """
+    VAD mode: finds the speech in each chunk, packs it into windows of up to 30 s and
+    decodes WHISPER_BATCH_SIZE windows at once. Yields (index, result, duration) like
+    _run_serial, with segment times relative to the start of the chunk.
+    """
+    import whisper
+    tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                                language=language, task="transcribe")
+    options = whisper.DecodingOptions(task="transcribe", language=language, temperature=0.0, fp16=use_fp16)
+    batch_size = max(1, AppConfig.WHISPER_BATCH_SIZE)
+    pending = []  # (chunk index, window, window audio) waiting to be decoded
+    chunks = {}   # chunk index -> [segments, windows not decoded yet, duration]
+
+    def decode(batch):
+        with model_lock(model):
+            with stage("decode", items=len(batch)):
+                results = whisper.decode(model, _log_mel_batch(model, [audio for _, _, audio in batch]), options)
+            for (index, window, audio), result in zip(batch, results):
+                # The thresholds whisper.transcribe uses by default.
+                if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                    segments = []
+                elif result.compression_ratio > 2.4 or result.avg_logprob < -1.0:
+                    # Repetitive or unlikely output: let transcribe() retry this window at higher temperatures.
+                    retried = model.transcribe(audio, fp16=use_fp16, language=language)
+                    segments = [(s["start"], s["end"], s["text"]) for s in retried["segments"]]
+                else:
+                    segments = _segments_from_tokens(result.tokens, tokenizer, len(audio) / WHISPER_SAMPLE_RATE)
+                chunks[index][0] += [{"start": vad.to_source_time(window, start, WHISPER_SAMPLE_RATE),
+                                      "end": vad.to_source_time(window, end, WHISPER_SAMPLE_RATE, is_end=True),
+                                      "text": text} for start, end, text in segments]
+                chunks[index][1] -= 1
+
+    def finished():
+        for index in [i for i, (_, remaining, _) in chunks.items() if remaining == 0]:
+            segments, _, duration = chunks.pop(index)
+            yield index, {"text": "".join(s["text"] for s in segments), "segments": segments}, duration
+
+    for i, audio_path in enumerate(audio_files):
+        progress(i / len(audio_files), desc=f"Transcribing chunk {i + 1}/{len(audio_files)} (speech only, batched)...")
+        audio = _load_for_whisper(audio_path)
+        with stage("vad"):
+            windows = vad.pack_windows(vad.speech_regions(audio, WHISPER_SAMPLE_RATE), WHISPER_SAMPLE_RATE,
+                                       samples=audio)
+        chunks[i] = [[], len(windows), len(audio) / WHISPER_SAMPLE_RATE]
+        pending += [(i, window, vad.window_audio(audio, window)) for window in windows]
+        while len(pending) >= batch_size:
+            decode(pending[:batch_size])
+            pending = pending[batch_size:]
+        yield from finished()
+    if pending:
+        decode(pending)
+    yield from finished()
+
+
+def _with_starts(audio_files):
+    """
+    Splits step 4's input into the audio items and the second at which each starts.
+    Chunks from step 3 and step1_prepare_audio come as (chunk, start_seconds) pairs;
+    any other path or AudioBuffer is a recording of its own and starts at 0.
+    """
+    items, starts = [], []
+    for item in audio_files:
+        if isinstance(item, (tuple, list)):
+            item, start = item
+        else:
+            start = 0.0
+        items.append(item)
+        starts.append(float(start))
+    return items, starts
+
+
+def step4_run_transcription(audio_files, model_size, language, use_gpu, quantize=False, vad_batching=False,
+                            progress=gr.Progress()):
+    """
+    Transcribes a list of audio chunks, given as file paths or AudioBuffers (or a single AudioBuffer),
+    each optionally paired with its start time in the recording (see _with_starts); segment times
+    are reported from that start. `quantize` runs the int8 model when transcribing on CPU;
+    `vad_batching` decodes only the speech found by vad.py, in batches of windows (see _run_batched).
+    Yields (full text, segmented text, transcript path) each time the next chunk in order is
+    done; the segments are appended to the transcript file as they arrive, and at the end the
+    file is replaced by the usual layout (full text, then segments), so the last value
+    yielded is the complete transcript.
+    """
+    if isinstance(audio_files, AudioBuffer): audio_files = [audio_files]
     if not audio_files: raise gr.Error("No audio files available to transcribe.")
-    device = "cuda" if use_gpu and CUDA_AVAILABLE else "cpu"
-    progress(0, desc=f"Loading Whisper model on {device}...")
+    audio_files, starts = _with_starts(audio_files)
+    device = "cuda" if use_gpu and cuda_available() else "cpu"
+    workers = AppConfig.TRANSCRIPTION_WORKERS if device == "cpu" else 1
+    quantize = quantize and device == "cpu"
+    progress(0, desc=f"Loading Whisper model on {device}{' (int8)' if quantize else ''}...")
     try:
-        model = load_model(model_size, device)
-        use_fp16 = (device == "cuda")
-        all_text, all_segments_text = [], []
-        for i, audio_path in enumerate(audio_files):
-            progress(i / len(audio_files), desc=f"Transcribing chunk {i + 1}/{len(audio_files)}...")
-            result = model.transcribe(audio_path, fp16=use_fp16, language=language, temperature=0.0)
-            all_text.append(result["text"].strip())
-            if len(audio_files) > 1: all_segments_text.append(f"--- CHUNK {i + 1}/{len(audio_files)} ---\n")
-            for segment in result["segments"]: all_segments_text.append(
-                f"[{segment['start']:.2f} - {segment['end']:.2f}]: {segment['text'].strip()}\n")
-            all_segments_text.append("\n")
-        progress(1, desc="Transcription Complete!")
-        final_full_text = " ".join(all_text)
-        final_segments_text = "".join(all_segments_text)
-        os.makedirs("transcripts", exist_ok=True)
-        txt_path = os.path.join("transcripts", f"transcript_{os.path.basename(tempfile.mkstemp()[1])}.txt")
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(
-                f"=== Full Transcription ===\n\n{final_full_text}\n\n=== Segmented Transcription ===\n\n{final_segments_text}")
-        chunk_dir = os.path.dirname(audio_files[0])
-        if "chunk" in chunk_dir and os.path.exists(chunk_dir): shutil.rmtree(chunk_dir, ignore_errors=True)
-        return final_full_text, final_segments_text, txt_path
+        with stage("step4_transcribe", items=len(audio_files)) as timing:
+            started = time.perf_counter()
+            if workers > 1 and len(audio_files) > 1 and not vad_batching:
+                runs = _run_parallel(model_size, audio_files, language, workers, quantize, progress)
+            else:
+                workers = 1
+                with stage("model_load"):
+                    model = load_model(model_size, device, quantize)
+                run = _run_batched if vad_batching else _run_serial
+                runs = run(model, audio_files, language, device == "cuda", progress)
+
+            os.makedirs("transcripts", exist_ok=True)
+            txt_path = os.path.join("transcripts", f"transcript_{os.path.basename(tempfile.mkstemp()[1])}.txt")
+            # Parallel workers finish out of order; chunks are only shown once all earlier ones are done.
+            finished, next_chunk = {}, 0
+            all_text, all_segments_text = [], []
+            audio_seconds = 0.0
+            with open(txt_path, "w", encoding="utf-8") as f:
+                f.write("=== Segmented Transcription ===\n\n")
+                while True:
+                    with stage("inference"):
+                        item = next(runs, None)
+                    if item is None:
+                        break
+                    i, result, duration = item
+                    finished[i] = (result, duration)
+                    if next_chunk not in finished:
+                        continue
+                    while next_chunk in finished:
+                        result, duration = finished.pop(next_chunk)
+                        all_text.append(result["text"].strip())
+                        chunk_segments = []
+                        offset = starts[next_chunk]
+                        if len(audio_files) > 1: chunk_segments.append(f"--- CHUNK {next_chunk + 1}/{len(audio_files)} ---\n")
+                        for segment in result["segments"]: chunk_segments.append(
+                            f"[{offset + segment['start']:.2f} - {offset + segment['end']:.2f}]: {segment['text'].strip()}\n")
+                        chunk_segments.append("\n")
+                        all_segments_text += chunk_segments
+                        audio_seconds += duration
+                        next_chunk += 1
+                        with stage("write_transcript"):
+                            f.write("".join(chunk_segments))
+                            f.flush()
+                    yield " ".join(all_text), "".join(all_segments_text), txt_path
+
+            final_full_text = " ".join(all_text)
+            final_segments_text = "".join(all_segments_text)
+            with stage("write_transcript"):
+                # Same layout as a transcript written in one go; replaced atomically so readers
+                # of the growing file never see it half-written.
+                with open(txt_path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(f"=== Full Transcription ===\n\n{final_full_text}\n\n"
+                            f"=== Segmented Transcription ===\n\n{final_segments_text}")
+                os.replace(txt_path + ".tmp", txt_path)
+            timing.audio_seconds = audio_seconds
+            throughput = audio_seconds / max(time.perf_counter() - started, 1e-9)
+            print(f"Transcribed {audio_seconds:.1f}s of audio at {throughput:.2f} audio-seconds per wall-second ({workers} worker(s)).")
+            progress(1, desc=f"Transcription Complete! ({throughput:.1f}x real time)")
+            yield final_full_text, final_segments_text, txt_path
     except Exception as e:
-        raise gr.Error(f"Transcription failed: {e}")
\ No newline at end of file
+        raise gr.Error(f"Transcription failed: {e}")
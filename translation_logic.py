@@ -3,11 +3,30 @@ import gradio as gr
 import functools
 import os
 import re
-from transformers import pipeline
-from config import AppConfig, CUDA_AVAILABLE
+from config import AppConfig, cuda_available, mps_available
+from disk_cache import DiskCache
+from instrumentation import stage
+from model_manager import models, quantize_dynamic_int8
 
-@functools.lru_cache(maxsize=1)
-def load_translator(device):
+def load_translator(device, quantize=False):
+    """
+    Returns the translation pipeline from the shared model manager, loading it on first use.
+    With `quantize` on CPU the pipeline's model is int8; it is cached under its own key.
+    """
+    # MarianMT models have ~75M parameters.
+    if quantize and device == "cpu":
+        return models.get(("translation", device, "int8"), lambda: _load_quantized_translator(device),
+                          size_hint=int(75e6 * 4))
+    return models.get(("translation", device), lambda: _load_translator(device), size_hint=int(75e6 * 4))
+
+
+def _load_quantized_translator(device):
+    translator = _load_translator(device)
+    translator.model = quantize_dynamic_int8(translator.model)
+    return translator
+
+
+def _load_translator(device):
     """
     Loads the translation pipeline from the local, pre-downloaded model files.
     This ensures the function works completely offline.
@@ -31,6 +50,8 @@ def load_translator(device):
         # It's better than CPU but may not be as optimized as direct PyTorch.
         hf_device = "mps"
 
+    from transformers import pipeline
+
     # --- MODIFIED: Load from the local path ---
     return pipeline("translation_de_to_en", model=local_model_path, device=hf_device)
 
@@ -46,33 +67,108 @@ def _split_text(text, sentences_per_chunk=1):
     return chunks
 
 
-def step5_translate_text(original_text, use_gpu, progress=gr.Progress()):
-    """Translate text in smaller chunks and stream the result."""
+def _length_bucketed_batches(chunks, tokenizer, batch_size, window):
+    """
+    Groups chunk indices into batches of similar token length.
+    Chunks are taken in their original order, `batch_size * window` at a time, and
+    sorted by length only inside that window, so early sentences still finish early.
+    """
+    lengths = [len(ids) for ids in tokenizer(chunks)["input_ids"]]
+    span = batch_size * window
+    for start in range(0, len(chunks), span):
+        indices = sorted(range(start, min(start + span, len(chunks))), key=lambda i: lengths[i])
+        for b in range(0, len(indices), batch_size):
+            yield indices[b:b + batch_size]
+
+
+@functools.lru_cache(maxsize=1)
+def get_translation_cache():
+    """Translation memory shared by all requests, keyed by model path and normalised sentence."""
+    return DiskCache(AppConfig.TRANSLATION_CACHE_PATH, AppConfig.TRANSLATION_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _translation_key(sentence, quantize=False):
+    normalised = " ".join(sentence.split())
+    model = os.path.abspath(AppConfig.LOCAL_TRANSLATION_MODEL_PATH)
+    # The int8 model can word a sentence differently, so its translations are cached separately.
+    return DiskCache.make_key(model + "#int8" if quantize else model, normalised)
+
+
+def _ready_prefix(translated_chunks, start):
+    """Index of the first untranslated chunk at or after `start`."""
+    while start < len(translated_chunks) and translated_chunks[start] is not None:
+        start += 1
+    return start
+
+
+def step5_translate_text(original_text, use_gpu, quantize=False, progress=gr.Progress()):
+    """Translate text in smaller chunks and stream the result. `quantize` uses the int8 model on CPU."""
     if not original_text.strip():
         raise gr.Error("No text to translate.")
 
     device = "cpu"
     if use_gpu:
-        if CUDA_AVAILABLE:
+        if cuda_available():
             device = "cuda"
-        elif torch.backends.mps.is_available():
+        elif mps_available():
             device = "mps"
+    quantize = quantize and device == "cpu"
 
-    progress(0, desc=f"Loading translator on {device}...")
+    progress(0, desc="Checking translation cache...")
     try:
-        translator = load_translator(device)
-        chunks = _split_text(original_text, sentences_per_chunk=1)
-        translated_chunks = []
-        for i, chunk in enumerate(chunks):
-            progress((i / max(len(chunks), 1)) * 0.9 + 0.05,
-                     desc=f"Translating chunk {i + 1}/{len(chunks)}...")
-            result = translator(chunk, max_length=512)
-            translated_chunk = result[0]["translation_text"]
-            translated_chunks.append(translated_chunk)
-            yield " ".join(translated_chunks)
-        progress(1, desc="Translation Complete!")
+        with stage("step5_translate") as timing:
+            chunks = _split_text(original_text, sentences_per_chunk=1)
+            timing.items = len(chunks)
+            translated_chunks = [None] * len(chunks)
+            keys = [_translation_key(chunk, quantize) for chunk in chunks]
+            cache = get_translation_cache() if AppConfig.TRANSLATION_CACHE_ENABLED else None
+            if cache is not None:
+                with stage("cache_lookup"):
+                    cached = cache.get_many(keys)
+                for i, key in enumerate(keys):
+                    if key in cached:
+                        translated_chunks[i] = cached[key].decode("utf-8")
+
+            # Cache hits at the start of the text are streamed before the model is even loaded.
+            emitted = _ready_prefix(translated_chunks, 0)
+            if emitted:
+                yield " ".join(translated_chunks[:emitted])
+
+            # Repeated sentences inside the text are translated once.
+            missing = {}
+            for i, key in enumerate(keys):
+                if translated_chunks[i] is None:
+                    missing.setdefault(key, []).append(i)
+            if missing:
+                progress(0.05, desc=f"Loading translator on {device}...")
+                with stage("model_load"):
+                    translator = load_translator(device, quantize)
+                missing_keys = list(missing)
+                sources = [chunks[missing[key][0]] for key in missing_keys]
+                done = len(chunks) - sum(len(indices) for indices in missing.values())
+                batches = _length_bucketed_batches(
+                    sources, translator.tokenizer, AppConfig.TRANSLATION_BATCH_SIZE, AppConfig.TRANSLATION_BUCKET_WINDOW
+                )
+                for batch in batches:
+                    progress((done / len(chunks)) * 0.9 + 0.05,
+                             desc=f"Translating chunks {done + 1}-{done + len(batch)}/{len(chunks)}...")
+                    with stage("inference", items=len(batch)):
+                        results = translator([sources[b] for b in batch], max_length=512, batch_size=len(batch))
+                    for b, result in zip(batch, results):
+                        for i in missing[missing_keys[b]]:
+                            translated_chunks[i] = result["translation_text"]
+                            done += 1
+                    if cache is not None:
+                        with stage("cache_write"):
+                            cache.put_many([(missing_keys[b], result["translation_text"].encode("utf-8"))
+                                            for b, result in zip(batch, results)])
+                    # Only stream the part of the text whose sentences are all translated.
+                    ready = _ready_prefix(translated_chunks, emitted)
+                    if ready > emitted:
+                        emitted = ready
+                        yield " ".join(translated_chunks[:ready])
+            if cache is not None:
+                print(f"Translation cache stats: {cache.stats()}")
+            progress(1, desc="Translation Complete!")
     except Exception as e:
         raise gr.Error(f"Translation failed: {e}")
-
-# We need to import torch for the MPS check in step5_translate_text
-import torch
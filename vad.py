@@ -0,0 +1,111 @@
+# vad.py
+"""
+Energy-based voice activity detection, used to give Whisper only the parts of a
+recording that contain speech, packed into windows of at most 30 s.
+
+    regions = speech_regions(samples, 16000)
+    for window in pack_windows(regions, 16000):
+        audio = window_audio(samples, window)
+"""
+import bisect
+
+import numpy as np
+
+from audio_chunking import find_cut_point
+from config import AppConfig
+
+# Length of the frames whose energy is compared with the threshold.
+FRAME_MS = 30
+# Frames quieter than this (dBFS) are never speech, whatever the noise floor.
+MIN_SPEECH_DB = -70
+
+
+def speech_regions(samples, sample_rate, margin_db=None, min_speech_ms=250, min_silence_ms=500, pad_ms=200):
+    """
+    [(start, end), ...] sample ranges that contain speech, in order.
+    A frame is speech when it is `margin_db` (default: VAD_MARGIN_DB) louder than the
+    noise floor (the 10th percentile of frame energy), capped 10 dB below the loud
+    frames so that recordings without pauses are kept whole. Pauses shorter than
+    `min_silence_ms` are bridged, shorter bursts dropped, and every region is
+    widened by `pad_ms` so word onsets and endings are not cut.
+    """
+    hop = max(1, sample_rate * FRAME_MS // 1000)
+    n = len(samples) // hop
+    if n == 0:
+        return [(0, len(samples))] if len(samples) else []
+    frames = np.asarray(samples[:n * hop], dtype=np.float64).reshape(n, hop)
+    level = 10 * np.log10((frames * frames).mean(axis=1) + 1e-12)
+    floor, loud = np.percentile(level, [10, 95])
+    margin = AppConfig.VAD_MARGIN_DB if margin_db is None else margin_db
+    speech = level > max(min(floor + margin, loud - 10), MIN_SPEECH_DB)
+
+    # Start/end frame of every run of speech frames.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    runs = edges.reshape(-1, 2)
+    min_gap, min_run, pad = (max(1, ms // FRAME_MS) for ms in (min_silence_ms, min_speech_ms, pad_ms))
+    merged = []
+    for start, end in runs.tolist():
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    regions = []
+    for start, end in merged:
+        if end - start < min_run:
+            continue
+        start, end = max(0, start - pad) * hop, min(n, end + pad) * hop
+        if end == n * hop:
+            end = len(samples)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def pack_windows(regions, sample_rate, max_seconds=30.0, samples=None):
+    """
+    Groups consecutive regions into windows of at most `max_seconds` of audio.
+    A region longer than that is split, at the quietest point of its last 6 s when
+    `samples` is given. Each window is a list of (start, end) sample ranges.
+    """
+    limit = int(max_seconds * sample_rate)
+    pieces = []
+    for start, end in regions:
+        while end - start > limit:
+            cut = start + limit
+            if samples is not None:
+                cut = find_cut_point(samples[start:start + limit], sample_rate, limit - 3 * sample_rate,
+                                     3 * sample_rate) + start
+                cut = max(start + 1, min(cut, start + limit))
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    windows, length = [], 0
+    for start, end in pieces:
+        if windows and length + (end - start) <= limit:
+            windows[-1].append((start, end))
+            length += end - start
+        else:
+            windows.append([(start, end)])
+            length = end - start
+    return windows
+
+
+def window_audio(samples, window):
+    """The window's ranges of `samples` joined end to end."""
+    return np.concatenate([samples[start:end] for start, end in window])
+
+
+def to_source_time(window, seconds, sample_rate, is_end=False):
+    """
+    Maps a time within a window's joined audio back to seconds in the source.
+    A time on the boundary between two ranges is the end of the first when
+    `is_end`, else the start of the second.
+    """
+    offsets = np.cumsum([0] + [end - start for start, end in window]).tolist()
+    position = min(max(seconds * sample_rate, 0), offsets[-1])
+    search = bisect.bisect_left if is_end else bisect.bisect_right
+    i = min(max(search(offsets, position) - 1, 0), len(window) - 1)
+    return (window[i][0] + position - offsets[i]) / sample_rate
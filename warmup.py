@@ -0,0 +1,114 @@
+# warmup.py
+import threading
+import time
+
+import numpy as np
+
+from config import AppConfig, cuda_available, default_device
+from transcription_logic import load_model, model_lock
+from translation_logic import load_translator
+from synthesis_logic import iter_speech_kokoro, load_local_kmodel, resolve_kokoro_voice
+
+_status = {}
+_threads = []
+_lock = threading.Lock()
+
+
+def _warm_whisper():
+    device = "cuda" if cuda_available() else "cpu"
+    started = time.perf_counter()
+    model = load_model(AppConfig.DEFAULT_WHISPER_MODEL, device, AppConfig.QUANTIZE_CPU_MODELS)
+    loaded = time.perf_counter()
+    with model_lock(model):
+        model.transcribe(np.zeros(16000, dtype=np.float32), fp16=device == "cuda",
+                         language=AppConfig.DEFAULT_LANGUAGE, temperature=0.0)
+    return loaded - started, time.perf_counter() - loaded
+
+
+def _warm_translation():
+    started = time.perf_counter()
+    translator = load_translator(default_device(), AppConfig.QUANTIZE_CPU_MODELS)
+    loaded = time.perf_counter()
+    translator(["Hallo Welt."], max_length=32)
+    return loaded - started, time.perf_counter() - loaded
+
+
+def _warm_kokoro():
+    started = time.perf_counter()
+    load_local_kmodel(default_device())
+    loaded = time.perf_counter()
+    # Builds the KPipeline (G2P/spaCy) and voice for the default voice and runs it once.
+    voice_id, lang = resolve_kokoro_voice(AppConfig.DEFAULT_KOKORO_VOICE_LABEL)
+    for _ in iter_speech_kokoro("Hello.", lang, voice_id, use_gpu=True):
+        pass
+    return loaded - started, time.perf_counter() - loaded
+
+
+WARMERS = {"whisper": _warm_whisper, "translation": _warm_translation, "kokoro": _warm_kokoro}
+
+
+def _run(name):
+    try:
+        load_seconds, warmup_seconds = WARMERS[name]()
+        update = {"state": "ready", "load_s": round(load_seconds, 2), "warmup_s": round(warmup_seconds, 2)}
+        print(f"Preloaded {name}: load {load_seconds:.2f}s, warm-up {warmup_seconds:.2f}s")
+    except Exception as e:
+        update = {"state": "failed", "error": str(e)}
+        print(f"Preloading {name} failed: {e}")
+    with _lock:
+        _status[name].update(update)
+
+
+def start_preload(names=None):
+    """
+    Loads and warms up the given models (default: AppConfig.PRELOAD_MODELS) in
+    background threads, one per model, and returns immediately.
+    """
+    names = AppConfig.PRELOAD_MODELS if names is None else names
+    for name in names:
+        if name not in WARMERS:
+            raise ValueError(f"Unknown model '{name}' in PRELOAD_MODELS (choose from {', '.join(WARMERS)})")
+        with _lock:
+            if name in _status:
+                continue
+            _status[name] = {"state": "loading"}
+        thread = threading.Thread(target=_run, args=(name,), name=f"preload-{name}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+
+
+def wait_until_ready(timeout=None):
+    """Blocks until every preload has finished (or failed). Returns is_ready()."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for thread in list(_threads):
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    return is_ready()
+
+
+def is_ready():
+    """True once no model is still loading. A failed preload does not block readiness; it is reported in status()."""
+    with _lock:
+        return all(entry["state"] != "loading" for entry in _status.values())
+
+
+def status():
+    with _lock:
+        return {"ready": all(e["state"] != "loading" for e in _status.values()),
+                "models": {name: dict(entry) for name, entry in _status.items()}}
+
+
+def status_markdown():
+    """One-line readiness summary for the UI."""
+    current = status()
+    if not current["models"]:
+        return "Models load on first use."
+    parts = []
+    for name, entry in current["models"].items():
+        if entry["state"] == "ready":
+            parts.append(f"{name}: ready ({entry['load_s'] + entry['warmup_s']:.1f}s)")
+        elif entry["state"] == "failed":
+            parts.append(f"{name}: not preloaded ({entry['error']})")
+        else:
+            parts.append(f"{name}: loading...")
+    prefix = "✅ Models ready" if current["ready"] else "⏳ Warming up models"
+    return f"{prefix} — " + ", ".join(parts)